@@ -0,0 +1,296 @@
+#
+# Generates synthetic mysqldump- and pg_dump-style SQL files for benchmarking.
+#
+# The output only depends on the options and the seed, so two runs with the same
+# options produce byte-for-byte identical files, and timings taken on different
+# commits can be compared.
+#
+
+import random
+import re
+
+import click
+
+DUMP_STYLES = ["mysql", "postgres"]
+
+DEFAULT_SIZE = 20 * 1024 * 1024
+DEFAULT_TABLES = 8
+DEFAULT_COLUMNS = 8
+DEFAULT_ROWS_PER_INSERT = 100
+
+# Word matched by the grep benchmark; it appears in roughly one row in a thousand
+GREP_NEEDLE = "needle"
+
+TABLE_NAMES = [
+    "users", "orders", "order_items", "products", "payments", "addresses", "sessions", "audit_log",
+    "invoices", "shipments", "categories", "reviews", "coupons", "inventory", "suppliers", "events",
+]
+
+WORDS = [
+    "alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet",
+    "kilo", "lima", "mike", "november", "oscar", "papa", "quebec", "romeo", "sierra", "tango",
+    "O'Brien", "back\\slash", "café", "naïve", "Zürich", "line\nbreak", "semi;colon", "tab\there",
+]
+
+# Column types in the order they are used, as (kind, mysql type, postgres type)
+COLUMN_TYPES = [
+    ("string", "varchar(64)", "character varying(64)"),
+    ("integer", "int", "integer"),
+    ("decimal", "decimal(10,2)", "numeric(10,2)"),
+    ("timestamp", "datetime", "timestamp without time zone"),
+    ("text", "text", "text"),
+    ("nullable", "varchar(32) DEFAULT NULL", "character varying(32)"),
+]
+
+SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?\s*$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def parse_size(text):
+    """
+    Parse a size such as 500000, 64K, 20MB or 1.5G into a number of bytes.
+    """
+    match = SIZE_PATTERN.match(str(text))
+    if not match:
+        raise ValueError(f"invalid size: {text!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def table_names(count):
+    names = []
+    for index in range(count):
+        name = TABLE_NAMES[index % len(TABLE_NAMES)]
+        if index >= len(TABLE_NAMES):
+            name = f"{name}_{index // len(TABLE_NAMES)}"
+        names.append(name)
+    return names
+
+
+def column_layout(count):
+    """
+    Return (name, kind, mysql type, postgres type) for each column; the first
+    column is always the integer primary key.
+    """
+    columns = [("id", "id", "int NOT NULL AUTO_INCREMENT", "integer NOT NULL")]
+    for index in range(count - 1):
+        kind, mysql_type, postgres_type = COLUMN_TYPES[index % len(COLUMN_TYPES)]
+        columns.append((f"{kind}_{index + 1}", kind, mysql_type, postgres_type))
+    return columns
+
+
+class DumpGenerator:
+    """
+    Writes a synthetic dump in the layout of mysqldump (one table at a time:
+    DROP, CREATE, LOCK, extended INSERTs, UNLOCK) or of pg_dump --inserts
+    --rows-per-insert (every CREATE TABLE, then the data, then the constraints).
+
+    Data is spread evenly over the tables until the file reaches size bytes.
+    """
+
+    def __init__(self, style="mysql", size=DEFAULT_SIZE, tables=DEFAULT_TABLES, columns=DEFAULT_COLUMNS,
+                 rows_per_insert=DEFAULT_ROWS_PER_INSERT, seed=0):
+        if style not in DUMP_STYLES:
+            raise ValueError(f"unknown dump style: {style!r}")
+        if tables < 1 or columns < 1 or rows_per_insert < 1:
+            raise ValueError("tables, columns and rows_per_insert must be at least 1")
+
+        self.style = style
+        self.size = size
+        self.tables = table_names(tables)
+        self.columns = column_layout(columns)
+        self.rows_per_insert = rows_per_insert
+        self.seed = seed
+
+    def quote_identifier(self, name):
+        return f"`{name}`" if self.style == "mysql" else name
+
+    def quote_string(self, value):
+        if self.style == "mysql":
+            value = value.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n").replace("\t", "\\t")
+        else:
+            value = value.replace("'", "''")
+        return f"'{value}'"
+
+    def value(self, random_source, kind, row_id):
+        if kind == "id":
+            return str(row_id)
+        if kind == "integer":
+            return str(random_source.randrange(-100000, 1000000))
+        if kind == "decimal":
+            return f"{random_source.randrange(0, 10000000) / 100:.2f}"
+        if kind == "timestamp":
+            return (f"'20{random_source.randrange(10, 30):02}-{random_source.randrange(1, 13):02}-"
+                    f"{random_source.randrange(1, 29):02} {random_source.randrange(24):02}:"
+                    f"{random_source.randrange(60):02}:{random_source.randrange(60):02}'")
+        if kind == "nullable" and random_source.random() < 0.3:
+            return "NULL"
+
+        length = random_source.randrange(8, 40) if kind == "text" else random_source.randrange(1, 4)
+        words = [random_source.choice(WORDS) for _ in range(length)]
+        if random_source.random() < 0.001:
+            words.append(GREP_NEEDLE)
+        text = " ".join(words)
+        if kind != "text":
+            text = text[:32 if kind == "nullable" else 64]
+        return self.quote_string(text)
+
+    def row(self, random_source, row_id):
+        separator = "," if self.style == "mysql" else ", "
+        return "(" + separator.join(self.value(random_source, kind, row_id) for _, kind, _, _ in self.columns) + ")"
+
+    def header(self):
+        if self.style == "mysql":
+            return (
+                "-- MySQL dump 10.13  Distrib 8.0.36, for Linux (x86_64)\n--\n"
+                "-- Host: localhost    Database: bench\n"
+                "-- ------------------------------------------------------\n"
+                "-- Server version\t8.0.36\n\n"
+                "/*!40101 SET @OLD_CHARACTER_SET_CLIENT=@@CHARACTER_SET_CLIENT */;\n"
+                "/*!50503 SET NAMES utf8mb4 */;\n"
+                "/*!40103 SET @OLD_TIME_ZONE=@@TIME_ZONE */;\n"
+                "/*!40103 SET TIME_ZONE='+00:00' */;\n"
+                "/*!40014 SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0 */;\n"
+                "/*!40014 SET @OLD_FOREIGN_KEY_CHECKS=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0 */;\n\n"
+            )
+        return (
+            "--\n-- PostgreSQL database dump\n--\n\n"
+            "SET statement_timeout = 0;\n"
+            "SET lock_timeout = 0;\n"
+            "SET client_encoding = 'UTF8';\n"
+            "SET standard_conforming_strings = on;\n"
+            "SELECT pg_catalog.set_config('search_path', '', false);\n"
+            "SET check_function_bodies = false;\n"
+            "SET client_min_messages = warning;\n\n"
+            "SET default_tablespace = '';\n\n"
+        )
+
+    def create_table(self, table):
+        if self.style == "mysql":
+            lines = [f"  `{name}` {mysql_type}" for name, _, mysql_type, _ in self.columns]
+            lines.append("  PRIMARY KEY (`id`)")
+            return (
+                f"--\n-- Table structure for table `{table}`\n--\n\n"
+                f"DROP TABLE IF EXISTS `{table}`;\n"
+                "/*!40101 SET @saved_cs_client     = @@character_set_client */;\n"
+                "/*!50503 SET character_set_client = utf8mb4 */;\n"
+                f"CREATE TABLE `{table}` (\n" + ",\n".join(lines) + "\n"
+                ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;\n"
+                "/*!40101 SET character_set_client = @saved_cs_client */;\n\n"
+            )
+        lines = [f"    {name} {postgres_type}" for name, _, _, postgres_type in self.columns]
+        return (
+            f"--\n-- Name: {table}; Type: TABLE; Schema: public; Owner: bench\n--\n\n"
+            f"CREATE TABLE public.{table} (\n" + ",\n".join(lines) + "\n);\n\n"
+            f"ALTER TABLE public.{table} OWNER TO bench;\n\n"
+        )
+
+    def data_header(self, table):
+        if self.style == "mysql":
+            return (
+                f"--\n-- Dumping data for table `{table}`\n--\n\n"
+                f"LOCK TABLES `{table}` WRITE;\n"
+                f"/*!40000 ALTER TABLE `{table}` DISABLE KEYS */;\n"
+            )
+        return f"--\n-- Data for Name: {table}; Type: TABLE DATA; Schema: public; Owner: bench\n--\n\n"
+
+    def data_footer(self, table):
+        if self.style == "mysql":
+            return f"/*!40000 ALTER TABLE `{table}` ENABLE KEYS */;\nUNLOCK TABLES;\n\n"
+        return "\n"
+
+    def footer(self):
+        if self.style == "mysql":
+            return (
+                "/*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;\n"
+                "/*!40014 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS */;\n"
+                "/*!40014 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS */;\n"
+                "/*!40101 SET CHARACTER_SET_CLIENT=@OLD_CHARACTER_SET_CLIENT */;\n\n"
+                "-- Dump completed\n"
+            )
+        constraints = "".join(
+            f"ALTER TABLE ONLY public.{table}\n    ADD CONSTRAINT {table}_pkey PRIMARY KEY (id);\n\n"
+            for table in self.tables
+        )
+        return constraints + "--\n-- PostgreSQL database dump complete\n--\n\n"
+
+    def generate(self, stream):
+        """
+        Write the dump to a binary stream and return a dict with the number of
+        bytes, rows and INSERT statements written.
+        """
+        random_source = random.Random(self.seed)
+        written = {"bytes": 0, "rows": 0, "inserts": 0}
+
+        def write(text):
+            data = text.encode("utf-8")
+            stream.write(data)
+            written["bytes"] += len(data)
+
+        write(self.header())
+        if self.style == "postgres":
+            for table in self.tables:
+                write(self.create_table(table))
+
+        # Leave room for the statements after the data
+        budget = max(self.size - len(self.footer().encode("utf-8")), 0)
+
+        for index, table in enumerate(self.tables):
+            if self.style == "mysql":
+                write(self.create_table(table))
+            write(self.data_header(table))
+
+            table_end = budget * (index + 1) // len(self.tables)
+            insert = f"INSERT INTO {self.quote_identifier(table) if self.style == 'mysql' else 'public.' + table} VALUES "
+            separator = "," if self.style == "mysql" else ",\n\t"
+            row_id = 0
+            while written["bytes"] < table_end:
+                rows = []
+                for _ in range(self.rows_per_insert):
+                    row_id += 1
+                    rows.append(self.row(random_source, row_id))
+                write(insert + separator.join(rows) + ";\n")
+                written["rows"] += len(rows)
+                written["inserts"] += 1
+
+            write(self.data_footer(table))
+
+        write(self.footer())
+        return written
+
+
+def generate_dump(stream, **kwargs):
+    """
+    Write a synthetic dump to a binary stream; see DumpGenerator for the options.
+    """
+    return DumpGenerator(**kwargs).generate(stream)
+
+
+@click.command()
+@click.argument("output_file", type=click.File("wb"))
+@click.option("--style", type=click.Choice(DUMP_STYLES), default="mysql", help="dump layout (default: mysql)")
+@click.option("--size", type=str, default="20M", help="approximate file size, e.g. 500K, 20M, 1G (default: 20M)")
+@click.option("--tables", type=int, default=DEFAULT_TABLES, help=f"number of tables (default: {DEFAULT_TABLES})")
+@click.option("--columns", type=int, default=DEFAULT_COLUMNS,
+              help=f"columns per table, including the id (default: {DEFAULT_COLUMNS})")
+@click.option("--rows-per-insert", type=int, default=DEFAULT_ROWS_PER_INSERT,
+              help=f"rows per extended INSERT statement (default: {DEFAULT_ROWS_PER_INSERT})")
+@click.option("--seed", type=int, default=0, help="random seed (default: 0)")
+def main(output_file, style, size, tables, columns, rows_per_insert, seed):
+    """
+    Write a synthetic SQL dump to OUTPUT_FILE.
+    """
+    try:
+        size = parse_size(size)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--size")
+
+    written = generate_dump(
+        output_file, style=style, size=size, tables=tables, columns=columns, rows_per_insert=rows_per_insert,
+        seed=seed,
+    )
+    click.echo(f"wrote {written['bytes']} bytes, {written['rows']} rows in {written['inserts']} INSERT statements",
+               err=True)
+
+
+if __name__ == "__main__":
+    main()
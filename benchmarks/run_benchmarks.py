@@ -0,0 +1,262 @@
+#
+# Runs every sqlaxe command over generated dumps and records how fast they go.
+#
+# Each command runs in its own process, timed from start to exit, with its peak
+# resident set size taken from the operating system. Results are appended to a
+# JSON history file together with the commit they were measured on, and compared
+# with the last run over the same dump.
+#
+
+import datetime
+import json
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+import sqlglot
+
+from sqlaxe.lib.sql_reader import SQLReader
+
+from .generate_dump import (DEFAULT_COLUMNS, DEFAULT_ROWS_PER_INSERT, DEFAULT_TABLES, DUMP_STYLES, GREP_NEEDLE,
+                            generate_dump, parse_size)
+
+DEFAULT_HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.json")
+
+# Input dialect for each dump style
+STYLE_DIALECTS = {"mysql": "mysql", "postgres": "postgres"}
+
+# Arguments for each command; {output_directory} is a fresh directory in the work directory
+COMMANDS = {
+    "split": ["split", "{dump}", "--dialect", "{dialect}", "--output-directory", "{output_directory}"],
+    "pp": ["pp", "{dump}", "--dialect", "{dialect}"],
+    "grep": ["grep", "{dump}", "--pattern", GREP_NEEDLE, "--dialect", "{dialect}"],
+    "table-name-replace": ["table-name-replace", "{dump}", "--rename", "^", "bench_", "--dialect", "{dialect}"],
+    "table-truncate": ["table-truncate", "{dump}", "--dialect", "{dialect}"],
+    "table-drop": ["table-drop", "{dump}", "--dialect", "{dialect}"],
+}
+
+
+def run_command(arguments, stdout_path, stderr_path):
+    """
+    Run a command to completion and return (exit code, seconds, peak RSS in
+    bytes, or None where the platform doesn't report it).
+    """
+    with open(stdout_path, "wb") as stdout, open(stderr_path, "wb") as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(arguments, stdin=subprocess.DEVNULL, stdout=stdout, stderr=stderr)
+
+        if not hasattr(os, "wait4"):
+            return process.wait(), time.perf_counter() - start, None
+
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return process.returncode, seconds, peak_rss
+
+
+def benchmark_command(name, sqlaxe, dump, dialect, work_directory, statements, size, repeat, jobs):
+    """
+    Run one command repeat times over dump and return its best timing as a dict.
+    """
+    best = None
+    for attempt in range(repeat):
+        output_directory = os.path.join(work_directory, f"{name}_output")
+        arguments = [argument.format(dump=dump, dialect=dialect, output_directory=output_directory)
+                     for argument in COMMANDS[name]]
+        if jobs is not None:
+            arguments += ["--jobs", str(jobs)]
+
+        stdout_path = os.path.join(work_directory, f"{name}.out")
+        stderr_path = os.path.join(work_directory, f"{name}.err")
+        returncode, seconds, peak_rss = run_command(sqlaxe + arguments, stdout_path, stderr_path)
+
+        if returncode != 0:
+            with open(stderr_path, "r", encoding="utf-8", errors="replace") as stderr:
+                lines = stderr.read().strip().splitlines()
+            return {"returncode": returncode, "error": lines[-1] if lines else ""}
+
+        result = {
+            "returncode": returncode,
+            "seconds": round(seconds, 3),
+            "statements_per_second": round(statements / seconds, 1),
+            "mb_per_second": round(size / seconds / 1024 / 1024, 3),
+            "peak_rss_mb": None if peak_rss is None else round(peak_rss / 1024 / 1024, 1),
+            "output_bytes": os.path.getsize(stdout_path),
+        }
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+
+        os.remove(stdout_path)
+        os.remove(stderr_path)
+        shutil.rmtree(output_directory, ignore_errors=True)
+
+    return best
+
+
+def count_statements(path, dialect):
+    with open(path, "rb") as sql_file:
+        return sum(1 for _ in SQLReader(dialect=dialect).read_statements(sql_file))
+
+
+def git_revision():
+    """
+    Return (commit hash, whether the working tree has uncommitted changes), or
+    (None, None) outside a git checkout.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=directory, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=directory,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as history_file:
+        return json.load(history_file)
+
+
+def save_history(path, history):
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w", encoding="utf-8") as history_file:
+        json.dump(history, history_file, indent=2)
+        history_file.write("\n")
+    os.replace(temporary_path, path)
+
+
+def find_baseline(history, dataset, jobs, commit=None):
+    """
+    Return the latest run over the same dataset with the same --jobs, on the
+    given commit if one is given (a prefix of the hash is enough).
+    """
+    for run in reversed(history):
+        if run["dataset"] != dataset or run.get("jobs") != jobs:
+            continue
+        if commit is None or (run.get("commit") or "").startswith(commit):
+            return run
+    return None
+
+
+def format_change(current, previous):
+    if not current or not previous or "seconds" not in current or "seconds" not in previous:
+        return ""
+    change = (current["seconds"] - previous["seconds"]) / previous["seconds"] * 100
+    return f"{change:+.1f}%"
+
+
+def print_results(run, baseline):
+    dataset = run["dataset"]
+    click.echo(f"\n{dataset['style']} dump: {dataset['bytes'] / 1024 / 1024:.1f} MB, "
+               f"{dataset['statements']} statements, {dataset['rows']} rows")
+    if baseline:
+        click.echo(f"compared with {(baseline.get('commit') or 'unknown')[:10]} ({baseline['timestamp']})")
+
+    click.echo(f"{'command':<20}{'seconds':>10}{'stmts/s':>12}{'MB/s':>10}{'peak MB':>10}{'change':>10}")
+    for name, result in run["results"].items():
+        if "seconds" not in result:
+            click.echo(f"{name:<20}  failed ({result['returncode']}): {result['error']}")
+            continue
+        previous = baseline["results"].get(name) if baseline else None
+        peak_rss = "-" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.1f}"
+        click.echo(f"{name:<20}{result['seconds']:>10.2f}{result['statements_per_second']:>12.0f}"
+                   f"{result['mb_per_second']:>10.2f}{peak_rss:>10}{format_change(result, previous):>10}")
+
+
+@click.command()
+@click.option("--style", "styles", type=click.Choice(DUMP_STYLES), multiple=True,
+              help="dump layout to benchmark; may be repeated (default: mysql and postgres)")
+@click.option("--size", type=str, default="20M", help="approximate dump size, e.g. 500K, 20M, 1G (default: 20M)")
+@click.option("--tables", type=int, default=DEFAULT_TABLES, help=f"number of tables (default: {DEFAULT_TABLES})")
+@click.option("--columns", type=int, default=DEFAULT_COLUMNS,
+              help=f"columns per table, including the id (default: {DEFAULT_COLUMNS})")
+@click.option("--rows-per-insert", type=int, default=DEFAULT_ROWS_PER_INSERT,
+              help=f"rows per extended INSERT statement (default: {DEFAULT_ROWS_PER_INSERT})")
+@click.option("--seed", type=int, default=0, help="random seed for the dump (default: 0)")
+@click.option("--command", "commands", type=click.Choice(list(COMMANDS)), multiple=True,
+              help="command to benchmark; may be repeated (default: all of them)")
+@click.option("--repeat", type=int, default=1, help="runs per command; the fastest is recorded (default: 1)")
+@click.option("--jobs", type=int, default=None, help="pass --jobs N to every command")
+@click.option("--sqlaxe", type=str, default=None,
+              help="command line that runs sqlaxe (default: this Python with -m sqlaxe.sqlaxe)")
+@click.option("--history", type=click.Path(dir_okay=False), default=DEFAULT_HISTORY_FILE,
+              help="JSON file the results are appended to (default: benchmarks/history.json)")
+@click.option("--save/--no-save", default=True, help="append the results to the history file (default: on)")
+@click.option("--compare", type=str, default=None,
+              help="commit to compare with (default: the last run over the same dump)")
+@click.option("--label", type=str, default=None, help="note stored with the results")
+@click.option("--work-directory", type=click.Path(file_okay=False), default=None,
+              help="directory for the dumps and output (default: a temporary directory)")
+def main(styles, size, tables, columns, rows_per_insert, seed, commands, repeat, jobs, sqlaxe, history, save,
+         compare, label, work_directory):
+    """
+    Benchmark every sqlaxe command over synthetic dumps.
+    """
+    try:
+        size = parse_size(size)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--size")
+
+    sqlaxe = shlex.split(sqlaxe) if sqlaxe else [sys.executable, "-m", "sqlaxe.sqlaxe"]
+    commit, dirty = git_revision()
+    runs = load_history(history)
+
+    with tempfile.TemporaryDirectory(prefix="sqlaxe_benchmark_") as temporary_directory:
+        work_directory = work_directory or temporary_directory
+        os.makedirs(work_directory, exist_ok=True)
+
+        for style in styles or DUMP_STYLES:
+            dialect = STYLE_DIALECTS[style]
+            options = {"style": style, "size": size, "tables": tables, "columns": columns,
+                       "rows_per_insert": rows_per_insert, "seed": seed}
+
+            dump = os.path.join(work_directory, f"{style}_dump.sql")
+            click.echo(f"generating {style} dump", err=True)
+            with open(dump, "wb") as dump_file:
+                written = generate_dump(dump_file, **options)
+            dataset = dict(options, bytes=written["bytes"], rows=written["rows"],
+                           statements=count_statements(dump, dialect))
+
+            results = {}
+            for name in commands or COMMANDS:
+                click.echo(f"running {name}", err=True)
+                results[name] = benchmark_command(name, sqlaxe, dump, dialect, work_directory,
+                                                  dataset["statements"], written["bytes"], repeat, jobs)
+            os.remove(dump)
+
+            run = {
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "commit": commit,
+                "dirty": dirty,
+                "label": label,
+                "python": platform.python_version(),
+                "sqlglot": sqlglot.__version__,
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "jobs": jobs,
+                "dataset": dataset,
+                "results": results,
+            }
+            print_results(run, find_baseline(runs, dataset, jobs, compare))
+            runs.append(run)
+
+    if save:
+        save_history(history, runs)
+        click.echo(f"\nresults appended to {history}", err=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#
+# Times how long sqlaxe takes to start: `sqlaxe --help`, which shouldn't load
+# sqlglot at all, and `sqlaxe pp` over a two-statement file, which is dominated
+# by imports. Exits with status 1 when either is slower than its limit, so it
+# can guard against an import creeping back into the start-up path; the
+# default limits leave room for slow CI machines.
+#
+
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+SMALL_FILE = "SELECT 1;\nINSERT INTO users (id, name) VALUES (1, 'a');\n"
+
+DEFAULT_HELP_LIMIT = 0.1
+DEFAULT_PP_LIMIT = 0.5
+
+
+def time_command(arguments, repeat):
+    """
+    Run a command repeat times and return the elapsed seconds of each run.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(arguments, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+@click.command()
+@click.option("--repeat", type=int, default=10, help="runs per command (default: 10)")
+@click.option("--sqlaxe", type=str, default=None,
+              help="command used to run sqlaxe (default: this interpreter with -m sqlaxe.sqlaxe)")
+@click.option("--help-limit", type=float, default=DEFAULT_HELP_LIMIT,
+              help=f"slowest acceptable median for --help, in seconds over a bare interpreter "
+                   f"(default: {DEFAULT_HELP_LIMIT})")
+@click.option("--pp-limit", type=float, default=DEFAULT_PP_LIMIT,
+              help=f"slowest acceptable median for pp of a small file, in seconds over a bare interpreter "
+                   f"(default: {DEFAULT_PP_LIMIT})")
+def main(repeat, sqlaxe, help_limit, pp_limit):
+    """
+    Time sqlaxe's start-up, net of the interpreter's own.
+    """
+    sqlaxe = shlex.split(sqlaxe) if sqlaxe else [sys.executable, "-m", "sqlaxe.sqlaxe"]
+
+    with tempfile.TemporaryDirectory(prefix="sqlaxe-startup-") as directory:
+        small_file = os.path.join(directory, "small.sql")
+        with open(small_file, "w") as file:
+            file.write(SMALL_FILE)
+
+        interpreter = statistics.median(time_command([sys.executable, "-c", "pass"], repeat))
+        checks = [
+            ("--help", sqlaxe + ["--help"], help_limit),
+            ("pp", sqlaxe + ["pp", small_file], pp_limit),
+        ]
+
+        click.echo(f"{'command':<10} {'median':>9} {'best':>9} {'limit':>9}")
+        click.echo(f"{'python':<10} {interpreter * 1000:>7.0f}ms")
+
+        failed = False
+        for name, arguments, limit in checks:
+            timings = time_command(arguments, repeat)
+            median = statistics.median(timings) - interpreter
+            status = "ok" if median <= limit else "too slow"
+            failed = failed or median > limit
+            click.echo(f"{name:<10} {median * 1000:>7.0f}ms {(min(timings) - interpreter) * 1000:>7.0f}ms "
+                       f"{limit * 1000:>7.0f}ms  {status}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
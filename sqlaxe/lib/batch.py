@@ -0,0 +1,255 @@
+import glob
+import io
+import os
+import sys
+import tempfile
+from typing import NamedTuple
+
+from .compression import (SUFFIXES, CompressedTextWriter, compression_from_name, open_input, open_output,
+                          strip_compression_suffix)
+from .defaults import STDIN
+from .profiler import profile_stage
+from .sql_parallel import imap_ordered, resolve_jobs
+
+# Files picked up when a directory is given as input
+SQL_EXTENSIONS = [".sql"] + [".sql" + suffix for suffix in SUFFIXES.values()]
+
+# Bytes identifying a tar archive, and where they are
+TAR_MAGIC = b"ustar"
+TAR_MAGIC_OFFSET = 257
+
+# Where a BatchJob puts each file's output; see BatchJob
+OUTPUT_MODES = ["stdout", "in-place", "tree", "directory"]
+
+
+class InputFile(NamedTuple):
+    # Path to open, and the path relative to the directory or glob it was found through
+    path: str
+    relative_path: str
+
+
+class FileResult(NamedTuple):
+    path: str
+    output: str = None
+    error: str = None
+
+
+def is_sql_file(name):
+    name = name.lower()
+    return any(name.endswith(extension) for extension in SQL_EXTENSIONS)
+
+
+def expand_inputs(arguments):
+    """
+    Turn paths, directories and glob patterns into the list of files they
+    name, in a deterministic order: arguments in the order given, and the
+    files found through each one sorted by path. Directories are searched
+    recursively for .sql files, compressed or not; a file named more than
+    once is only listed the first time.
+
+    Raises FileNotFoundError for a path that doesn't exist or a pattern that
+    matches nothing.
+    """
+    inputs = []
+    seen = set()
+
+    def add(path, relative_path):
+        key = os.path.abspath(path) if path != STDIN else STDIN
+        if key not in seen:
+            seen.add(key)
+            inputs.append(InputFile(path, relative_path))
+
+    for argument in arguments:
+        if argument == STDIN:
+            add(STDIN, STDIN)
+        elif glob.has_magic(argument):
+            matches = sorted(path for path in glob.glob(argument, recursive=True) if os.path.isfile(path))
+            if not matches:
+                raise FileNotFoundError(f"no files match {argument}")
+
+            # Paths are mirrored from the part of the pattern before the first wildcard
+            root = argument
+            while glob.has_magic(root):
+                root = os.path.dirname(root)
+            for path in matches:
+                add(path, os.path.relpath(path, root or "."))
+        elif os.path.isdir(argument):
+            found = []
+            for directory, subdirectories, files in os.walk(argument):
+                subdirectories.sort()
+                found.extend(os.path.join(directory, name) for name in files if is_sql_file(name))
+            for path in sorted(found):
+                add(path, os.path.relpath(path, argument))
+        elif os.path.isfile(argument):
+            add(argument, os.path.basename(argument))
+        else:
+            raise FileNotFoundError(f"no such file or directory: {argument}")
+
+    return inputs
+
+
+def is_archive(source):
+    """
+    Return True if a binary file object is a tar archive, as written by
+    split --archive.
+    """
+    peek = getattr(source, "peek", None)
+    if peek is None:
+        return False
+    try:
+        head = peek(TAR_MAGIC_OFFSET + len(TAR_MAGIC))
+    except (OSError, ValueError):
+        return False
+    return head[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + len(TAR_MAGIC)] == TAR_MAGIC
+
+
+def open_sql_file(path):
+    """
+    Open an input file for reading as binary, decompressing it if needed; "-"
+    is stdin. An archive written by split --archive reads as the SQL of all
+    of its sections, in order.
+    """
+    if path == STDIN:
+        return open_input(sys.stdin.buffer)
+
+    source = open(path, "rb")
+    if is_archive(source):
+        from .sql_archive import SQLArchive
+
+        source.close()
+        return SQLArchive(path).open()
+    return open_input(source)
+
+
+def write_statements(output, statements, separator):
+    """
+    Write statements to a text stream as they are produced, joined by
+    separator and followed by a newline.
+    """
+    for index, statement in enumerate(statements):
+        with profile_stage("write", len(statement)):
+            if index:
+                output.write(separator)
+            output.write(statement)
+    output.write("\n")
+
+
+def file_header(path):
+    """
+    Line written before the output of each file when several files are
+    written to stdout; a comment, so the output is still valid SQL.
+    """
+    return f"-- ==> {path} <==\n"
+
+
+class BatchJob:
+    """
+    Runs one command over one input file and writes the result: returned as
+    text to be written to stdout, written back over the input ("in-place"),
+    or written to the same relative path under output_directory ("tree").
+    In "directory" mode the command writes its own output files, into a
+    directory named after the input's relative path under output_directory.
+
+    Instances are called in worker processes, so command must be picklable;
+    method names the command's method that takes a SQL file and yields
+    output statements, or in "directory" mode takes a SQL file and the
+    directory to write to.
+    """
+
+    def __init__(self, command, method, separator, mode="stdout", output_directory=None, compression=None):
+        self.command = command
+        self.method = method
+        self.separator = separator
+        self.mode = mode
+        self.output_directory = output_directory
+        self.compression = compression
+
+    def output_path(self, input_file):
+        if self.mode == "in-place":
+            return input_file.path
+
+        relative_path = strip_compression_suffix(input_file.relative_path)
+        if self.mode == "directory":
+            return os.path.join(self.output_directory, os.path.splitext(relative_path)[0])
+        if self.compression:
+            relative_path += SUFFIXES[self.compression]
+        return os.path.join(self.output_directory, relative_path)
+
+    def write(self, input_file, output):
+        with open_sql_file(input_file.path) as sql_file:
+            write_statements(output, getattr(self.command, self.method)(sql_file), self.separator)
+
+    def write_file(self, input_file):
+        path = self.output_path(input_file)
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        # Written next to the target and moved over it once complete, so an
+        # in-place run never leaves a half-written file behind
+        compression = compression_from_name(path)
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".sqlaxe-", suffix=".tmp")
+        os.close(descriptor)
+        try:
+            with open_output(temporary_path, "w", compression=compression) as output:
+                self.write(input_file, output)
+            if os.path.exists(path):
+                os.chmod(temporary_path, os.stat(path).st_mode & 0o7777)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def __call__(self, input_file):
+        try:
+            if self.mode == "stdout":
+                output = io.StringIO()
+                self.write(input_file, output)
+                return FileResult(input_file.path, output=output.getvalue())
+
+            if self.mode == "directory":
+                with open_sql_file(input_file.path) as sql_file:
+                    getattr(self.command, self.method)(sql_file, self.output_path(input_file))
+            else:
+                self.write_file(input_file)
+            return FileResult(input_file.path)
+        except Exception as e:
+            return FileResult(input_file.path, error=f"{type(e).__name__}: {e}")
+
+
+def run_batch(job, inputs, jobs=1, output=None, headers=True):
+    """
+    Run job over every input file, on a pool of jobs worker processes, and
+    yield a FileResult for each file in input order. In stdout mode each
+    file's output is written to output, after a header line if headers is
+    set; with a single process it is streamed rather than collected first.
+    """
+    if job.mode == "stdout" and resolve_jobs(jobs) == 1:
+        for input_file in inputs:
+            if headers:
+                output.write(file_header(input_file.path))
+            try:
+                job.write(input_file, output)
+            except Exception as e:
+                yield FileResult(input_file.path, error=f"{type(e).__name__}: {e}")
+            else:
+                yield FileResult(input_file.path)
+        return
+
+    for result in imap_ordered(job, inputs, jobs=jobs, batch_size=1):
+        if job.mode == "stdout":
+            if headers:
+                output.write(file_header(result.path))
+            if result.output is not None:
+                output.write(result.output)
+        yield result
+
+
+def open_stdout(compression=None):
+    """
+    Return a text stream writing to stdout, compressed if compression is
+    given; close it once done to finish the compressed stream.
+    """
+    if compression is None:
+        return sys.stdout
+    sys.stdout.flush()
+    return CompressedTextWriter(sys.stdout.buffer, compression, close_target=False)
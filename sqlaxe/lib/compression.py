@@ -0,0 +1,217 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+
+from .defaults import COMPRESSION_FORMATS
+
+# Leading bytes of each format, and the file name extension it is written with
+MAGIC_NUMBERS = {"gzip": b"\x1f\x8b", "xz": b"\xfd7zXZ\x00", "bz2": b"BZh"}
+SUFFIXES = {"gzip": ".gz", "xz": ".xz", "bz2": ".bz2"}
+
+# The default levels of the gzip, xz and bzip2 command-line tools
+COMPRESSION_LEVELS = {"gzip": 6, "xz": 6, "bz2": 9}
+
+# Size of the blocks handed from the decompression thread to the reader, and
+# number of blocks it may decompress ahead of the reader
+DECOMPRESS_BLOCK_SIZE = 1024 * 1024
+DECOMPRESS_QUEUE_DEPTH = 8
+
+
+def detect_compression(source):
+    """
+    Return the compression format of a binary file object, from its first
+    bytes if it can be peeked at, otherwise from the extension of its name; or
+    None if it isn't compressed.
+    """
+    peek = getattr(source, "peek", None)
+    if peek is not None:
+        try:
+            head = peek(max(len(magic) for magic in MAGIC_NUMBERS.values()))
+        except (OSError, ValueError):
+            head = None
+        if head is not None:
+            for compression, magic in MAGIC_NUMBERS.items():
+                if head.startswith(magic):
+                    return compression
+            return None
+
+    return compression_from_name(getattr(source, "name", None))
+
+
+def compression_from_name(name):
+    """
+    Return the compression format implied by a file name's extension, or None.
+    """
+    if not isinstance(name, str):
+        return None
+    extension = os.path.splitext(name)[1].lower()
+    for compression, suffix in SUFFIXES.items():
+        if extension == suffix:
+            return compression
+    return None
+
+
+def strip_compression_suffix(name):
+    """
+    Remove a .gz, .xz or .bz2 extension from a file name.
+    """
+    if compression_from_name(name):
+        return os.path.splitext(name)[0]
+    return name
+
+
+def decompressor(source, compression):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=source, mode="rb")
+    if compression == "xz":
+        return lzma.LZMAFile(source, "rb")
+    if compression == "bz2":
+        return bz2.BZ2File(source, "rb")
+    raise ValueError(f"unknown compression format: {compression!r}")
+
+
+def compressor(target, compression):
+    """
+    Return a binary file object compressing what is written to it into
+    target, which is left open when it is closed.
+    """
+    level = COMPRESSION_LEVELS[compression] if compression in COMPRESSION_LEVELS else None
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=target, mode="wb", compresslevel=level)
+    if compression == "xz":
+        return lzma.LZMAFile(target, "wb", preset=level)
+    if compression == "bz2":
+        return bz2.BZ2File(target, "wb", compresslevel=level)
+    raise ValueError(f"unknown compression format: {compression!r}")
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    A binary stream of the decompressed contents of a compressed file.
+
+    A background thread decompresses the file a block at a time into a bounded
+    queue, so decompression overlaps with parsing (zlib, lzma and bz2 release
+    the GIL while they work) and memory use stays at a few blocks.
+    """
+
+    def __init__(self, source, compression, block_size=DECOMPRESS_BLOCK_SIZE, queue_depth=DECOMPRESS_QUEUE_DEPTH):
+        super().__init__()
+        self.source = source
+        self.compression = compression
+        self.name = getattr(source, "name", None)
+        self.block_size = block_size
+
+        self.blocks = queue.Queue(maxsize=queue_depth)
+        self.block = memoryview(b"")
+        self.finished = False
+        self.stopping = False
+
+        self.thread = threading.Thread(target=self._decompress, name="sqlaxe-decompress", daemon=True)
+        self.thread.start()
+
+    def _decompress(self):
+        try:
+            with decompressor(self.source, self.compression) as stream:
+                while not self.stopping:
+                    block = stream.read(self.block_size)
+                    if not block:
+                        break
+                    self.blocks.put(block)
+        except Exception as e:
+            self.blocks.put(e)
+        self.blocks.put(None)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.block:
+            if self.finished:
+                return 0
+            block = self.blocks.get()
+            if block is None:
+                self.finished = True
+                return 0
+            if isinstance(block, Exception):
+                self.finished = True
+                raise block
+            self.block = memoryview(block)
+
+        count = min(len(buffer), len(self.block))
+        buffer[:count] = self.block[:count]
+        self.block = self.block[count:]
+        return count
+
+    def close(self):
+        if not self.closed:
+            # Unblock the thread if it is waiting for room in the queue
+            self.stopping = True
+            while self.thread.is_alive():
+                try:
+                    self.blocks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self.source.close()
+        super().close()
+
+
+def open_input(source):
+    """
+    Return source, a binary file object, or a DecompressingReader over it if
+    it is compressed with gzip, xz or bzip2.
+    """
+    compression = detect_compression(source)
+    if compression is None:
+        return source
+    return DecompressingReader(source, compression)
+
+
+def open_output(path, mode="w", compression=None, encoding="utf-8", buffer_size=-1):
+    """
+    Open an output text file, compressing it if compression is given. The
+    file is opened as path itself; callers add the extension.
+
+    :param path: Path of the file.
+    :param mode: "w" to truncate the file or "a" to append to it; appending
+        to a compressed file adds another compressed stream, which the
+        decompressors read as one.
+    :param compression: "gzip", "xz", "bz2" or None.
+    :param encoding: Text encoding.
+    :param buffer_size: Buffer size for uncompressed files.
+    """
+    if compression is None:
+        return open(path, mode, buffering=buffer_size, encoding=encoding)
+
+    file = open(path, mode + "b")
+    try:
+        return CompressedTextWriter(file, compression, encoding)
+    except BaseException:
+        file.close()
+        raise
+
+
+class CompressedTextWriter(io.TextIOWrapper):
+    """
+    A text stream compressed into a binary file object. Closing it finishes
+    the compressed stream and, if close_target is set, closes the target.
+    """
+
+    def __init__(self, target, compression, encoding="utf-8", close_target=True):
+        self.target = target
+        self.close_target = close_target
+        super().__init__(compressor(target, compression), encoding=encoding)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            super().close()
+        finally:
+            if self.close_target:
+                self.target.close()
+            else:
+                self.target.flush()
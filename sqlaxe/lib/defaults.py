@@ -0,0 +1,38 @@
+#
+# Choices and defaults of the command line's options. They live here rather
+# than in the modules that use them so that sqlaxe.py can declare its options
+# without importing those modules; keep this module free of imports beyond os.
+#
+
+import os
+
+# Name standing for stdin
+STDIN = "-"
+
+COMPRESSION_FORMATS = ["gzip", "xz", "bz2"]
+
+DEFAULT_MAX_OPEN_FILES = 64
+
+PROFILE_FORMATS = ["table", "json"]
+
+# Number of slowest statements listed for each stage
+DEFAULT_SLOWEST = 10
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache"), "sqlaxe"
+)
+
+# Shown in --help in place of default_socket_path(), which imports tempfile
+DEFAULT_SOCKET_HELP = "$XDG_RUNTIME_DIR/sqlaxe-UID.sock"
+
+
+def default_socket_path():
+    """
+    Return the Unix domain socket sqlaxe serve listens on by default.
+    """
+    import tempfile
+
+    return os.path.join(
+        os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+        f"sqlaxe-{os.getuid()}.sock" if hasattr(os, "getuid") else "sqlaxe.sock",
+    )
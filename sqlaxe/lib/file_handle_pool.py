@@ -0,0 +1,72 @@
+from collections import OrderedDict
+
+from .compression import open_output
+from .defaults import DEFAULT_MAX_OPEN_FILES
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+class FileHandlePool:
+    """
+    Keeps up to max_open output files open, closing the least recently used one
+    when another file is needed.
+
+    A file is truncated the first time the pool opens it; if it is evicted and
+    written to again it is reopened for appending, so callers can treat every
+    path as a file that stays open for the whole run.
+    """
+
+    def __init__(self, max_open=DEFAULT_MAX_OPEN_FILES, buffer_size=DEFAULT_BUFFER_SIZE, encoding="utf-8",
+                 compression=None):
+        self.max_open = max(1, max_open)
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+
+        # "gzip", "xz" or "bz2" to compress every file, or None
+        self.compression = compression
+        self.handles = OrderedDict()
+        self.opened = set()
+
+    def get(self, path):
+        """
+        Return an open handle for path, opening it if necessary.
+
+        :param path: Path of the output file.
+        """
+        handle = self.handles.get(path)
+        if handle is not None:
+            self.handles.move_to_end(path)
+            return handle
+
+        while len(self.handles) >= self.max_open:
+            _, evicted = self.handles.popitem(last=False)
+            evicted.close()
+
+        mode = "a" if path in self.opened else "w"
+        handle = open_output(path, mode, compression=self.compression, encoding=self.encoding,
+                             buffer_size=self.buffer_size)
+        self.handles[path] = handle
+        self.opened.add(path)
+        return handle
+
+    def write(self, path, data):
+        self.get(path).write(data)
+
+    def release(self, path):
+        """
+        Close the handle for path if it is open, so the file is complete on disk.
+        """
+        handle = self.handles.pop(path, None)
+        if handle is not None:
+            handle.close()
+
+    def close(self):
+        while self.handles:
+            _, handle = self.handles.popitem(last=False)
+            handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,52 +1,213 @@
 # Standard library imports
-import inspect
+import atexit
+import logging
+import logging.handlers
+import queue
 import sys
 import time
-from datetime import datetime
 
 # Constants for formatting date/time strings and log messages
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
-LOG_MESSAGE_FORMAT = '{timestamp} - {function_name} - {message}'
+LOG_MESSAGE_FORMAT = "%(asctime)s - %(levelname)s - %(funcName)s - %(message)s"
+CONSOLE_MESSAGE_FORMAT = "\033[94m>> %(message)s\033[0m"
 
-def log(message: str, log_file: str = 'sqlaxe_events.log', silent: bool = False,
-        retries: int = 3, delay: float = 0.1) -> None:
+# Records sharing a repeat_key are let through REPEAT_BURST times, then at most
+# once every REPEAT_INTERVAL seconds with a count of the ones held back.
+REPEAT_BURST = 5
+REPEAT_INTERVAL = 10.0
+
+logger = logging.getLogger("sqlaxe")
+
+_listener = None
+
+
+def log(message: str, level: int = logging.INFO, repeat_key: str = None) -> None:
     """
-    Log the message with a timestamp to a log file, optionally suppressing terminal output.
+    Log the message through the sqlaxe logger.
 
     :param message: str - The message to record in log.
-    :param log_file: str, optional - Path to the log file. Defaults to 'sqlaxe_events.log'.
-    :param silent: bool, optional - If True, suppresses terminal output. Defaults to False.
-    :param retries: int, optional - Number of retries if the file is locked. Defaults to 3.
-    :param delay: float, optional - Delay in seconds between retries. Defaults to 0.1.
-
-    The function writes the message along with a timestamp to the specified log file.
-    If 'silent' is set to False, it will also print the message to the terminal for
-    real-time monitoring and debugging.
-    """
-
-    # Format the current date and time
-    timestamp = datetime.now().strftime(DATE_FORMAT)
-
-    # Get the name of the calling function
-    frame = inspect.currentframe().f_back
-    function_name = frame.f_code.co_name if frame else "unknown"
-
-    # Format the message with the timestamp and function name
-    log_message = LOG_MESSAGE_FORMAT.format(timestamp=timestamp,
-                                            function_name=function_name,
-                                            message=message)
-
-    # Print the message to the terminal this command will return false when run in an IDE terminal
-    if not silent and sys.stdout.isatty():
-        print(f'\033[94m>> {message}\033[0m', file=sys.stderr)
-
-    attempt = 0
-    while attempt < retries:
-        try:
-            # Append the message to the log file
-            with open(log_file, 'a') as file:
-                file.write(log_message + '\n')
-            break
-        except (OSError, IOError):
-            attempt += 1
-            time.sleep(delay)
\ No newline at end of file
+    :param level: int, optional - Logging level. Defaults to logging.INFO.
+    :param repeat_key: str, optional - Groups repeated messages, such as parse
+        errors, so that only a sample of them and a count of the rest is written.
+
+    Nothing is written until configure_logging() has been called, apart from
+    warnings and errors, which go to stderr. Records are handed to a background
+    thread, so the caller never waits on the log file or the terminal.
+    """
+    if logger.isEnabledFor(level):
+        extra = {"repeat_key": repeat_key} if repeat_key else None
+        logger.log(level, message, extra=extra, stacklevel=2)
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Rate-limits records that share a repeat_key attribute; other records
+    always pass.
+    """
+
+    def __init__(self, burst=REPEAT_BURST, interval=REPEAT_INTERVAL):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+
+        # repeat_key -> [records seen, records held back, time of last record let through]
+        self.repeats = {}
+
+    def filter(self, record):
+        key = getattr(record, "repeat_key", None)
+        if key is None:
+            return True
+
+        now = time.monotonic()
+        state = self.repeats.setdefault(key, [0, 0, now])
+        state[0] += 1
+
+        if state[0] > self.burst and now - state[2] < self.interval:
+            state[1] += 1
+            return False
+
+        if state[1]:
+            record.msg = f"{record.getMessage()} ({state[1]} similar messages suppressed)"
+            record.args = None
+        state[1] = 0
+        state[2] = now
+        return True
+
+    def summaries(self):
+        """
+        Yield a message for each repeat_key with records still held back.
+        """
+        for key, (seen, held_back, _) in self.repeats.items():
+            if held_back:
+                yield f"{held_back} more {key} messages suppressed ({seen} in total)"
+
+
+class LogListener(logging.handlers.QueueListener):
+    """
+    Writes the records queued by every process to the handlers, applying one
+    RepeatFilter across all of them.
+    """
+
+    def __init__(self, queue, *handlers):
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        self.repeat_filter = RepeatFilter()
+
+    def handle(self, record):
+        if self.repeat_filter.filter(record):
+            super().handle(record)
+
+    def stop(self):
+        super().stop()
+        for message in self.repeat_filter.summaries():
+            super().handle(logging.makeLogRecord({
+                "name": logger.name, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": message, "funcName": "stop",
+            }))
+
+
+def configure_logging(log_file: str = None, quiet: bool = False, verbose: bool = False) -> None:
+    """
+    Send sqlaxe's log records to stderr and, optionally, a log file, through a
+    queue drained by a background thread.
+
+    :param log_file: str, optional - File to append log records to.
+    :param quiet: bool, optional - Only report errors on the terminal.
+    :param verbose: bool, optional - Report debug messages as well.
+    """
+    global _listener
+    stop_logging()
+
+    # Progress messages are shown when output goes to a terminal, as before
+    if quiet:
+        console_level = logging.ERROR
+    elif verbose:
+        console_level = logging.DEBUG
+    elif sys.stdout.isatty():
+        console_level = logging.INFO
+    else:
+        console_level = logging.WARNING
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter(CONSOLE_MESSAGE_FORMAT if sys.stderr.isatty() else "%(message)s"))
+    handlers = [console]
+
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setLevel(logging.DEBUG if verbose else logging.INFO)
+        file_handler.setFormatter(logging.Formatter(LOG_MESSAGE_FORMAT, DATE_FORMAT))
+        handlers.append(file_handler)
+
+    # A plain queue to begin with; log_queue() swaps in a multiprocessing
+    # queue once worker processes need to log through it too
+    records = queue.SimpleQueue()
+    _listener = LogListener(records, *handlers)
+    _listener.start()
+
+    _attach(records)
+    logger.setLevel(min(handler.level for handler in handlers))
+
+    atexit.register(stop_logging)
+
+
+def _attach(records):
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.propagate = False
+
+
+def log_queue():
+    """
+    Return a queue worker processes can send records through, or None if
+    logging hasn't been configured; pass it to configure_worker() in worker
+    processes.
+
+    multiprocessing is only loaded the first time this is called, when the
+    listener is moved over to a multiprocessing queue.
+    """
+    global _listener
+    if _listener is None:
+        return None
+    if not isinstance(_listener.queue, queue.SimpleQueue):
+        return _listener.queue
+
+    import multiprocessing
+
+    previous = _listener
+    _listener = LogListener(multiprocessing.Queue(), *previous.handlers)
+    _listener.repeat_filter = previous.repeat_filter
+    _listener.start()
+    _attach(_listener.queue)
+
+    # Write out what is left in the old queue, without the summaries
+    # LogListener.stop() adds at exit
+    logging.handlers.QueueListener.stop(previous)
+    return _listener.queue
+
+
+def configure_worker(queue, level):
+    """
+    Send a worker process's log records to the queue of the parent process.
+    """
+    if queue is not None:
+        _attach(queue)
+        logger.setLevel(level)
+
+
+def stop_logging() -> None:
+    """
+    Write out any queued records and stop the background thread.
+    """
+    global _listener
+    if _listener is None:
+        return
+
+    listener, _listener = _listener, None
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.propagate = True
+
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -0,0 +1,249 @@
+import heapq
+import json
+import time
+from contextlib import nullcontext
+
+from .defaults import DEFAULT_SLOWEST, PROFILE_FORMATS
+
+# Stages in pipeline order; the report lists any others after them
+STAGES = ["read", "load", "tokenize", "parse", "qualify", "generate", "write", "statement"]
+
+# Characters of a statement shown in the report
+PREVIEW_LENGTH = 60
+
+_profiler = None
+_no_timer = nullcontext()
+
+
+class StageStats:
+    """
+    Totals for one stage, and its slowest statements as a min-heap of
+    (seconds, start, end, preview).
+    """
+
+    __slots__ = ("calls", "seconds", "bytes", "slowest")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.slowest = []
+
+
+class StageTimer:
+    __slots__ = ("profiler", "stage", "size", "start")
+
+    def __init__(self, profiler, stage, size):
+        self.profiler = profiler
+        self.stage = stage
+        self.size = size
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.stage, time.perf_counter() - self.start, self.size)
+
+
+class Profiler:
+    """
+    Wall time, call counts and bytes for each stage of a run, and the slowest
+    statements of each stage with their byte offsets.
+
+    Stage times taken while a statement is being handled by call_profiled()
+    are gathered per statement and returned with its result, so that they can
+    be added, along with the statement's offsets, in the process that read it;
+    this works the same whether the statement was handled there or in a worker.
+    """
+
+    def __init__(self, slowest=DEFAULT_SLOWEST):
+        self.slowest = slowest
+        self.stages = {}
+        self.start = time.perf_counter()
+
+        # stage -> [seconds, calls] for the statement being handled, if any
+        self.pending = None
+
+    def stats(self, stage):
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        return stats
+
+    def record(self, stage, seconds, size=0):
+        """
+        Add one timed call of stage, to the statement being handled if there
+        is one.
+        """
+        if self.pending is not None:
+            timing = self.pending.get(stage)
+            if timing is None:
+                self.pending[stage] = [seconds, 1]
+            else:
+                timing[0] += seconds
+                timing[1] += 1
+            return
+
+        stats = self.stats(stage)
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.bytes += size
+
+    def add(self, stage, seconds, calls, start, end, text=None):
+        """
+        Add calls of stage that took seconds in all while handling the
+        statement at byte offsets start to end.
+        """
+        stats = self.stats(stage)
+        stats.calls += calls
+        stats.seconds += seconds
+        stats.bytes += end - start
+
+        if self.slowest > 0 and (len(stats.slowest) < self.slowest or seconds > stats.slowest[0][0]):
+            preview = " ".join((text or "")[:PREVIEW_LENGTH * 2].split())[:PREVIEW_LENGTH]
+            entry = (seconds, start, end, preview)
+            if len(stats.slowest) < self.slowest:
+                heapq.heappush(stats.slowest, entry)
+            else:
+                heapq.heapreplace(stats.slowest, entry)
+
+    def add_statement(self, timings, start, end, text=None):
+        """
+        Add the stage timings returned by call_profiled() for the statement at
+        byte offsets start to end.
+        """
+        for stage, (seconds, calls) in timings.items():
+            self.add(stage, seconds, calls, start, end, text)
+
+    def summary(self):
+        ordered = [stage for stage in STAGES if stage in self.stages]
+        ordered += sorted(stage for stage in self.stages if stage not in STAGES)
+
+        return {
+            "wall_seconds": round(time.perf_counter() - self.start, 6),
+            "stages": {
+                stage: {
+                    "calls": self.stages[stage].calls,
+                    "seconds": round(self.stages[stage].seconds, 6),
+                    "bytes": self.stages[stage].bytes,
+                    "slowest": [
+                        {"start": start, "end": end, "seconds": round(seconds, 6), "statement": preview}
+                        for seconds, start, end, preview in sorted(self.stages[stage].slowest, reverse=True)
+                    ],
+                }
+                for stage in ordered
+            },
+        }
+
+    def report(self, format="table"):
+        """
+        Return the profile as text: a table, or a JSON object with the same
+        figures.
+
+        :param format: "table" or "json".
+        """
+        summary = self.summary()
+        if format == "json":
+            return json.dumps(summary, indent=2)
+
+        wall = summary["wall_seconds"]
+        lines = [
+            f"profile: {wall:.3f}s wall time; stage times in worker processes are summed over the workers",
+            f"{'stage':<12}{'calls':>10}{'seconds':>12}{'% wall':>9}{'MB':>10}{'MB/s':>10}{'ms/call':>10}",
+        ]
+        for stage, stats in summary["stages"].items():
+            megabytes = stats["bytes"] / 1024 / 1024
+            rate = f"{megabytes / stats['seconds']:.2f}" if stats["bytes"] and stats["seconds"] else "-"
+            per_call = stats["seconds"] / stats["calls"] * 1000 if stats["calls"] else 0.0
+            share = stats["seconds"] / wall * 100 if wall else 0.0
+            lines.append(f"{stage:<12}{stats['calls']:>10}{stats['seconds']:>12.3f}{share:>8.1f}%"
+                         f"{megabytes:>10.2f}{rate:>10}{per_call:>10.3f}")
+
+        for stage, stats in summary["stages"].items():
+            if not stats["slowest"]:
+                continue
+            lines.append("")
+            lines.append(f"slowest statements: {stage}")
+            for entry in stats["slowest"]:
+                lines.append(f"  {entry['seconds'] * 1000:>10.3f} ms  bytes {entry['start']}-{entry['end']}  "
+                             f"{entry['statement']}")
+
+        return "\n".join(lines)
+
+
+def enable_profiling(slowest=DEFAULT_SLOWEST):
+    """
+    Start profiling this run, and return the Profiler.
+    """
+    global _profiler
+    _profiler = Profiler(slowest=slowest)
+    return _profiler
+
+
+def disable_profiling():
+    global _profiler
+    _profiler = None
+
+
+def active_profiler():
+    """
+    Return the Profiler of this run, or None if it isn't being profiled.
+    """
+    return _profiler
+
+
+def profile_stage(stage, size=0):
+    """
+    Return a context manager timing a call of stage. When the run isn't being
+    profiled, it is a shared no-op, so timed code costs next to nothing.
+
+    :param stage: Name of the stage, such as "parse" or "generate".
+    :param size: Bytes handled by the call, if known.
+    """
+    if _profiler is None:
+        return _no_timer
+    return StageTimer(_profiler, stage, size)
+
+
+def call_profiled(function, statement):
+    """
+    Apply function to statement, returning the stage timings of the call along
+    with the result, for Profiler.add_statement().
+    """
+    global _profiler
+    if _profiler is None:
+        # A worker process started without the parent's profiler
+        _profiler = Profiler()
+
+    _profiler.pending = timings = {}
+    start = time.perf_counter()
+    try:
+        result = function(statement)
+    finally:
+        _profiler.pending = None
+
+    timings["statement"] = [time.perf_counter() - start, 1]
+    return timings, result
+
+
+def profile_statements(stage, statements):
+    """
+    Time each step of an iterator of (start, end, text) statements as a call of
+    stage, such as reading them from the input.
+    """
+    if _profiler is None:
+        yield from statements
+        return
+
+    profiler = _profiler
+    statements = iter(statements)
+    while True:
+        start_time = time.perf_counter()
+        try:
+            statement = next(statements)
+        except StopIteration:
+            return
+        start, end, text = statement
+        profiler.add(stage, time.perf_counter() - start_time, 1, start, end, text)
+        yield statement
@@ -0,0 +1,118 @@
+import json
+import sys
+import time
+
+PROGRESS_STYLES = ["bar", "json", "none"]
+
+# Minimum number of seconds between two reports
+DEFAULT_PROGRESS_INTERVAL = 0.5
+
+BAR_WIDTH = 20
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.1f} {unit}" if unit != "B" else f"{count} B"
+        count /= 1024
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+class Progress:
+    """
+    Reports how far through its input a command is, from the byte offset of
+    the last statement handled and the input size.
+
+    update() is called once per statement and only compares a clock reading
+    with the time of the next report, so reporting costs next to nothing
+    however many statements there are. With the "json" style, each report is
+    one JSON object per line on stderr, for other programs to read.
+    """
+
+    def __init__(self, total=None, style=None, interval=DEFAULT_PROGRESS_INTERVAL, stream=None):
+        self.total = total
+        self.stream = stream or sys.stderr
+
+        # By default, draw a bar when stderr is a terminal and stay silent otherwise
+        if style is None:
+            style = "bar" if self.stream.isatty() else "none"
+        self.style = style
+        self.interval = interval
+
+        self.position = 0
+        self.statements = 0
+        self.start = time.monotonic()
+        self.next_report = self.start + interval if style != "none" else float("inf")
+
+    def update(self, position, statements=1):
+        """
+        Record that the input has been handled up to byte offset position.
+
+        :param position: Byte offset just past the last statement handled.
+        :param statements: Number of statements handled since the last update.
+        """
+        self.position = position
+        self.statements += statements
+
+        now = time.monotonic()
+        if now >= self.next_report:
+            self.report(now)
+
+    def report(self, now, done=False):
+        self.next_report = now + self.interval
+
+        elapsed = now - self.start
+        rate = self.position / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.total and rate and not done:
+            eta = max(self.total - self.position, 0) / rate
+
+        if self.style == "json":
+            self.stream.write(json.dumps({
+                "bytes": self.position,
+                "total_bytes": self.total,
+                "statements": self.statements,
+                "elapsed": round(elapsed, 3),
+                "bytes_per_second": round(rate),
+                "eta": None if eta is None else round(eta, 1),
+                "done": done,
+            }) + "\n")
+        else:
+            fields = []
+            if self.total:
+                fraction = min(self.position / self.total, 1.0)
+                filled = int(fraction * BAR_WIDTH)
+                fields.append(f"[{'#' * filled}{'-' * (BAR_WIDTH - filled)}] {fraction * 100:5.1f}%")
+                fields.append(f"{format_bytes(self.position)} / {format_bytes(self.total)}")
+            else:
+                fields.append(format_bytes(self.position))
+            fields.append(f"{format_bytes(rate)}/s")
+            fields.append(f"{self.statements} statements")
+            if eta is not None:
+                fields.append(f"ETA {format_duration(eta)}")
+            else:
+                fields.append(f"in {format_duration(elapsed)}")
+
+            self.stream.write("\r" + "  ".join(fields) + "\033[K" + ("\n" if done else ""))
+
+        self.stream.flush()
+
+    def close(self, finished=True):
+        """
+        Write the final report. If finished, the whole input has been read,
+        including anything after the last statement.
+        """
+        if finished and self.total:
+            self.position = max(self.position, self.total)
+        if self.style != "none":
+            self.report(time.monotonic(), done=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(finished=exc_type is None)
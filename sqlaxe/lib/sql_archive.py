@@ -0,0 +1,260 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+
+from .compression import decompressor
+from .file_handle_pool import DEFAULT_MAX_OPEN_FILES, FileHandlePool
+
+# Last member of every archive, listing its sections
+MANIFEST_NAME = "MANIFEST.json"
+
+# Bumped whenever the layout of the manifest changes
+ARCHIVE_FORMAT = 1
+
+# Size of the blocks sections are read in
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class SQLArchiveWriter:
+    """
+    Writes the sections of a split into a single tar archive, in section
+    order, followed by a MANIFEST.json member listing each section's number,
+    table, statement count, offset and size in the archive and SHA-256
+    checksum. With compression, each member is compressed on its own, so any
+    section can still be read without the others.
+
+    Sections are staged in a temporary directory next to the archive, and
+    added to it once complete: when the next section starts if sections are
+    written one after another (sequential), otherwise at close(). The archive
+    itself only appears at path once it is complete.
+    """
+
+    def __init__(self, path, sequential=True, max_open=DEFAULT_MAX_OPEN_FILES, compression=None):
+        self.path = path
+        self.sequential = sequential
+        self.compression = compression
+
+        directory = os.path.dirname(os.path.abspath(path))
+        self.staging_directory = tempfile.mkdtemp(dir=directory, prefix=".sqlaxe-archive-")
+        self.files = FileHandlePool(max_open=max_open, compression=compression)
+
+        descriptor, self.temporary_path = tempfile.mkstemp(dir=directory, prefix=".sqlaxe-", suffix=".tmp")
+        self.tar = tarfile.open(fileobj=os.fdopen(descriptor, "wb"), mode="w", format=tarfile.PAX_FORMAT)
+
+        # Member name -> manifest entry, in order of first appearance
+        self.sections = {}
+        self.pending = []
+
+    def add_section(self, name, section, table):
+        """
+        Start a section; in sequential mode, the previous one is complete.
+
+        :param name: Member name, such as 0002_users.sql.
+        :param section: Section number.
+        :param table: Table the section holds statements for, or None.
+        """
+        if self.sequential:
+            while self.pending:
+                self._pack(self.pending.pop(0))
+
+        self.sections[name] = {
+            "section": section, "name": name, "table": table, "kind": "table" if table else "general",
+            "statements": 0, "bytes": 0,
+        }
+        self.pending.append(name)
+
+    def write(self, name, data):
+        if name not in self.sections:
+            self.add_section(name, len(self.sections) + 1, None)
+
+        # Encoded once, both to count its bytes and to write it, bypassing
+        # the text layer of the staged file
+        encoded = data.encode("utf-8")
+        entry = self.sections[name]
+        entry["statements"] += 1
+        entry["bytes"] += len(encoded)
+        self.files.get(os.path.join(self.staging_directory, name)).buffer.write(encoded)
+
+    def _pack(self, name):
+        staged = os.path.join(self.staging_directory, name)
+        self.files.release(staged)
+
+        digest = hashlib.sha256()
+        with open(staged, "rb") as file:
+            for block in iter(lambda: file.read(READ_BLOCK_SIZE), b""):
+                digest.update(block)
+
+            info = tarfile.TarInfo(name)
+            info.size = file.tell()
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            file.seek(0)
+
+            # The member's data follows its header
+            offset = self.tar.offset + len(info.tobuf(self.tar.format, self.tar.encoding, self.tar.errors))
+            self.tar.addfile(info, file)
+        os.remove(staged)
+
+        entry = self.sections[name]
+        entry.update(offset=offset, size=info.size, sha256=digest.hexdigest())
+
+    def close(self):
+        while self.pending:
+            self._pack(self.pending.pop(0))
+
+        manifest = json.dumps({
+            "format": ARCHIVE_FORMAT, "compression": self.compression, "sections": list(self.sections.values()),
+        }, indent=1).encode("utf-8")
+        info = tarfile.TarInfo(MANIFEST_NAME)
+        info.size = len(manifest)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self.tar.addfile(info, io.BytesIO(manifest))
+
+        fileobj = self.tar.fileobj
+        self.tar.close()
+        fileobj.close()
+
+        # mkstemp creates the file readable by its owner only
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self.temporary_path, 0o666 & ~umask)
+        os.replace(self.temporary_path, self.path)
+        shutil.rmtree(self.staging_directory, ignore_errors=True)
+
+    def abort(self):
+        self.files.close()
+        fileobj = self.tar.fileobj
+        self.tar.close()
+        fileobj.close()
+        os.remove(self.temporary_path)
+        shutil.rmtree(self.staging_directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class SQLArchive:
+    """
+    Reads an archive written by SQLArchiveWriter. Sections are read straight
+    from their offsets, so reading one costs the same whatever the size of
+    the archive, and their checksums are checked as they are read.
+
+    Raises ValueError if path isn't an archive written by split.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with tarfile.open(path, "r:") as tar:
+                self.manifest = json.load(tar.extractfile(tar.getmember(MANIFEST_NAME)))
+        except (tarfile.TarError, KeyError, ValueError) as e:
+            raise ValueError(f"{path} is not a sqlaxe archive: {e}")
+
+        if self.manifest.get("format") != ARCHIVE_FORMAT:
+            raise ValueError(f"{path} is an archive of an unsupported format: {self.manifest.get('format')}")
+        self.sections = self.manifest["sections"]
+        self.compression = self.manifest["compression"]
+
+    def find(self, selector):
+        """
+        Return the sections a selector names: a section number, a member name
+        or a table name.
+        """
+        if selector.isdigit():
+            return [entry for entry in self.sections if entry["section"] == int(selector)]
+        return [entry for entry in self.sections if selector in (entry["name"], entry["table"])]
+
+    def iter_blocks(self, sections=None):
+        """
+        Yield the SQL of sections (default: all of them), in order, as blocks
+        of bytes.
+        """
+        with open(self.path, "rb") as file:
+            for entry in self.sections if sections is None else sections:
+                stored = _SectionReader(file, entry)
+                stream = io.BufferedReader(stored, READ_BLOCK_SIZE)
+                if self.compression:
+                    stream = decompressor(stream, self.compression)
+                with stream:
+                    for block in iter(lambda: stream.read(READ_BLOCK_SIZE), b""):
+                        yield block
+                stored.verify()
+
+    def open(self, sections=None):
+        """
+        Return a binary stream of the SQL of sections (default: all of them),
+        which reads like the file that was split.
+        """
+        return io.BufferedReader(_BlockReader(self.iter_blocks(sections)), READ_BLOCK_SIZE)
+
+
+class _SectionReader(io.RawIOBase):
+    # The stored bytes of one member, hashed as they are read
+    def __init__(self, file, entry):
+        super().__init__()
+        self.file = file
+        self.entry = entry
+        self.position = entry["offset"]
+        self.remaining = entry["size"]
+        self.digest = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self.remaining)
+        if count == 0:
+            return 0
+        self.file.seek(self.position)
+        data = self.file.read(count)
+        if len(data) < count:
+            raise ValueError(f"section {self.entry['name']} is truncated")
+        buffer[:count] = data
+        self.digest.update(data)
+        self.position += count
+        self.remaining -= count
+        return count
+
+    def verify(self):
+        if self.remaining == 0 and self.digest.hexdigest() != self.entry["sha256"]:
+            raise ValueError(f"checksum mismatch in section {self.entry['name']}")
+
+
+class _BlockReader(io.RawIOBase):
+    # A binary stream over an iterator of byte blocks
+    def __init__(self, blocks):
+        super().__init__()
+        self.blocks = blocks
+        self.block = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.block:
+            block = next(self.blocks, None)
+            if block is None:
+                return 0
+            self.block = memoryview(block)
+
+        count = min(len(buffer), len(self.block))
+        buffer[:count] = self.block[:count]
+        self.block = self.block[count:]
+        return count
+
+    def close(self):
+        if not self.closed:
+            self.blocks.close()
+        super().close()
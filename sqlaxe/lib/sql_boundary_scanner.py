@@ -0,0 +1,317 @@
+import re
+from sqlglot import Dialect
+
+WHITESPACE = b" \t\r\n\f\v"
+
+DELIMITER_DIRECTIVE = b"delimiter"
+DOLLAR_QUOTE_PATTERN = rb"\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$"
+WHITESPACE_PATTERN = re.compile(rb"[ \t\r\n\f\v]*")
+
+
+class SQLBoundaryScanner:
+    """
+    Finds statement boundaries in raw SQL bytes without tokenizing them.
+
+    The scanner jumps between the few bytes that matter - quotes, identifier
+    quotes, comment markers, dollar quotes and the current delimiter - using
+    regular expressions, so it works directly over bytes, bytearrays and mmap
+    objects. Quoting and comment rules come from the sqlglot tokenizer of the
+    input dialect; MySQL client ``DELIMITER`` directives are honoured and are
+    not reported as statements.
+
+    Ranges are ``(start, end)`` byte offsets of each statement body, trimmed of
+    surrounding whitespace and excluding the delimiter.
+    """
+
+    def __init__(self, dialect=''):
+        self.dialect = dialect
+
+        tokenizer_class = Dialect.get_or_raise(self.dialect).tokenizer_class
+
+        # opening token -> (closing token, honours backslash escapes)
+        self.quotes = {}
+        for start, end in tokenizer_class._IDENTIFIERS.items():
+            self.quotes[start.encode()] = (end.encode(), "\\" in tokenizer_class._IDENTIFIER_ESCAPES)
+        for start, end in tokenizer_class._QUOTES.items():
+            self.quotes[start.encode()] = (end.encode(), "\\" in tokenizer_class._STRING_ESCAPES)
+
+        # opening token -> closing token (a newline for line comments)
+        self.comments = {
+            start.encode(): (end or "\n").encode()
+            for start, end in tokenizer_class._COMMENTS.items()
+        }
+
+        self.dollar_quotes = any(
+            start.startswith("$")
+            for start in [*tokenizer_class.HEREDOC_STRINGS, *tokenizer_class._FORMAT_STRINGS]
+        )
+
+        self.token_patterns = {}
+        self.close_patterns = {}
+        self.reset()
+
+    def reset(self, start=0):
+        """
+        Forget any partially scanned statement and start scanning at start.
+
+        :param start: Offset of the first byte to scan.
+        """
+        self.start = start
+        self.pos = start
+        self.close = None
+        self.close_pattern = None
+        self.at_statement_start = True
+        self.set_delimiter(b";")
+
+    def set_delimiter(self, delimiter):
+        self.delimiter = delimiter
+
+        if delimiter not in self.token_patterns:
+            tokens = sorted([*self.quotes, *self.comments], key=len, reverse=True)
+            alternatives = [re.escape(delimiter)] + [re.escape(token) for token in tokens]
+            if self.dollar_quotes:
+                alternatives.append(DOLLAR_QUOTE_PATTERN)
+            longest = max(len(delimiter), *(len(token) for token in tokens))
+            self.token_patterns[delimiter] = (
+                re.compile(b"|".join(alternatives)),
+                longest,
+                self._skip_pattern(delimiter),
+            )
+
+        self.token_pattern, self.longest_token, self.skip_pattern = self.token_patterns[delimiter]
+
+    def _skip_pattern(self, delimiter):
+        """
+        Build a pattern that matches, in a single call, a run of statement text
+        that contains no delimiter and no unterminated quote or comment. The
+        scan loop uses it to jump over whole literals and comments without
+        going through Python for each one; whatever it stops at is handled by
+        the token-by-token loop.
+        """
+        tokens = [delimiter, *self.quotes, *self.comments]
+        if self.dollar_quotes:
+            tokens.append(b"$")
+        first_bytes = {token[:1] for token in tokens}
+
+        alternatives = [b"[^" + b"".join(re.escape(byte) for byte in first_bytes) + b"]+"]
+
+        for start, (close, escapes) in sorted(self.quotes.items(), key=lambda item: -len(item[0])):
+            end = re.escape(close)
+            if len(close) == 1 and escapes:
+                body = rb"[^" + end + rb"\\]*(?:\\[\s\S][^" + end + rb"\\]*)*"
+            elif len(close) == 1:
+                body = rb"[^" + end + rb"]*"
+            elif escapes:
+                body = rb"(?:\\[\s\S]|(?!" + end + rb")[^\\])*"
+            else:
+                body = rb"(?:(?!" + end + rb")[\s\S])*"
+            alternatives.append(self._not_longer(start, tokens) + re.escape(start) + body + end)
+
+        for start, close in sorted(self.comments.items(), key=lambda item: -len(item[0])):
+            if close == b"\n":
+                body = rb"[^\n]*\n"
+            else:
+                body = rb"[\s\S]*?" + re.escape(close)
+            alternatives.append(self._not_longer(start, tokens) + re.escape(start) + body)
+
+        if self.dollar_quotes:
+            alternatives.append(rb"(" + DOLLAR_QUOTE_PATTERN + rb")[\s\S]*?\1")
+            # a "$" that is not part of a tag, e.g. a positional parameter
+            alternatives.append(rb"\$(?:[A-Za-z_][A-Za-z0-9_]*)?(?=[^A-Za-z0-9_$])")
+            alternatives.append(rb"\$[0-9]")
+
+        # A byte that starts a longer token but is followed by something else,
+        # such as the "-" of a minus sign. The byte after it must be present so
+        # that a token split across two blocks is never skipped.
+        for byte in first_bytes:
+            if byte in tokens or (byte == b"$" and self.dollar_quotes):
+                continue
+            followers = {token[1:2] for token in tokens if token[:1] == byte}
+            if any(len(token) > 2 and token[:2] not in tokens for token in tokens if token[:1] == byte):
+                continue
+            alternatives.append(
+                re.escape(byte) + b"(?=[^" + b"".join(re.escape(follower) for follower in followers) + b"])"
+            )
+
+        return re.compile(b"(?:" + b"|".join(alternatives) + b")*")
+
+    def _not_longer(self, start, tokens):
+        """
+        Return a lookahead that keeps start from matching where a longer token
+        beginning with it (such as a triple quote) appears, or might appear once
+        more data has been read.
+        """
+        longer = [token for token in tokens if len(token) > len(start) and token.startswith(start)]
+        if not longer:
+            return b""
+
+        lookahead = b"".join(b"(?!" + re.escape(token) + b")" for token in longer)
+        return lookahead + rb"(?=[\s\S]{%d})" % max(len(token) for token in longer)
+
+    def _close_pattern(self, close, escapes):
+        key = (close, escapes)
+        if key not in self.close_patterns:
+            pattern = re.escape(close)
+            if escapes:
+                pattern = b"\\\\|" + pattern
+            self.close_patterns[key] = re.compile(pattern)
+        return self.close_patterns[key]
+
+    def _range(self, buffer, start, end):
+        while start < end and buffer[start] in WHITESPACE:
+            start += 1
+        while end > start and buffer[end - 1] in WHITESPACE:
+            end -= 1
+        if start == end:
+            return None
+        return start, end
+
+    def _directive(self, buffer, eof):
+        """
+        Check for a DELIMITER directive at self.pos and consume it. Returns True
+        if one was consumed, False if there is none and None if more data is
+        needed to decide.
+        """
+        head = buffer[self.pos:self.pos + len(DELIMITER_DIRECTIVE) + 1]
+        if len(head) <= len(DELIMITER_DIRECTIVE) and not eof:
+            return None
+
+        if head[:-1].lower() != DELIMITER_DIRECTIVE or head[-1:] not in (b" ", b"\t"):
+            return False
+
+        line_end = buffer.find(b"\n", self.pos)
+        if line_end == -1:
+            if not eof:
+                return None
+            line_end = len(buffer)
+
+        arguments = bytes(buffer[self.pos + len(DELIMITER_DIRECTIVE):line_end]).split()
+        if arguments:
+            self.set_delimiter(arguments[0])
+
+        self.start = self.pos = line_end
+        return True
+
+    def scan(self, buffer, eof=True):
+        """
+        Yield the (start, end) range of every complete statement in buffer,
+        continuing from where the previous call stopped. Unless eof is set, the
+        scan stops at the first statement that may continue past the end of
+        buffer; call shift() after discarding consumed bytes and scan again once
+        more data is available.
+
+        :param buffer: bytes, bytearray or mmap holding the input.
+        :param eof: True if buffer holds the rest of the input.
+        """
+        length = len(buffer)
+
+        while True:
+            if self.close is not None:
+                match = self.close_pattern.search(buffer, self.pos)
+                if match is None:
+                    self.pos = max(self.pos, length - len(self.close) + 1)
+                    break
+
+                if match.group() == b"\\":
+                    if match.end() >= length and not eof:
+                        self.pos = match.start()
+                        break
+                    self.pos = match.end() + 1
+                else:
+                    self.pos = match.end()
+                    self.close = None
+                continue
+
+            if self.at_statement_start:
+                self.pos = WHITESPACE_PATTERN.match(buffer, self.pos).end()
+                if self.pos >= length and not eof:
+                    break
+
+                match = self.token_pattern.match(buffer, self.pos)
+                if match is None or match.group() not in self.comments:
+                    directive = self._directive(buffer, eof)
+                    if directive is None:
+                        break
+                    if directive:
+                        continue
+                    self.at_statement_start = False
+
+            if not self.at_statement_start:
+                self.pos = self.skip_pattern.match(buffer, self.pos).end()
+
+            match = self.token_pattern.search(buffer, self.pos)
+            if match is None:
+                backtrack = length - self.longest_token + 1
+                if self.dollar_quotes:
+                    dollar = buffer.rfind(b"$", self.pos)
+                    if dollar != -1:
+                        backtrack = min(backtrack, dollar)
+                self.pos = max(self.pos, backtrack)
+                break
+
+            # A token near the end of the buffer may be the prefix of a
+            # longer one (e.g. "/" of "/*"); wait for the next block.
+            if not eof and match.start() > length - self.longest_token:
+                self.pos = match.start()
+                break
+
+            token = match.group()
+            self.pos = match.end()
+            if token == self.delimiter:
+                statement = self._range(buffer, self.start, match.start())
+                if statement is not None:
+                    yield statement
+                self.start = self.pos
+                self.at_statement_start = True
+            elif token in self.comments:
+                self.close = self.comments[token]
+                self.close_pattern = self._close_pattern(self.close, False)
+            elif token in self.quotes:
+                self.close, escapes = self.quotes[token]
+                self.close_pattern = self._close_pattern(self.close, escapes)
+            else:
+                # dollar-quoted string; it is closed by the same tag
+                self.close = bytes(token)
+                self.close_pattern = self._close_pattern(self.close, False)
+
+        if eof:
+            statement = self._range(buffer, self.start, length)
+            self.start = self.pos = length
+            if statement is not None:
+                yield statement
+
+    def shift(self, count):
+        """
+        Adjust the scanner's offsets after the first count bytes of the buffer
+        have been discarded.
+
+        :param count: Number of bytes removed from the front of the buffer.
+        """
+        self.start -= count
+        self.pos -= count
+
+    def scan_blocks(self, blocks):
+        """
+        Yield (start, end, data) for every statement in an iterable of byte
+        blocks, where start and end are absolute offsets into the input and data
+        holds the statement's bytes. Only the unfinished statement is buffered.
+
+        :param blocks: Iterable of bytes objects.
+        """
+        self.reset()
+        buffer = bytearray()
+        base = 0
+
+        for block in blocks:
+            # Drop everything already yielded before appending the new block.
+            consumed = self.start
+            del buffer[:consumed]
+            buffer += block
+            base += consumed
+            self.shift(consumed)
+
+            for start, end in self.scan(buffer, eof=False):
+                yield base + start, base + end, bytes(buffer[start:end])
+
+        for start, end in self.scan(buffer, eof=True):
+            yield base + start, base + end, bytes(buffer[start:end])
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from .defaults import DEFAULT_CACHE_DIRECTORY
+
+DEFAULT_MAX_CACHE_SIZE = 4 * 1024 * 1024 * 1024
+
+# Bumped whenever the layout of a cache entry, or the way statements are
+# parsed into it, changes
+CACHE_FORMAT = 3
+ENTRY_SUFFIX = ".pickle"
+
+
+class ParsedStatement(str):
+    """
+    The text of a statement, carrying its parsed expressions pickled as
+    produced by SQLParser.parse_statement. parsed may be None, in which case
+    the statement is parsed as usual. expressions, if given, are the
+    expressions themselves, which the first parse_statement call returns
+    instead of unpickling them; they aren't pickled with the statement.
+    delimiter is the one that ended the statement, as for a
+    DelimitedStatement.
+    """
+
+    def __new__(cls, text, parsed, expressions=None, delimiter=";"):
+        statement = super().__new__(cls, text)
+        statement.parsed = parsed
+        statement.expressions = expressions
+        statement.delimiter = delimiter
+        return statement
+
+    def __reduce__(self):
+        return ParsedStatement, (str(self), self.parsed, None, self.delimiter)
+
+
+class SQLCacheWriter:
+    """
+    Writes the records of one cache entry to a temporary file, which only
+    replaces the entry when commit() is called.
+    """
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+
+        os.makedirs(self.cache.directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=self.cache.directory, suffix=".tmp")
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, record):
+        pickle.dump(record, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.temp_path, self.cache.path(self.key))
+        self.cache.evict()
+
+    def close(self):
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SQLCache:
+    """
+    Keeps the parsed statements of SQL inputs on disk, so that later runs over
+    the same input load them instead of parsing again.
+
+    An entry holds a (start, end, parsed, delimiter) record per statement,
+    where start and end are the statement's byte offsets in the input and
+    delimiter the one that ended it. Entries are keyed by a
+    hash of the input content, the options it was parsed with and the sqlglot
+    version. The directory is kept under max_size bytes by removing the least
+    recently used entries.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY, max_size=DEFAULT_MAX_CACHE_SIZE):
+        self.directory = os.path.expanduser(directory)
+        self.max_size = max_size
+
+    def key(self, content, *options):
+        """
+        Return the cache key for content parsed with options.
+
+        :param content: Bytes-like input content.
+        :param options: Parse options that change the resulting expressions.
+        """
+        from sqlglot import __version__ as sqlglot_version
+
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((CACHE_FORMAT, sqlglot_version) + options).encode())
+        digest.update(content)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """
+        Return an iterator over the records of the entry for key, or None if
+        there is no such entry.
+        """
+        path = self.path(key)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+        # Entries are evicted by modification time, so mark this one as used
+        os.utime(path)
+        return self._records(file)
+
+    def _records(self, file):
+        with file:
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    return
+
+    def writer(self, key):
+        return SQLCacheWriter(self, key)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits max_size.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                entry_stat = entry.stat()
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+
+        total = 0
+        for _, size, path in sorted(entries, reverse=True):
+            total += size
+            if total > self.max_size:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
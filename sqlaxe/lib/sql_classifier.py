@@ -0,0 +1,246 @@
+import re
+from typing import NamedTuple, Optional
+
+# Only the start of a statement is examined; VALUES payloads are never looked at.
+HEAD_LENGTH = 1024
+
+# Leading keywords -> statement kind. The table follows the matched keywords.
+STATEMENT_HEADERS = [
+    ("insert", r"INSERT(?:\s+(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE))*(?:\s+INTO)?"),
+    ("replace", r"REPLACE(?:\s+(?:LOW_PRIORITY|DELAYED))?(?:\s+INTO)?"),
+    ("create_table", r"CREATE(?:\s+OR\s+REPLACE)?(?:\s+(?:GLOBAL|LOCAL))?(?:\s+(?:TEMPORARY|TEMP|UNLOGGED))?"
+                     r"\s+TABLE(?:\s+IF\s+NOT\s+EXISTS)?"),
+    ("create_index", r"CREATE(?:\s+UNIQUE)?\s+INDEX(?:\s+CONCURRENTLY)?(?:\s+IF\s+NOT\s+EXISTS)?\s+{identifier}\s+ON(?:\s+ONLY)?"),
+    ("create_view", r"CREATE(?:\s+OR\s+REPLACE)?(?:\s+ALGORITHM\s*=\s*\w+)?(?:\s+DEFINER\s*=\s*\S+)?"
+                    r"(?:\s+SQL\s+SECURITY\s+\w+)?\s+VIEW(?:\s+IF\s+NOT\s+EXISTS)?"),
+    ("alter_table", r"ALTER(?:\s+ONLINE|\s+IGNORE)?\s+TABLE(?:\s+IF\s+EXISTS)?(?:\s+ONLY)?"),
+    ("drop_table", r"DROP(?:\s+TEMPORARY)?\s+TABLE(?:\s+IF\s+EXISTS)?"),
+    ("truncate", r"TRUNCATE(?:\s+TABLE)?(?:\s+ONLY)?"),
+    ("lock", r"LOCK\s+TABLES?"),
+    ("copy", r"COPY"),
+    ("update", r"UPDATE(?:\s+LOW_PRIORITY)?(?:\s+IGNORE)?"),
+    ("delete", r"DELETE(?:\s+(?:LOW_PRIORITY|QUICK|IGNORE))*\s+FROM"),
+]
+
+# What may follow the table name for the match to be trusted. For example,
+# "UPDATE t1 JOIN t2 ..." or "DELETE FROM t1, t2 ..." are left to the parser.
+TABLE_FOLLOWERS = {
+    "update": r"\s+SET\b",
+    "delete": r"\s*(?:$|WHERE\b|ORDER\b|LIMIT\b|RETURNING\b)",
+    "create_view": r"(?:\s*\(|\s+AS\b)",
+    "lock": r"\s+(?:AS\b|READ\b|WRITE\b|LOW_PRIORITY\b|IN\b)",
+}
+
+# What follows the table name of statements that can't reference any other
+# table: an INSERT of literal rows, or a single-table TRUNCATE/DROP.
+ONLY_TABLE_FOLLOWERS = {
+    "insert": r"\s*(?:\([^()]*\))?\s*(?:VALUES?|SET)\b",
+    "replace": r"\s*(?:\([^()]*\))?\s*(?:VALUES?|SET)\b",
+    "truncate": r"\s*$",
+    "drop_table": r"\s*$",
+}
+
+# A subquery inside VALUES or SET could reference other tables
+SUBQUERY_PATTERN = re.compile(r"\bSELECT\b", re.IGNORECASE)
+
+# Kinds recognised from their first keyword alone; no table is reported for
+# these, either because there is none or because it isn't certain.
+KEYWORD_KINDS = [
+    ("unlock", r"UNLOCK\s+TABLES?\b"),
+    ("set", r"SET\b"),
+    ("select", r"(?:SELECT|WITH)\b"),
+    ("insert", r"INSERT\b"),
+    ("replace", r"REPLACE\b"),
+    ("update", r"UPDATE\b"),
+    ("delete", r"DELETE\b"),
+    ("create", r"CREATE\b"),
+    ("alter", r"ALTER\b"),
+    ("drop", r"DROP\b"),
+    ("truncate", r"TRUNCATE\b"),
+]
+
+# Values accepted wherever a statement kind is chosen by the user. A kind also
+# matches the more specific kinds derived from it (create -> create_table).
+KIND_NAMES = [
+    "insert", "replace", "update", "delete", "select", "create", "alter", "drop", "truncate",
+    "lock", "unlock", "set", "copy",
+]
+
+
+def kind_matches(kind, name):
+    """
+    Return True if a classified kind falls under a kind name from KIND_NAMES.
+    """
+    return kind == name or kind.startswith(name + "_")
+
+
+class StatementInfo(NamedTuple):
+    kind: str
+    table: Optional[str]
+
+
+class SQLClassifier:
+    """
+    Works out a statement's kind and target table from its first few tokens,
+    without parsing it.
+
+    The table is reported the way sqlglot names it: the last part of a
+    qualified name, without quotes. Statements that cannot be classified with
+    confidence come back as kind "other" with no table, and callers should fall
+    back to a full parse for them.
+    """
+
+    def __init__(self, dialect=''):
+        self.dialect = dialect
+
+        # Imported here so that KIND_NAMES can be read without loading sqlglot
+        from sqlglot import Dialect
+
+        tokenizer_class = Dialect.get_or_raise(self.dialect).tokenizer_class
+
+        self.identifier_quotes = dict(tokenizer_class._IDENTIFIERS)
+        quoted = [
+            re.escape(start) + r"(?:[^" + re.escape(end) + r"]|" + re.escape(end * 2) + r")*" + re.escape(end)
+            for start, end in self.identifier_quotes.items()
+        ]
+        part = r"(?:" + r"|".join(quoted + [r"[A-Za-z0-9_$@#\u0080-\uffff]+"]) + r")"
+        identifier = part + r"(?:\s*\.\s*" + part + r")*"
+
+        self.part_pattern = re.compile(part)
+        self.header_patterns = []
+        for kind, header in STATEMENT_HEADERS:
+            pattern = r"(?:" + header.format(identifier=identifier) + r")\s+(?P<table>" + identifier + r")"
+            pattern += TABLE_FOLLOWERS.get(kind, r"(?=[\s(;,]|$)")
+            self.header_patterns.append((kind, re.compile(pattern, re.IGNORECASE)))
+
+        self.only_table_patterns = {
+            kind: re.compile(pattern, re.IGNORECASE) for kind, pattern in ONLY_TABLE_FOLLOWERS.items()
+        }
+        self.keyword_patterns = [(kind, re.compile(pattern, re.IGNORECASE)) for kind, pattern in KEYWORD_KINDS]
+
+        comments = sorted(tokenizer_class._COMMENTS.items(), key=lambda item: -len(item[0]))
+        self.comments = [(start, end or "\n") for start, end in comments]
+        self.boundary_scanner = None
+
+    def terminate(self, statement, delimiter=None):
+        """
+        Return the text of a statement followed by its delimiter, as written to
+        the output. The delimiter goes on a line of its own when the statement
+        ends in a line comment, which would otherwise swallow it; text holding
+        nothing but comments is returned as it is. A statement read under a
+        DELIMITER directive is written between a directive setting its
+        delimiter and one setting the semicolon back.
+
+        :param statement: Statement text, as yielded by SQLReader.
+        :param delimiter: Delimiter the statement was read with; by default
+            that of a DelimitedStatement, or a semicolon.
+        """
+        if delimiter is None:
+            delimiter = getattr(statement, "delimiter", ";")
+
+        if self._skip_comments(statement) == len(statement):
+            return statement
+        if self._ends_in_line_comment(statement, delimiter):
+            terminated = statement + "\n" + delimiter
+        else:
+            terminated = statement + delimiter
+
+        if delimiter != ";":
+            return f"DELIMITER {delimiter}\n{terminated}\nDELIMITER ;"
+        return terminated
+
+    def _ends_in_line_comment(self, statement, delimiter):
+        tail = statement[statement.rfind("\n") + 1:]
+        if not any(start in tail for start, end in self.comments if end == "\n"):
+            return False
+
+        if self.boundary_scanner is None:
+            from .sql_boundary_scanner import SQLBoundaryScanner
+            self.boundary_scanner = SQLBoundaryScanner(dialect=self.dialect)
+
+        # Scan the statement as it would be written; if the delimiter doesn't
+        # end it, the statement runs on to the end of the text.
+        data = (statement + delimiter).encode()
+        self.boundary_scanner.reset()
+        self.boundary_scanner.set_delimiter(delimiter.encode())
+        first = next(self.boundary_scanner.scan(data), None)
+        return first is not None and first[1] == len(data)
+
+    def _skip_comments(self, statement):
+        pos = 0
+        while True:
+            while pos < len(statement) and statement[pos].isspace():
+                pos += 1
+
+            for start, end in self.comments:
+                # MySQL executable comments (/*!40101 ... */) hold SQL, not prose.
+                if statement.startswith(start, pos) and not statement.startswith("/*!", pos):
+                    close = statement.find(end, pos + len(start))
+                    pos = len(statement) if close == -1 else close + len(end)
+                    break
+            else:
+                return pos
+
+    def _unquote(self, part):
+        for start, end in self.identifier_quotes.items():
+            if part.startswith(start) and part.endswith(end) and len(part) >= len(start) + len(end):
+                return part[len(start):-len(end)].replace(end * 2, end)
+        return part
+
+    def qualified_name(self, identifier):
+        """
+        Return the unquoted parts of a possibly qualified table name, as found
+        in the text of a statement.
+        """
+        return [self._unquote(part) for part in self.part_pattern.findall(identifier)]
+
+    def _table_name(self, identifier):
+        return self.qualified_name(identifier)[-1]
+
+    def classify(self, statement):
+        """
+        Return the StatementInfo of the text of a single statement.
+
+        :param statement: Statement text, as yielded by SQLReader.
+        """
+        return self.locate(statement)[0]
+
+    def locate(self, statement):
+        """
+        Return the StatementInfo of a statement together with the (start, end)
+        offsets of its table name in the text, or None if there's no table.
+
+        :param statement: Statement text, as yielded by SQLReader.
+        """
+        pos = self._skip_comments(statement)
+        head = statement[pos:pos + HEAD_LENGTH]
+
+        if not head:
+            return StatementInfo("comment", None), None
+
+        for kind, pattern in self.header_patterns:
+            match = pattern.match(head)
+            if match:
+                span = (pos + match.start("table"), pos + match.end("table"))
+                return StatementInfo(kind, self._table_name(match.group("table"))), span
+
+        for kind, pattern in self.keyword_patterns:
+            if pattern.match(head):
+                return StatementInfo(kind, None), None
+
+        return StatementInfo("other", None), None
+
+    def only_table(self, statement):
+        """
+        Return the table of a statement if it cannot reference any other
+        table, such as an INSERT ... VALUES, or None if that isn't certain.
+
+        :param statement: Statement text, as yielded by SQLReader.
+        """
+        info, span = self.locate(statement)
+        pattern = self.only_table_patterns.get(info.kind)
+        if pattern is None or not pattern.match(statement, span[1], span[1] + HEAD_LENGTH):
+            return None
+        if info.kind in ("insert", "replace") and SUBQUERY_PATTERN.search(statement, span[1]):
+            return None
+        return info.table
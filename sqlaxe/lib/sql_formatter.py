@@ -1,7 +1,8 @@
-import argparse
 import sqlglot
 from sqlglot import Dialect, Expression, exp
 
+from .profiler import profile_stage
+
 
 class SQLFormatter:
     def __init__(self, dialect='', output_dialect='', **kwargs):
@@ -11,9 +12,11 @@ class SQLFormatter:
         self.output_dialect = output_dialect or self.dialect
 
     def get_statements(self, expressions):
+        return list(self.iter_statements(expressions))
+
+    def iter_statements(self, expressions):
 
         write = Dialect.get_or_raise(self.output_dialect)
-        pretty_printed_statements = []
         for expressions in expressions:
             if expressions is None:
                 continue
@@ -25,12 +28,13 @@ class SQLFormatter:
             if isinstance(expressions, exp.Semicolon):
                 append_semicolon = False
 
-            if self.output_dialect != self.dialect:
-                pretty_printed_statement = write.generate(
-                    expressions, copy=False, pretty=self.pretty_print, identify=True
-                )
-            else:
-                pretty_printed_statement = expressions.sql(pretty=self.pretty_print, identify=True)
+            with profile_stage("generate"):
+                if self.output_dialect != self.dialect:
+                    pretty_printed_statement = write.generate(
+                        expressions, copy=False, pretty=self.pretty_print, identify=True
+                    )
+                else:
+                    pretty_printed_statement = expressions.sql(pretty=self.pretty_print, identify=True)
 
             if pretty_printed_statement.strip() == '':
                 continue
@@ -38,9 +42,7 @@ class SQLFormatter:
             if append_semicolon:
                 pretty_printed_statement = pretty_printed_statement + ";"
 
-            pretty_printed_statements.append(pretty_printed_statement)
-
-        return pretty_printed_statements
+            yield pretty_printed_statement
 
     def format(self, sql_content):
         return "\n\n".join(self.get_statements(sql_content))
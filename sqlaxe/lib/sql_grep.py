@@ -1,25 +1,121 @@
-import argparse
+import re
 import sqlglot
-from sqlglot import Dialect
+from sqlglot import Dialect, exp
+from .sql_classifier import SQLClassifier, kind_matches
 from .sql_pretty_printer import SQLPrettyPrinter
 
 
 class SQLGrep(SQLPrettyPrinter):
-    def __init__(self, pattern, invert, **kwargs):
+    """
+    Prints the statements whose pretty-printed form contains pattern.
+
+    Statements are first checked against their raw text, so only candidates
+    are parsed and formatted. The table, kind and column filters are answered
+    from the statement itself rather than from the generated text.
+    """
+
+    def __init__(self, pattern, invert, regex=False, table=None, kind=None, column=None, prefilter=True,
+                 **kwargs):
         super().__init__(**kwargs)
         self.pattern = pattern
         self.invert = invert
+        self.regex = re.compile(pattern) if regex else None
+
+        self.table = table.lower() if table else None
+        self.kind = kind
+        self.column = column.lower() if column else None
+
+        self.sql_classifier = SQLClassifier(dialect=self.sql_parser.dialect)
+
+        # Words of the pattern that must appear in the input, ignoring case,
+        # for the pattern to appear in the generated text
+        self.required_words = []
+        if self.table:
+            self.required_words.append(self.table)
+        if self.column:
+            self.required_words.append(self.column)
+        # Transpiling may rewrite any word of the pattern, such as a function
+        # name that only one dialect has
+        if prefilter and self.regex is None and self.sql_formatter.output_dialect == self.sql_formatter.dialect:
+            self.required_words.extend(self.pattern_words(pattern))
+
+        self.required_patterns = [re.compile(re.escape(word), re.IGNORECASE) for word in self.required_words]
+
+        # With an index, only the statements of the table and kind are read
+        if (self.table or self.kind) and not self.invert:
+            self.sql_parser.index_filter = self.index_matches
+
+    def pattern_words(self, pattern):
+        """
+        Return the words of pattern that are copied from the input as they are.
+        Keywords, type and function names are left out, as generation may
+        spell them differently, and so are numbers, as 0.5 may be written .5.
+        """
+        tokenizer_class = Dialect.get_or_raise(self.sql_parser.dialect).tokenizer_class
+        generated = {word for keyword in tokenizer_class.KEYWORDS for word in re.findall(r"\w+", keyword.upper())}
+        generated.update(exp.FUNCTION_BY_NAME)
+
+        return [word for word in re.findall(r"\w+", pattern)
+                if not word[0].isdigit() and word.upper() not in generated]
+
+    def index_matches(self, entry):
+        """
+        Return False if the statement of an IndexEntry cannot match.
+        """
+        if self.kind and not kind_matches(entry.kind, self.kind):
+            return False
+        return not self.table or any(table.lower() == self.table for table in entry.tables)
+
+    def could_match(self, statement):
+        """
+        Return False if statement cannot match, judging by its raw text alone.
+        """
+        if self.kind and not kind_matches(self.sql_classifier.classify(statement).kind, self.kind):
+            return False
+
+        return all(pattern.search(statement) for pattern in self.required_patterns)
+
+    def tree_matches(self, statement, expressions):
+        if self.table and (self.sql_classifier.classify(statement).table or "").lower() != self.table:
+            if not any(table.name.lower() == self.table
+                       for expression in expressions for table in expression.find_all(exp.Table)):
+                return False
+
+        if self.column:
+            names = set()
+            for expression in expressions:
+                for node in expression.find_all(exp.Column, exp.ColumnDef, exp.Schema):
+                    if isinstance(node, exp.Schema):
+                        names.update(column.name.lower() for column in node.expressions
+                                     if isinstance(column, exp.Identifier))
+                    else:
+                        names.add(node.name.lower())
+            if self.column not in names:
+                return False
+
+        return True
+
+    def text_matches(self, stmt):
+        if self.regex is not None:
+            return self.regex.search(stmt) is not None
+        return self.pattern in stmt
+
+    def match_statement(self, statement):
+        if not self.could_match(statement):
+            return self.pretty_print_statement(statement) if self.invert else []
+
+        expressions = self.sql_parser.parse_statement(statement)
+        tree_matches = self.tree_matches(statement, expressions)
+        statements = self.sql_formatter.get_statements(expressions)
+
+        if not tree_matches:
+            return statements if self.invert else []
+
+        return [stmt for stmt in statements if self.text_matches(stmt) != self.invert]
+
+    def iter_matches(self, sql_content):
+        for statements in self.sql_parser.map_statements(sql_content, self.match_statement):
+            yield from statements
 
     def format(self, sql_content):
-        statements = self.pretty_print_statements(sql_content)
-        if self.invert:
-            filtered_statements = [
-                stmt for stmt in statements if not self.pattern in stmt
-            ]
-        else:
-            filtered_statements = [stmt for stmt in statements if self.pattern in stmt]
-
-        if len(filtered_statements) == 0:
-            return ""
-        else:
-            return "\n".join(filtered_statements) 
+        return "\n".join(self.iter_matches(sql_content))
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import NamedTuple, Tuple
+
+from .compression import detect_compression
+from .logger import log
+from .sql_reader import DelimitedStatement, SQLStatement
+
+# The index of dump.sql is kept next to it, in dump.sql.sqlaxe-index
+INDEX_SUFFIX = ".sqlaxe-index"
+
+# Bumped whenever the layout of an index changes
+INDEX_FORMAT = 2
+
+# An index is a record per statement, then a JSON trailer describing the
+# indexed file, naming the kinds and table sets the records refer to and the
+# delimiters of statements not ended by a semicolon, then a footer holding
+# the trailer's length
+RECORD = struct.Struct("<QQHI8s")
+FOOTER = struct.Struct("<Q8s")
+INDEX_MAGIC = b"SQLAXEIX"
+
+# Number of records read at a time
+RECORDS_PER_READ = 4096
+
+
+class IndexEntry(NamedTuple):
+    start: int
+    end: int
+    kind: str
+    tables: Tuple[str, ...]
+    digest: bytes
+
+
+def statement_digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+class SQLIndexWriter:
+    """
+    Writes an index a statement at a time, in input order.
+    """
+
+    def __init__(self, path, file_stat, dialect):
+        self.path = path
+        self.file_stat = file_stat
+        self.dialect = dialect
+
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, self.temporary_path = tempfile.mkstemp(dir=directory, prefix=".sqlaxe-", suffix=".tmp")
+        self.file = os.fdopen(descriptor, "wb")
+
+        self.statements = 0
+        self.kinds = {}
+        self.table_sets = {}
+
+        # Start offset -> delimiter, of statements read under a DELIMITER directive
+        self.delimiters = {}
+
+    def write(self, start, end, kind, tables, digest, delimiter=";"):
+        if delimiter != ";":
+            self.delimiters[start] = delimiter
+        kind_number = self.kinds.setdefault(kind, len(self.kinds))
+        table_set = self.table_sets.setdefault(tuple(tables), len(self.table_sets))
+        self.file.write(RECORD.pack(start, end, kind_number, table_set, digest))
+        self.statements += 1
+
+    def commit(self):
+        trailer = json.dumps({
+            "format": INDEX_FORMAT,
+            "size": self.file_stat.st_size,
+            "mtime_ns": self.file_stat.st_mtime_ns,
+            "dialect": self.dialect,
+            "statements": self.statements,
+            "kinds": list(self.kinds),
+            "table_sets": [list(tables) for tables in self.table_sets],
+            "delimiters": [[start, delimiter] for start, delimiter in self.delimiters.items()],
+        }).encode("utf-8")
+        self.file.write(trailer)
+        self.file.write(FOOTER.pack(len(trailer), INDEX_MAGIC))
+        self.file.close()
+
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self.temporary_path, 0o666 & ~umask)
+        os.replace(self.temporary_path, self.path)
+
+    def close(self):
+        self.file.close()
+        if os.path.exists(self.temporary_path):
+            os.remove(self.temporary_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SQLIndex:
+    """
+    The index of a SQL file: the byte range, kind, tables and a hash of
+    every statement, so that commands interested in some of the statements
+    can read just those.
+
+    An index only stands for the file while its size and modification time
+    are the ones recorded when it was built. Raises ValueError if the index
+    can't be read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            file.seek(0, os.SEEK_END)
+            length = file.tell()
+            if length < FOOTER.size:
+                raise ValueError(f"{path} is not a sqlaxe index")
+
+            file.seek(length - FOOTER.size)
+            trailer_length, magic = FOOTER.unpack(file.read(FOOTER.size))
+            if magic != INDEX_MAGIC or trailer_length > length - FOOTER.size:
+                raise ValueError(f"{path} is not a sqlaxe index")
+
+            self.records_length = length - FOOTER.size - trailer_length
+            file.seek(self.records_length)
+            self.trailer = json.loads(file.read(trailer_length))
+
+        if self.trailer.get("format") != INDEX_FORMAT:
+            raise ValueError(f"{path} is an index of an unsupported format: {self.trailer.get('format')}")
+        self.dialect = self.trailer["dialect"]
+        self.kinds = self.trailer["kinds"]
+        self.table_sets = [tuple(tables) for tables in self.trailer["table_sets"]]
+        self.delimiters = {start: delimiter for start, delimiter in self.trailer["delimiters"]}
+
+    def __len__(self):
+        return self.trailer["statements"]
+
+    def matches(self, file_stat, dialect):
+        """
+        Return True if the index stands for a file with file_stat, read as dialect.
+        """
+        return (self.trailer["size"] == file_stat.st_size and self.trailer["mtime_ns"] == file_stat.st_mtime_ns
+                and self.dialect == dialect)
+
+    @classmethod
+    def find(cls, source, dialect):
+        """
+        Return the index of source, a file opened by path, or None if there is
+        no up-to-date index of it for dialect.
+        """
+        name = getattr(source, "name", None)
+        if not isinstance(name, str) or not os.path.exists(index_path(name)):
+            return None
+
+        try:
+            file_stat = os.fstat(source.fileno())
+            index = cls(index_path(name))
+        except (OSError, ValueError) as e:
+            log(f"ignoring the index of {name}: {e}")
+            return None
+
+        if not index.matches(file_stat, dialect):
+            log(f"ignoring the index of {name}: the file has changed, or was indexed as another dialect")
+            return None
+        return index
+
+    def entries(self):
+        """
+        Yield an IndexEntry for every statement, in input order.
+        """
+        with open(self.path, "rb") as file:
+            remaining = self.records_length
+            while remaining:
+                data = file.read(min(remaining, RECORD.size * RECORDS_PER_READ))
+                if not data:
+                    raise ValueError(f"{self.path} is truncated")
+                remaining -= len(data)
+                for start, end, kind, table_set, digest in RECORD.iter_unpack(data):
+                    yield IndexEntry(start, end, self.kinds[kind], self.table_sets[table_set], digest)
+
+    def read_statements(self, source, select=None):
+        """
+        Yield an SQLStatement for each statement of source that select, a
+        function taking an IndexEntry, returns True for; every statement if
+        select is None. Statements are read straight from their offsets, and
+        checked against their hashes.
+        """
+        if detect_compression(source) is not None:
+            raise ValueError("compressed files can't be read through an index")
+
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            for entry in self.entries():
+                if select is not None and not select(entry):
+                    continue
+                text = content[entry.start:entry.end].decode("utf-8", errors="replace")
+                if statement_digest(text) != entry.digest:
+                    raise ValueError(f"{source.name} doesn't match its index at byte {entry.start}; rebuild the index")
+                if entry.start in self.delimiters:
+                    text = DelimitedStatement(text, self.delimiters[entry.start])
+                yield SQLStatement(text, entry.start, entry.end)
+
@@ -0,0 +1,63 @@
+import os
+
+import sqlglot
+from sqlglot import exp
+
+from .compression import detect_compression
+from .sql_classifier import SQLClassifier
+from .sql_index import SQLIndexWriter, index_path, statement_digest
+from .sql_parser import SQLParser
+
+
+class SQLIndexer:
+    """
+    Builds the index of a SQL file in one pass. A statement's tables are read
+    from its leading tokens when it can't reference any other table, as for an
+    INSERT ... VALUES, and otherwise from its parse tree.
+    """
+
+    def __init__(self, **kwargs):
+        self.dialect = kwargs["dialect"]
+        self.jobs = kwargs.get("jobs", 1)
+
+        self.sql_parser = SQLParser(
+            dialect=self.dialect,
+            error_level=sqlglot.errors.ErrorLevel.IGNORE,
+            jobs=self.jobs,
+            progress=kwargs.get("progress"),
+        )
+        self.sql_classifier = SQLClassifier(dialect=self.dialect)
+
+    def describe_statement(self, statement):
+        """
+        Return the (kind, tables, digest, delimiter) of a statement.
+        """
+        info = self.sql_classifier.classify(statement)
+        table = self.sql_classifier.only_table(statement)
+        if table is not None:
+            tables = [table]
+        else:
+            tables = [info.table] if info.table is not None else []
+            if info.kind not in ("comment", "set", "unlock"):
+                for expression in self.sql_parser.parse_statement(statement):
+                    for node in expression.find_all(exp.Table):
+                        if node.name and node.name not in tables:
+                            tables.append(node.name)
+
+        return info.kind, tuple(tables), statement_digest(statement), getattr(statement, "delimiter", ";")
+
+    def build(self, path):
+        """
+        Index the file at path, writing the index next to it, and return the
+        number of statements indexed.
+        """
+        with open(path, "rb") as sql_file:
+            if detect_compression(sql_file) is not None:
+                raise ValueError(f"{path} is compressed; only uncompressed files can be indexed")
+
+            file_stat = os.fstat(sql_file.fileno())
+            with SQLIndexWriter(index_path(path), file_stat, self.dialect) as writer:
+                for start, end, description in self.sql_parser.map_ranges(sql_file, self.describe_statement):
+                    writer.write(start, end, *description)
+                writer.commit()
+                return writer.statements
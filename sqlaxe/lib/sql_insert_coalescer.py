@@ -0,0 +1,234 @@
+import re
+from typing import NamedTuple, Optional, Tuple
+
+import sqlglot
+from sqlglot import Dialect, exp
+from sqlglot.tokens import TokenType
+
+from .sql_classifier import SQLClassifier
+from .sql_parser import SQLParser
+from .sql_row_scanner import SQLRowScanner
+
+# Caps on a merged INSERT. MySQL refuses statements longer than
+# max_allowed_packet, which is 4 MiB by default before 8.0, so batches stay
+# well under that unless told otherwise
+DEFAULT_MAX_ROWS = 1000
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+# What follows the table name of an INSERT ... VALUES: its column list, if
+# any, then the VALUES keyword
+VALUES_CLAUSE = re.compile(r"\s*(?:\([^()]*\))?\s*(?P<values>VALUES?)\b", re.IGNORECASE)
+
+# Tokens standing for a name in the text before VALUES, which is compared
+# without regard to quoting
+NAME_TOKENS = {TokenType.VAR, TokenType.IDENTIFIER}
+
+# Most header keys remembered at once
+MAX_HEADER_KEYS = 1024
+
+
+class InsertRows(NamedTuple):
+    # What a mergeable INSERT ... VALUES is made of: the key it merges on
+    # (its table, column list and modifiers), the text before VALUES and the
+    # rows after it, their number and UTF-8 size, and whether comments come
+    # before the statement
+    key: Tuple[str, ...]
+    header: str
+    rows: str
+    count: int
+    size: int
+    commented: bool
+
+
+class SQLInsertCoalescer:
+    """
+    Merges consecutive INSERT ... VALUES statements into the same table, with
+    the same column list, into multi-row INSERTs of at most max_rows rows and
+    max_bytes bytes.
+
+    Statements are never moved past one another: any other statement, or an
+    INSERT into another table, ends the batch being built, and is copied as it
+    is. Rows are copied from the input, and a batch of one statement is the
+    statement unchanged. Only the rows of an INSERT are tokenized, to check
+    that nothing such as ON DUPLICATE KEY UPDATE or a comment follows them;
+    the statement is only parsed when its leading tokens don't show where
+    they start.
+    """
+
+    def __init__(self, max_rows=DEFAULT_MAX_ROWS, max_bytes=DEFAULT_MAX_BYTES, **kwargs):
+        self.dialect = kwargs["dialect"]
+        self.jobs = kwargs.get("jobs", 1)
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+
+        self.sql_parser = SQLParser(
+            dialect=self.dialect,
+            error_level=sqlglot.errors.ErrorLevel.IGNORE,
+            jobs=self.jobs,
+            progress=kwargs.get("progress"),
+        )
+        self.sql_classifier = SQLClassifier(dialect=self.dialect)
+        self.sql_row_scanner = SQLRowScanner(dialect=self.dialect)
+
+        # Header text -> key; dumps repeat the same few headers
+        self.header_keys = {}
+
+    def insert_rows(self, statement) -> Optional[InsertRows]:
+        """
+        Return the InsertRows of a statement, or None if it can't be merged.
+        """
+        info, span = self.sql_classifier.locate(statement)
+        if info.kind != "insert" or len(statement.encode("utf-8")) > self.max_bytes:
+            return None
+
+        match = VALUES_CLAUSE.match(statement, span[1]) if span is not None else None
+        values = (match.start("values"), match.end("values")) if match else self.find_values(statement)
+        if values is None:
+            return None
+
+        rows = statement[values[1]:].strip()
+        count = self.count_rows(rows)
+        if count is None or not self.rows_end(rows):
+            return None
+
+        header = statement[:values[0]]
+        commented = self.sql_classifier._skip_comments(statement) > len(statement) - len(statement.lstrip())
+        return InsertRows(self.header_key(header), header, rows, count, len(rows.encode("utf-8")), commented)
+
+    def find_values(self, statement):
+        """
+        Parse an INSERT whose leading tokens didn't show where its rows start,
+        and return the offsets of its VALUES keyword, or None if it isn't an
+        INSERT ... VALUES.
+        """
+        expressions = [expression for expression in self.sql_parser.parse_statement(statement) if expression]
+        if len(expressions) != 1 or not isinstance(expressions[0], exp.Insert):
+            return None
+        if not isinstance(expressions[0].expression, exp.Values):
+            return None
+
+        depth = 0
+        for token in self.tokenize(statement) or []:
+            if token.token_type == TokenType.L_PAREN:
+                depth += 1
+            elif token.token_type == TokenType.R_PAREN:
+                depth -= 1
+            elif token.token_type == TokenType.VALUES and depth == 0:
+                return token.start, token.end + 1
+        return None
+
+    def count_rows(self, rows):
+        """
+        Return the number of rows in the text after VALUES, or None if it
+        holds anything but a list of rows, or a subquery.
+        """
+        tokens = self.tokenize(rows)
+        if not tokens:
+            return None
+
+        count = 0
+        depth = 0
+        expect_row = True
+        for token in tokens:
+            if token.token_type in (TokenType.SELECT, TokenType.WITH):
+                return None
+            if token.token_type == TokenType.L_PAREN:
+                if depth == 0:
+                    if not expect_row:
+                        return None
+                    count += 1
+                    expect_row = False
+                depth += 1
+            elif token.token_type == TokenType.R_PAREN:
+                depth -= 1
+            elif depth == 0 and (expect_row or token.token_type != TokenType.COMMA):
+                return None
+            elif depth == 0:
+                expect_row = True
+
+        return count if depth == 0 and not expect_row else None
+
+    def rows_end(self, rows):
+        """
+        Return True if nothing, not even a comment, follows the last row: a
+        line comment there would comment out the rows merged after it.
+        """
+        end = None
+        try:
+            for _, end in self.sql_row_scanner.iter_rows(rows):
+                pass
+        except ValueError:
+            return False
+        return end == len(rows)
+
+    def header_key(self, header):
+        """
+        Return what must be equal for two INSERTs to be merged: the tokens
+        before VALUES, names unquoted and keywords in upper case.
+        """
+        key = self.header_keys.get(header)
+        if key is None:
+            if len(self.header_keys) >= MAX_HEADER_KEYS:
+                self.header_keys.clear()
+            key = self.header_keys[header] = tuple(
+                token.text if token.token_type in NAME_TOKENS else token.text.upper()
+                for token in self.tokenize(header) or []
+            )
+        return key
+
+    def tokenize(self, sql):
+        try:
+            return Dialect.get_or_raise(self.dialect).tokenize(sql)
+        except sqlglot.errors.TokenError:
+            return None
+
+    def describe_statement(self, statement):
+        return statement, self.insert_rows(statement)
+
+    def iter_coalesce(self, sql_content):
+        batch = []
+        batch_rows = 0
+        batch_size = 0
+
+        for statement, insert_rows in self.sql_parser.map_statements(sql_content, self.describe_statement):
+            # Comments before an INSERT would be lost inside a batch, so
+            # they start a new one
+            if (batch and insert_rows is not None and not insert_rows.commented
+                    and insert_rows.key == batch[0][1].key
+                    and batch_rows + insert_rows.count <= self.max_rows
+                    and batch_size + 1 + insert_rows.size <= self.max_bytes):
+                batch.append((statement, insert_rows))
+                batch_rows += insert_rows.count
+                batch_size += 1 + insert_rows.size
+                continue
+
+            if batch:
+                yield self.merge(batch)
+                batch = []
+
+            if insert_rows is None:
+                yield statement
+            else:
+                batch = [(statement, insert_rows)]
+                batch_rows = insert_rows.count
+                # Counting the semicolon the batch will end with
+                batch_size = len(statement.encode("utf-8")) + 1
+
+        if batch:
+            yield self.merge(batch)
+
+    def merge(self, batch):
+        if len(batch) == 1:
+            return batch[0][0]
+        header = batch[0][1].header
+        return header + "VALUES " + ",".join(insert_rows.rows for _, insert_rows in batch)
+
+    def coalesce(self, sql_content):
+        return list(self.iter_coalesce(sql_content))
+
+    def iter_format(self, sql_content):
+        for statement in self.iter_coalesce(sql_content):
+            yield self.sql_classifier.terminate(statement)
+
+    def format(self, sql_content):
+        return "\n".join(self.iter_format(sql_content))
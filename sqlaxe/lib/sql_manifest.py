@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import re
+
+import sqlglot
+from sqlglot import exp
+
+from .sql_classifier import SQLClassifier, kind_matches
+from .sql_insert_coalescer import VALUES_CLAUSE
+from .sql_parser import SQLParser
+from .sql_row_scanner import SQLRowScanner
+from .sql_table_extractor import EXECUTABLE_COMMENT, KEYS_TOGGLE
+
+# Written next to the section files of a split
+MANIFEST_NAME = "manifest.json"
+
+# Bumped whenever the layout of the manifest changes
+MANIFEST_FORMAT = 1
+
+# What a statement does, for deciding the kind of a file: "ddl", "data" or
+# "index"; statements of other kinds, such as SET or LOCK TABLES, and the
+# DISABLE KEYS and ENABLE KEYS around a table's rows don't count
+DDL_KINDS = ["create", "alter", "drop"]
+DATA_KINDS = ["insert", "replace", "update", "delete", "truncate", "copy"]
+INDEX_PATTERN = re.compile(
+    r"ALTER\s+TABLE\s+\S+\s+ADD\s+(?:UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?(?:INDEX|KEY)\b", re.IGNORECASE,
+)
+
+# Statements that belong to no table but don't order the files around them:
+# they only change the session of the connection that runs them
+SESSION_KINDS = ["comment", "set", "lock", "unlock"]
+
+# Kinds whose statements can name other tables that must exist first, such
+# as the target of a foreign key or the tables a view selects from
+REFERENCING_KINDS = ["create", "alter"]
+
+
+class SQLManifestWriter:
+    """
+    Describes the files of a split as they are written, for loading them in
+    parallel: for each file, its table, kind ("ddl", "data", "index",
+    "mixed", "general", or "session" for files of SET statements alone, which
+    a loader should run on each connection), statement and row counts, size and SHA-256
+    checksum of the SQL, and the files it depends on.
+
+    A file depends on the previous file with statements for its table, and
+    on the files of the tables its CREATE or ALTER statements reference
+    (foreign keys, views) that came before it. A statement that belongs to no
+    table, other than SET, LOCK or UNLOCK, could affect anything, so the file
+    holding it depends on every file before it, and every file after it on
+    it. Row counts are of the rows written, which is what the table holds
+    once loaded unless some are ignored or replaced.
+    """
+
+    def __init__(self, dialect=''):
+        self.dialect = dialect
+        self.sql_parser = SQLParser(dialect=dialect, error_level=sqlglot.errors.ErrorLevel.IGNORE)
+        self.sql_classifier = SQLClassifier(dialect=dialect)
+        self.sql_row_scanner = SQLRowScanner(dialect=dialect)
+
+        # File name -> entry, in order of first appearance
+        self.files = {}
+        self.digests = {}
+
+        # Last file with statements for each table, and the last file with a
+        # statement every later file has to wait for
+        self.last_table_file = {}
+        self.last_barrier_file = None
+        self.views = set()
+
+        # General files with a statement other than a session one
+        self.ordered_files = set()
+
+    def add(self, name, table, sql):
+        """
+        Record a statement written to a file.
+
+        :param name: Name of the file, without its directory.
+        :param table: Table the file holds statements for, or "general".
+        :param sql: Text of the statement, without its delimiter.
+        """
+        entry = self.files.get(name)
+        if entry is None:
+            entry = self.start_file(name, table)
+
+        data = self.sql_classifier.terminate(sql) + "\n"
+        self.digests[name].update(data.encode("utf-8"))
+        entry["bytes"] += len(data.encode("utf-8"))
+        entry["statements"] += 1
+
+        start = self.sql_classifier._skip_comments(sql)
+        match = EXECUTABLE_COMMENT.match(sql, start)
+        text = match.group(1) if match else sql[start:]
+        info = self.sql_classifier.classify(text)
+        category = self.category(info.kind, text)
+        if category is not None:
+            entry["kinds"][category] = entry["kinds"].get(category, 0) + 1
+
+        if info.kind in ("insert", "replace") and entry["rows"] is not None:
+            rows = self.count_rows(sql)
+            entry["rows"] = None if rows is None else entry["rows"] + rows
+        if info.kind == "create_view":
+            self.views.add(table)
+
+        if table == "general":
+            self.add_general(name, entry, info)
+        elif any(kind_matches(info.kind, kind) for kind in REFERENCING_KINDS):
+            for referenced in self.referenced_tables(sql, table):
+                referenced_file = self.last_table_file.get(referenced)
+                if referenced_file is not None and referenced_file != name:
+                    self.depend(entry, referenced_file)
+
+    def add_general(self, name, entry, info):
+        # A statement that names a table, such as the ALTER TABLE ... DISABLE
+        # KEYS of mysqldump, goes in order with that table's files
+        if info.table is not None or info.kind not in SESSION_KINDS:
+            self.ordered_files.add(name)
+
+        if info.table is not None:
+            previous = self.last_table_file.get(info.table)
+            if previous is not None and previous != name:
+                self.depend(entry, previous)
+            self.last_table_file[info.table] = name
+        elif info.kind not in SESSION_KINDS:
+            for earlier in self.files:
+                if earlier != name:
+                    self.depend(entry, earlier)
+            self.last_barrier_file = name
+
+    def start_file(self, name, table):
+        entry = {
+            "file": name, "table": None if table == "general" else table, "kind": None, "statements": 0,
+            "kinds": {}, "rows": 0, "bytes": 0, "sha256": None, "depends_on": [],
+        }
+        if self.last_barrier_file is not None:
+            self.depend(entry, self.last_barrier_file)
+        if table != "general":
+            if table in self.last_table_file:
+                self.depend(entry, self.last_table_file[table])
+            self.last_table_file[table] = name
+
+        self.files[name] = entry
+        self.digests[name] = hashlib.sha256()
+        return entry
+
+    def depend(self, entry, name):
+        if name not in entry["depends_on"]:
+            entry["depends_on"].append(name)
+
+    def category(self, kind, sql):
+        if kind == "alter_table" and KEYS_TOGGLE.search(sql):
+            return None
+        if kind == "create_index" or (kind == "alter_table" and INDEX_PATTERN.match(sql)):
+            return "index"
+        if any(kind_matches(kind, name) for name in DDL_KINDS):
+            return "ddl"
+        if kind in DATA_KINDS:
+            return "data"
+        return None
+
+    def count_rows(self, sql):
+        """
+        Return the number of rows an INSERT ... VALUES inserts, or None if it
+        isn't known without parsing the statement.
+        """
+        info, span = self.sql_classifier.locate(sql)
+        match = VALUES_CLAUSE.match(sql, span[1]) if span is not None else None
+        if match is None:
+            return None
+        try:
+            return sum(1 for _ in self.sql_row_scanner.iter_rows(sql, match.end()))
+        except ValueError:
+            return None
+
+    def referenced_tables(self, sql, table):
+        tables = set()
+        for sql_statement in self.sql_parser.parse_statement(sql):
+            if sql_statement is not None:
+                tables.update(found.name for found in sql_statement.find_all(exp.Table))
+        tables.discard(table)
+        return sorted(tables)
+
+    def manifest(self):
+        files = []
+        tables = {}
+        for name, entry in self.files.items():
+            kinds = sorted(entry["kinds"])
+            if entry["table"] is None and name not in self.ordered_files:
+                entry["kind"] = "session"
+            elif not kinds:
+                entry["kind"] = "general"
+            else:
+                entry["kind"] = kinds[0] if len(kinds) == 1 else "mixed"
+            entry["sha256"] = self.digests[name].hexdigest()
+            files.append(entry)
+
+            if entry["table"] is not None:
+                table = tables.setdefault(entry["table"], {"files": [], "rows": 0})
+                table["files"].append(name)
+                if entry["rows"] is None or table["rows"] is None or entry["table"] in self.views:
+                    table["rows"] = None
+                else:
+                    table["rows"] += entry["rows"]
+
+        return {"format": MANIFEST_FORMAT, "dialect": self.dialect, "files": files, "tables": tables}
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.manifest(), file, indent=1)
+            file.write("\n")
+
+
+class SQLLoadPlan:
+    """
+    Reads the manifest of a split, and works out the order to load its files
+    in with the most parallelism the dependencies allow. Raises ValueError if
+    path isn't a manifest, or a split directory holding one.
+    """
+
+    def __init__(self, path):
+        if os.path.isdir(path):
+            path = os.path.join(path, MANIFEST_NAME)
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as file:
+                self.manifest = json.load(file)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"{path} is not a split manifest: {e}")
+
+        if self.manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"{path} is a manifest of an unsupported format: {self.manifest.get('format')}")
+        self.files = self.manifest["files"]
+        self.dialect = self.manifest["dialect"]
+
+    def stages(self):
+        """
+        Return the files in stages: every file of a stage can be loaded at the
+        same time, once all the files of the stages before it are loaded.
+        """
+        stage_of = {}
+        stages = []
+        for entry in self.files:
+            depends_on = [name for name in entry["depends_on"] if name in stage_of]
+            if len(depends_on) != len(entry["depends_on"]):
+                raise ValueError(f"{entry['file']} depends on a file that comes after it")
+
+            stage = max((stage_of[name] + 1 for name in depends_on), default=0)
+            stage_of[entry["file"]] = stage
+            if stage == len(stages):
+                stages.append([])
+            stages[stage].append(entry["file"])
+        return stages
+
+    def verification_queries(self):
+        """
+        Yield a query per table with a known row count, returning the table
+        name, its row count once loaded and the count it should have.
+        """
+        for table, entry in self.manifest["tables"].items():
+            if entry["rows"] is None:
+                continue
+            query = exp.select(
+                exp.Literal.string(table).as_("table_name"),
+                exp.Count(this=exp.Star()).as_("row_count"),
+                exp.Literal.number(entry["rows"]).as_("expected"),
+            ).from_(exp.Table(this=exp.to_identifier(table, quoted=True)))
+            yield query.sql(dialect=self.dialect) + ";"
@@ -0,0 +1,81 @@
+import os
+from collections import deque
+from itertools import islice
+
+from .logger import configure_worker, log_queue, logger
+
+# Number of statements sent to a worker at a time, and number of batches per
+# worker allowed in flight before results are collected. Together they bound
+# how far ahead of the output the input is read.
+DEFAULT_BATCH_SIZE = 256
+BATCHES_PER_JOB = 4
+
+_worker_function = None
+
+
+def resolve_jobs(jobs):
+    """
+    Turn a --jobs value into a process count; 0 or less means one per CPU.
+
+    :param jobs: Requested number of jobs.
+    """
+    if jobs is None:
+        return 1
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _initialize_worker(function, queue, level):
+    global _worker_function
+    _worker_function = function
+    configure_worker(queue, level)
+
+
+def _run_batch(batch):
+    return [_worker_function(item) for item in batch]
+
+
+def _batches(items, batch_size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def imap_ordered(function, items, jobs=1, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Apply function to every item and yield the results in input order.
+
+    With more than one job, items are sent in batches to a pool of worker
+    processes. function must be picklable - a module-level function or a bound
+    method of a picklable object - and is shipped to each worker once. Only a
+    bounded number of batches is in flight, so items may be a stream.
+
+    :param function: Callable applied to each item.
+    :param items: Iterable of picklable items.
+    :param jobs: Number of worker processes; 1 runs in this process.
+    :param batch_size: Number of items sent to a worker at a time.
+    """
+    jobs = resolve_jobs(jobs)
+    if jobs == 1:
+        for item in items:
+            yield function(item)
+        return
+
+    # Only loaded when a pool is needed, as it brings in multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_initialize_worker, initargs=(function, log_queue(), logger.level)
+    ) as executor:
+        pending = deque()
+        for batch in _batches(items, batch_size):
+            pending.append(executor.submit(_run_batch, batch))
+            if len(pending) >= jobs * BATCHES_PER_JOB:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
@@ -1,71 +1,226 @@
-import argparse
+import logging
+import pickle
 import sqlglot
-from tqdm import tqdm
+from collections import deque
+from functools import partial
 from sqlglot import Dialect, Expression, exp
 from .logger import log
-
-from sqlglot.optimizer.qualify import qualify
+from .profiler import active_profiler, call_profiled, profile_stage, profile_statements
+from .progress import Progress
+from .sql_cache import ParsedStatement
+from .sql_index import SQLIndex
+from .sql_parallel import imap_ordered
+from .sql_reader import SQLReader
 
 
 
 class SQLParser:
-    def __init__(self, dialect='', qualify=False, **kwargs):
+    def __init__(self, dialect='', qualify=False, error_level=None, jobs=1, cache=None, progress=None, **kwargs):
         self.dialect = dialect
         self.qualify = qualify
+        self.error_level = error_level
+        self.jobs = jobs
 
-    def parse(self, sql_content):
-        input_dialect_obj = Dialect.get_or_raise(self.dialect)
-        tokens = input_dialect_obj.tokenize(sql_content)
-        parser = input_dialect_obj.parser() 
-
-        # Get the input dialect object from sqlglot
-        input_dialect_obj = Dialect.get_or_raise(self.dialect)
+        # Progress style ("bar", "json" or "none"); None draws a bar on a terminal
+        self.progress = progress
 
-        # Tokenize the SQL content using the input dialect
-        tokens = input_dialect_obj.tokenize(sql_content)
+        # SQLCache holding parsed statements, or None to always parse
+        self.cache = cache
+        self.sql_reader = SQLReader(dialect=dialect)
 
+        # Function of an IndexEntry choosing the statements a command needs;
+        # when set and the input has an up-to-date index, only those are read
+        self.index_filter = None
 
-        # Split the tokens into chunks based on semicolons
-        total = len(tokens)
-        chunks: t.List[t.List[Token]] = [[]]
+    def parse(self, sql_content):
+        return list(self.iter_parse(sql_content))
+
+    def iter_parse(self, sql_content):
+        """
+        Parse sql_content one statement at a time, yielding each expression as
+        soon as it is parsed. sql_content may be a string or a file object; only
+        the statement currently being parsed is held in memory.
+        """
+        for expressions in self._report_progress(sql_content, self._map_cached(sql_content, self.parse_statement, 1)):
+            yield from expressions
+
+    def parse_statement(self, statement):
+        """
+        Parse the text of a single statement, as yielded by SQLReader, into a
+        list of expressions.
+        """
+        expressions = getattr(statement, "expressions", None)
+        if expressions is not None:
+            # Only handed out once, as the caller may change them
+            statement.expressions = None
+            return expressions
+
+        parsed = getattr(statement, "parsed", None)
+        if parsed is not None:
+            with profile_stage("load"):
+                return pickle.loads(parsed)
 
-        for i, token in enumerate(tqdm(tokens)):
-            chunks[-1].append(token)
+        # Get the input dialect object from sqlglot
+        input_dialect_obj = Dialect.get_or_raise(self.dialect)
 
-            if token.token_type == sqlglot.TokenType.SEMICOLON:
-                if i < total - 1:
-                    chunks.append([])
+        # Create a parser object for the input dialect
+        parser = input_dialect_obj.parser(error_level=self.error_level)
 
-        statement_counter = 0
+        # The reader strips the terminating semicolon; put it back so that
+        # comments trailing a statement are kept as they were, on a line of
+        # its own so that a trailing line comment can't swallow it.
+        statement = statement + "\n;"
 
-        # Create a parser object for the input dialect
-        parser = input_dialect_obj.parser()
+        # Parse the statement into SQL expressions
+        try:
+            with profile_stage("tokenize"):
+                tokens = input_dialect_obj.tokenize(statement)
+            with profile_stage("parse"):
+                sql_statements = parser.parse(tokens, statement)
+        except (sqlglot.errors.ParseError, sqlglot.errors.TokenError) as e:
 
-        remainder = iter(tokens)
+            message = str(e).splitlines()[0] if str(e) else type(e).__name__
+            log(f"error during parsing - possible wrong dialect: {message}", logging.WARNING, repeat_key="parse error")
+            return []
 
         output = []
-        # Iterate over each chunk of tokens
-        for row in tqdm(chunks):
-            # Parse the chunk into SQL statements
-            try:
-                sql_statements = parser.parse(raw_tokens=row)
-            except sqlglot.errors.ParseError as e:
-
-                log('error during parsing - possible wrong dialect.')
-                log(e)
+        for sql_statement in sql_statements:
+            if sql_statement is None:
                 continue
+            if self.qualify:
+                # The optimizer is only loaded when qualification is asked for
+                from sqlglot.optimizer.qualify import qualify
 
-            if sql_statements:
-
-                for statement in sql_statements:
-                    if self.qualify:
-                        statement = qualify(statement, infer_schema=True)
-                    output.append(statement)
-
-            else:
-                output.append(chunk)
-
-
+                with profile_stage("qualify"):
+                    sql_statement = qualify(sql_statement, infer_schema=True)
+            output.append(sql_statement)
 
         return output
 
+    def map_statements(self, sql_content, function):
+        """
+        Apply function to the text of every statement in sql_content and yield
+        the results in input order. When jobs is above 1 the calls are spread
+        over a process pool, so function must be picklable (e.g. a bound method
+        of a command object) and should return plain data such as generated SQL
+        rather than expressions.
+        """
+        return self._report_progress(sql_content, self._map_cached(sql_content, function, self.jobs))
+
+    def map_ranges(self, sql_content, function):
+        """
+        Like map_statements, but yield (start, end, result) for each statement,
+        where start and end are its byte offsets in the input. The cache is
+        not used.
+        """
+        results = self._apply(function, self._read_statements(sql_content), self.jobs)
+        return self._report_progress(sql_content, ((end, (start, end, result)) for start, end, result in results))
+
+    def find_index(self, sql_content):
+        """
+        Return the index to read sql_content through, or None to read all of it.
+        """
+        if self.index_filter is None:
+            return None
+        return SQLIndex.find(sql_content, self.dialect)
+
+    def _report_progress(self, sql_content, results):
+        with Progress(total=self.sql_reader.size(sql_content), style=self.progress) as progress:
+            for end, result in results:
+                progress.update(end)
+                yield result
+
+    def parse_and_apply(self, function, statement):
+        """
+        Parse statement and apply function to it, returning the pickled
+        expressions, or None if they can't be pickled, and the statement's
+        delimiter along with the result. The expressions are pickled before
+        function sees them, and function is given them as they are rather
+        than a copy loaded from the pickle.
+        """
+        expressions = self.parse_statement(statement)
+        try:
+            parsed = pickle.dumps(expressions, protocol=pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            parsed = None
+
+        delimiter = getattr(statement, "delimiter", ";")
+        return parsed, delimiter, function(ParsedStatement(statement, parsed, expressions, delimiter))
+
+    def _apply(self, function, statements, jobs):
+        """
+        Apply function to the text of each (start, end, text) statement,
+        yielding (start, end, result) in input order. When the run is being
+        profiled, the stage timings of each call are added to the profile with
+        the statement's offsets.
+        """
+        ranges = deque()
+
+        def texts():
+            for start, end, text in statements:
+                ranges.append((start, end, text))
+                yield text
+
+        profiler = active_profiler()
+        if profiler is None:
+            for result in imap_ordered(function, texts(), jobs=jobs):
+                start, end, _ = ranges.popleft()
+                yield start, end, result
+            return
+
+        for timings, result in imap_ordered(partial(call_profiled, function), texts(), jobs=jobs):
+            start, end, text = ranges.popleft()
+            profiler.add_statement(timings, start, end, text)
+            yield start, end, result
+
+    def _read_statements(self, sql_content):
+        index = self.find_index(sql_content)
+        if index is not None:
+            statements = index.read_statements(sql_content, self.index_filter)
+        else:
+            statements = self.sql_reader.read_statements(sql_content)
+        return profile_statements(
+            "read", ((statement.start, statement.end, statement.text) for statement in statements)
+        )
+
+    def _map_statements(self, sql_content, function, jobs):
+        for _, end, result in self._apply(function, self._read_statements(sql_content), jobs):
+            yield end, result
+
+    def _map_cached(self, sql_content, function, jobs):
+        """
+        Apply function to every statement, yielding (end, result) pairs where
+        end is the byte offset just past the statement.
+        """
+        # An index already narrows the input down to a few statements
+        if self.cache is None or self.find_index(sql_content) is not None:
+            yield from self._map_statements(sql_content, function, jobs)
+            return
+
+        with self.sql_reader.content(sql_content) as (content, offset):
+            if content is None:
+                yield from self._map_statements(sql_content, function, jobs)
+                return
+
+            key = self.cache.key(content, self.dialect, self.qualify, self.error_level, offset)
+            records = self.cache.get(key)
+
+            if records is not None:
+                statements = profile_statements("read", (
+                    (start, end, ParsedStatement(
+                        self.sql_reader.text(content, start, end), parsed, delimiter=delimiter
+                    ))
+                    for start, end, parsed, delimiter in records
+                ))
+                for _, end, result in self._apply(function, statements, jobs):
+                    yield end, result
+                return
+
+            # Not cached yet: parse every statement in the workers and store
+            # the expressions as the results come back
+            with self.cache.writer(key) as writer:
+                results = self._apply(partial(self.parse_and_apply, function), self._read_statements(sql_content), jobs)
+                for start, end, (parsed, delimiter, result) in results:
+                    writer.write((start, end, parsed, delimiter))
+                    yield end, result
+                writer.commit()
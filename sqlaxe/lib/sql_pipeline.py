@@ -0,0 +1,102 @@
+from typing import Hashable, NamedTuple
+
+import sqlglot
+from sqlglot import Dialect, exp
+
+from .profiler import profile_stage
+from .sql_parser import SQLParser
+
+
+class Once(NamedTuple):
+    """
+    An expression a stage adds that is only written the first time its key
+    comes up, such as the TRUNCATE TABLE before the first INSERT into a table.
+    """
+    key: Hashable
+    expression: exp.Expression
+
+
+class SQLPipeline:
+    """
+    Parses each statement once, runs its expressions through stages in
+    order, and generates what comes out once, in the output dialect.
+
+    A stage is any object with a transform_expression(expression) method
+    that returns the list of expressions to write in its place: usually the
+    expression itself, changed in place or not, with others before or after
+    it, or an empty list to leave it out. SQLTableDrop, SQLTableTruncate and
+    SQLTableNameReplacer are stages. Each expression a stage returns goes
+    through the stages after it.
+
+    Whether a Once expression is written is worked out in input order, as
+    statements come back from the parser, so the output doesn't depend on how
+    they were spread over worker processes. Stages run in those processes
+    when jobs is more than 1, so they have to be picklable, and shouldn't
+    rely on state kept from one statement to the next.
+    """
+
+    def __init__(self, stages=(), **kwargs):
+        self.stages = list(stages)
+        self.dialect = kwargs["dialect"]
+        self.output_dialect = kwargs.get("output_dialect") or self.dialect
+        self.pretty = kwargs.get("pretty", False)
+        self.jobs = kwargs.get("jobs", 1)
+
+        self.sql_parser = SQLParser(
+            dialect=self.dialect,
+            error_level=sqlglot.errors.ErrorLevel.IGNORE,
+            jobs=self.jobs,
+            cache=kwargs.get("cache"),
+            progress=kwargs.get("progress"),
+        )
+
+    def transform(self, sql_statement):
+        """
+        Run an expression through every stage. Returns (key, expression)
+        pairs, where key is None unless the expression comes from a Once; the
+        keys of different stages never collide.
+        """
+        items = [(None, sql_statement)]
+        for number, stage in enumerate(self.stages):
+            transformed = []
+            for key, expression in items:
+                for result in stage.transform_expression(expression):
+                    if isinstance(result, Once):
+                        transformed.append(((number, result.key) if key is None else key, result.expression))
+                    else:
+                        transformed.append((key, result))
+            items = transformed
+        return items
+
+    def pipe_statement(self, statement):
+        write = Dialect.get_or_raise(self.output_dialect)
+
+        output = []
+        for sql_statement in self.sql_parser.parse_statement(statement):
+            if sql_statement is None or sql_statement == "":
+                continue
+
+            for key, expression in self.transform(sql_statement):
+                with profile_stage("generate"):
+                    sql = write.generate(expression, copy=False, pretty=self.pretty)
+                if sql.strip():
+                    output.append((key, sql))
+        return output
+
+    def iter_pipe(self, sql_content):
+        written = set()
+        for statements in self.sql_parser.map_statements(sql_content, self.pipe_statement):
+            # A later stage can turn a Once expression into several, which
+            # are all written with it
+            yield from (sql for key, sql in statements if key is None or key not in written)
+            written.update(key for key, _ in statements if key is not None)
+
+    def pipe(self, sql_content):
+        return list(self.iter_pipe(sql_content))
+
+    def iter_format(self, sql_content):
+        for statement in self.iter_pipe(sql_content):
+            yield statement + ";"
+
+    def format(self, sql_content):
+        return "\n".join(self.iter_format(sql_content))
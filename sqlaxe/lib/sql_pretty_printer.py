@@ -1,4 +1,3 @@
-import argparse
 import sqlglot
 from sqlglot import Dialect, Expression, exp
 from .sql_formatter import SQLFormatter
@@ -11,11 +10,16 @@ class SQLPrettyPrinter:
         self.sql_formatter = SQLFormatter(pretty_print=True, **kwargs)
 
     def pretty_print_statements(self, sql_content):
+        return list(self.iter_pretty_print_statements(sql_content))
 
-        expressions = self.sql_parser.parse(sql_content)
-        pretty_print_statements = self.sql_formatter.get_statements(expressions)
+    def pretty_print_statement(self, statement):
+        expressions = self.sql_parser.parse_statement(statement)
 
-        return pretty_print_statements
+        return self.sql_formatter.get_statements(expressions)
+
+    def iter_pretty_print_statements(self, sql_content):
+        for statements in self.sql_parser.map_statements(sql_content, self.pretty_print_statement):
+            yield from statements
 
     def format(self, sql_content):
-        return "\n\n".join(self.pretty_print_statements(sql_content))
+        return "\n\n".join(self.iter_pretty_print_statements(sql_content))
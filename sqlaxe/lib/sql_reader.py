@@ -0,0 +1,177 @@
+import io
+import mmap
+import os
+import stat
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from .sql_boundary_scanner import SQLBoundaryScanner
+
+# Size of each block read from non-seekable input such as a pipe; peak memory
+# is roughly this plus the largest statement in the file.
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+
+class DelimitedStatement(str):
+    """
+    The text of a statement ended by a delimiter other than a semicolon, set
+    by a DELIMITER directive as around the triggers and routines of a
+    mysqldump. Commands copying the statement end it with the same delimiter;
+    see SQLClassifier.terminate().
+    """
+
+    def __new__(cls, text, delimiter):
+        statement = super().__new__(cls, text)
+        statement.delimiter = delimiter
+        return statement
+
+    def __reduce__(self):
+        return DelimitedStatement, (str(self), self.delimiter)
+
+
+class SQLStatement(NamedTuple):
+    text: str
+    start: int
+    end: int
+
+
+class SQLReader:
+    """
+    Reads SQL input and yields one statement at a time.
+
+    Regular files are memory-mapped and scanned in place; other inputs (pipes,
+    text streams, strings) are read in bounded blocks. Either way only the
+    statement being yielded is copied out of the input, so memory use depends on
+    the largest statement rather than the size of the file.
+    """
+
+    def __init__(self, dialect='', block_size=DEFAULT_BLOCK_SIZE, encoding='utf-8', **kwargs):
+        self.dialect = dialect
+        self.block_size = block_size
+        self.encoding = encoding
+        self.scanner = SQLBoundaryScanner(dialect=dialect)
+
+    def _blocks(self, source):
+        if isinstance(source, str):
+            yield source.encode(self.encoding)
+            return
+        if isinstance(source, (bytes, bytearray)):
+            yield bytes(source)
+            return
+
+        while True:
+            block = source.read(self.block_size)
+            if not block:
+                return
+            if isinstance(block, str):
+                block = block.encode(self.encoding)
+            yield block
+
+    def _map(self, source):
+        """
+        Return a read-only mmap of source if it is a binary regular file, or
+        None if it has to be streamed.
+        """
+        if not isinstance(source, (io.BufferedReader, io.FileIO)):
+            return None
+
+        try:
+            file_stat = os.fstat(source.fileno())
+        except (OSError, io.UnsupportedOperation):
+            return None
+
+        if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size == 0:
+            return None
+
+        return mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def size(self, source):
+        """
+        Return the number of bytes that will be read from source, or None if
+        that isn't known in advance, as for a pipe.
+
+        :param source: SQL input; a string, bytes or a file object.
+        """
+        if isinstance(source, str):
+            return len(source)
+        if isinstance(source, (bytes, bytearray)):
+            return len(source)
+
+        try:
+            file_stat = os.fstat(source.fileno())
+            if stat.S_ISREG(file_stat.st_mode):
+                return file_stat.st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+        return None
+
+    @contextmanager
+    def content(self, source):
+        """
+        Provide the whole of source as a bytes-like object together with the
+        offset reading starts at, or (None, 0) if source can only be streamed.
+
+        :param source: SQL input; a string, bytes or a file object.
+        """
+        if isinstance(source, str):
+            yield source.encode(self.encoding), 0
+            return
+        if isinstance(source, (bytes, bytearray)):
+            yield source, 0
+            return
+
+        mapped = self._map(source)
+        if mapped is None:
+            yield None, 0
+            return
+
+        with mapped:
+            yield mapped, source.tell()
+
+    def text(self, content, start, end):
+        """
+        Return the decoded text of a byte range of content, as provided by
+        content(), without scanning it again.
+        """
+        return content[start:end].decode(self.encoding, errors="replace")
+
+    def read_ranges(self, source):
+        """
+        Yield (start, end, data) for each statement of source, where start and
+        end are byte offsets into the input and data holds the statement bytes.
+
+        :param source: SQL input; a string, bytes or a file object.
+        """
+        mapped = self._map(source)
+        if mapped is None:
+            yield from self.scanner.scan_blocks(self._blocks(source))
+            return
+
+        with mapped:
+            self.scanner.reset(source.tell())
+            for start, end in self.scanner.scan(mapped):
+                yield start, end, mapped[start:end]
+
+    def read_statements(self, source):
+        """
+        Yield an SQLStatement, holding the decoded text and byte range, for each
+        statement of source.
+
+        :param source: SQL input; a string, bytes or a file object.
+        """
+        for start, end, data in self.read_ranges(source):
+            text = data.decode(self.encoding, errors="replace")
+            # The scanner stops at each statement it yields, so its delimiter
+            # is the one that ended the statement
+            if self.scanner.delimiter != b";":
+                text = DelimitedStatement(text, self.scanner.delimiter.decode(self.encoding))
+            yield SQLStatement(text, start, end)
+
+    def read(self, source):
+        """
+        Yield the text of each statement of source, without its delimiter.
+
+        :param source: SQL input; a string, bytes or a file object.
+        """
+        for statement in self.read_statements(source):
+            yield statement.text
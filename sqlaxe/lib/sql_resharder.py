@@ -0,0 +1,284 @@
+import logging
+import os
+import re
+import zlib
+
+import sqlglot
+from sqlglot import exp
+
+from .compression import SUFFIXES
+from .file_handle_pool import DEFAULT_MAX_OPEN_FILES, FileHandlePool
+from .logger import log
+from .sql_classifier import SQLClassifier
+from .sql_insert_coalescer import VALUES_CLAUSE
+from .sql_parser import SQLParser
+from .sql_row_scanner import SQLRowScanner
+from .sql_table_extractor import EXECUTABLE_COMMENT
+
+DEFAULT_ROWS = 1000
+
+# An INSERT with a clause after its rows, which would have to be repeated
+# for every chunk, is copied whole; only the end of the statement is searched
+TRAILING_CLAUSE = re.compile(r"\b(?:ON\s+DUPLICATE|ON\s+CONFLICT|RETURNING)\b", re.IGNORECASE)
+TAIL_LENGTH = 4096
+
+# Name of the file every statement but the rows goes to, when sharding
+SCHEMA_NAME = "schema"
+
+# Characters a table name can't keep in the name of a file
+SEPARATOR_PATTERN = re.compile(r"[/\\\x00]")
+
+# Statements that change a table's rows, which can't be kept in order with
+# rows loaded from shards
+DATA_KINDS = ["insert", "replace", "update", "delete", "truncate"]
+
+
+def same_statement(statement):
+    """
+    Return statement as it is: what map_statements() applies when the text is
+    all that is needed. Unlike str(), it keeps the delimiter of a
+    DelimitedStatement.
+    """
+    return statement
+
+
+class SQLResharder:
+    """
+    Rewrites every INSERT ... VALUES as INSERTs of at most rows rows each.
+
+    The rows of an INSERT are found in its text with an SQLRowScanner, one at
+    a time, so an INSERT of any size is cut up without sqlglot building an
+    expression for each of its values, and only a chunk of rows is held
+    besides the statement itself.
+
+    With more than one shard, each table's rows are spread over that many
+    files in output_directory, named like users.003.sql, either round-robin or
+    by a hash of the value of the shard_by column (round-robin for a row
+    without one, with a warning), and every other statement
+    goes to schema.sql, in order, to be loaded first. Each shard file starts
+    with the SET statements that came before it was opened, so that each
+    connection loading a shard has the same session settings.
+    """
+
+    def __init__(self, rows=DEFAULT_ROWS, shards=1, shard_by=None, output_directory=None, **kwargs):
+        self.dialect = kwargs["dialect"]
+        self.rows = rows
+        self.shards = shards
+        self.shard_by = shard_by
+        self.output_directory = output_directory
+        self.max_open_files = kwargs.get("max_open_files", DEFAULT_MAX_OPEN_FILES)
+
+        # Compress the shard files with "gzip", "xz" or "bz2"
+        self.compression = kwargs.get("compression")
+
+        self.sql_parser = SQLParser(
+            dialect=self.dialect,
+            error_level=sqlglot.errors.ErrorLevel.IGNORE,
+            progress=kwargs.get("progress"),
+        )
+        self.sql_classifier = SQLClassifier(dialect=self.dialect)
+        self.sql_row_scanner = SQLRowScanner(dialect=self.dialect)
+
+    def locate_rows(self, statement):
+        """
+        Return the (table, header, columns, start) of an INSERT ... VALUES that
+        can be cut up, where header is the text up to and including VALUES
+        after any comments, columns the names in its column list, or None if
+        it has none, and start the offset its rows start at. Return None for
+        any other statement, and for an INSERT with anything but whitespace
+        after its rows.
+        """
+        info, span = self.sql_classifier.locate(statement)
+        if info.kind != "insert" or span is None:
+            return None
+        match = VALUES_CLAUSE.match(statement, span[1])
+        if match is None or TRAILING_CLAUSE.search(statement, max(match.end(), len(statement) - TAIL_LENGTH)):
+            return None
+
+        # A comment or anything else after the rows can't be split between
+        # chunks, so the statement is copied whole
+        end = None
+        try:
+            for _, end in self.sql_row_scanner.iter_rows(statement, match.end()):
+                pass
+        except ValueError:
+            return None
+        if end is None or statement[end:].strip():
+            return None
+
+        column_list = match.group().strip()[:-len(match.group("values"))].strip()
+        columns = None
+        if column_list:
+            columns = [self.sql_classifier.qualified_name(column)[-1] for column in column_list[1:-1].split(",")]
+
+        header = statement[self.sql_classifier._skip_comments(statement):match.end()]
+        return info.table, header, columns, match.end()
+
+    def iter_rows(self, statement, start):
+        """
+        Yield the (start, end) offsets of the rows of a statement, which start
+        at start. Raises ValueError if anything but rows follows VALUES.
+        """
+        end = None
+        for row in self.sql_row_scanner.iter_rows(statement, start):
+            end = row[1]
+            yield row
+
+        if end is None:
+            raise ValueError(f"no rows after VALUES: {statement[:start + 40]}")
+        if statement[end:].strip():
+            raise ValueError(f"unexpected text after the rows of an INSERT: {statement[end:end + 40]}")
+
+    def iter_chunks(self, statement, start, rows):
+        """
+        Yield the rows of a statement in lists of at most rows (start, end)
+        offsets.
+        """
+        chunk = []
+        for row in self.iter_rows(statement, start):
+            chunk.append(row)
+            if len(chunk) == rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def iter_reshard(self, sql_content):
+        """
+        Yield the statements of sql_content, with every INSERT ... VALUES cut
+        into INSERTs of at most rows rows.
+        """
+        for statement in self.sql_parser.map_statements(sql_content, same_statement):
+            located = self.locate_rows(statement)
+            if located is None:
+                yield statement
+                continue
+
+            _, header, _, start = located
+            for number, chunk in enumerate(self.iter_chunks(statement, start, self.rows)):
+                # Comments before the INSERT stay before its first chunk
+                prefix = statement[:start - len(header)] if number == 0 else ""
+                yield prefix + header + " " + ",".join(statement[row_start:row_end] for row_start, row_end in chunk)
+
+    def iter_format(self, sql_content):
+        for statement in self.iter_reshard(sql_content):
+            yield self.sql_classifier.terminate(statement)
+
+    def format(self, sql_content):
+        return "\n".join(self.iter_format(sql_content))
+
+    def table_columns(self, statement):
+        """
+        Return the column names of a CREATE TABLE statement, or None.
+        """
+        for sql_statement in self.sql_parser.parse_statement(statement):
+            if isinstance(sql_statement, exp.Create) and isinstance(sql_statement.this, exp.Schema):
+                return [column.name for column in sql_statement.this.expressions
+                        if isinstance(column, exp.ColumnDef)]
+        return None
+
+    def file_name(self, table):
+        """
+        Return the start of the names of a table's shard files: the table
+        name with anything that would take them out of output_directory,
+        such as a / in a quoted name, replaced.
+        """
+        return SEPARATOR_PATTERN.sub("_", table)
+
+    def reshard(self, sql_content, output_directory=None):
+        """
+        Write the rows of sql_content to shard files and every other statement
+        to schema.sql. If output_directory is given, the files are written
+        there instead.
+        """
+        if output_directory is not None:
+            self.output_directory = output_directory
+        os.makedirs(self.output_directory, exist_ok=True)
+
+        suffix = ".sql" + SUFFIXES.get(self.compression, "")
+        schema_file = os.path.join(self.output_directory, SCHEMA_NAME + suffix)
+
+        # SET statements seen so far, copied to the start of each shard file
+        preamble = []
+
+        # Columns of each table, from its CREATE TABLE, and the position of
+        # the shard_by column in the rows of each INSERT header
+        columns_of_table = {}
+        shard_columns = {}
+
+        # Rows waiting to be written, for each header and shard
+        buffers = {}
+        row_counters = {}
+        sharded_tables = set()
+
+        with FileHandlePool(max_open=self.max_open_files, compression=self.compression) as output_files:
+            def shard_file(table, shard):
+                path = os.path.join(self.output_directory, f"{self.file_name(table)}.{shard + 1:03}{suffix}")
+                if path not in output_files.opened:
+                    log(f">> writing to {path}")
+                    output_files.write(path, "".join(self.sql_classifier.terminate(statement) + "\n" for statement in preamble))
+                return path
+
+            def flush(key):
+                table, header, shard = key
+                rows = buffers.pop(key)
+                output_files.write(shard_file(table, shard), header + " " + ",".join(rows) + ";\n")
+
+            log(f">> writing to {schema_file}")
+            output_files.write(schema_file, "")
+
+            for statement in self.sql_parser.map_statements(sql_content, same_statement):
+                located = self.locate_rows(statement)
+                if located is None:
+                    match = EXECUTABLE_COMMENT.match(statement, self.sql_classifier._skip_comments(statement))
+                    info = self.sql_classifier.classify(match.group(1) if match else statement)
+                    if info.kind == "set":
+                        preamble.append(statement)
+                    elif info.kind == "create_table" and self.shard_by:
+                        columns_of_table[info.table] = self.table_columns(statement)
+                    elif info.kind in DATA_KINDS and info.table in sharded_tables:
+                        log(f"{info.kind} of {info.table} after its rows is written to {SCHEMA_NAME}{suffix}, "
+                            f"which is loaded before them", logging.WARNING)
+
+                    output_files.write(schema_file, self.sql_classifier.terminate(statement) + "\n")
+                    continue
+
+                table, header, columns, start = located
+                sharded_tables.add(table)
+
+                position = None
+                if self.shard_by:
+                    position = shard_columns.get((table, header))
+                    if (table, header) not in shard_columns:
+                        names = [name.lower() for name in columns or columns_of_table.get(table) or []]
+                        position = names.index(self.shard_by.lower()) if self.shard_by.lower() in names else None
+                        shard_columns[(table, header)] = position
+                        if position is None:
+                            log(f"{table} has no column {self.shard_by}; its rows are spread round-robin",
+                                logging.WARNING)
+
+                for row_start, row_end in self.iter_rows(statement, start):
+                    value = None
+                    if position is not None:
+                        values = self.sql_row_scanner.values(statement, row_start, row_end)
+                        if position < len(values):
+                            value = values[position]
+                        else:
+                            # A row with fewer values than the columns, which
+                            # the database would reject anyway
+                            log(f"row {statement[row_start:row_end][:40]} of {table} has no {self.shard_by} value; "
+                                f"it is spread round-robin", logging.WARNING, repeat_key="short row")
+
+                    if value is not None:
+                        shard = zlib.crc32(value.encode("utf-8")) % self.shards
+                    else:
+                        shard = row_counters.get(table, 0) % self.shards
+                        row_counters[table] = shard + 1
+
+                    key = (table, header, shard)
+                    buffers.setdefault(key, []).append(statement[row_start:row_end])
+                    if len(buffers[key]) == self.rows:
+                        flush(key)
+
+            for key in list(buffers):
+                flush(key)
@@ -0,0 +1,114 @@
+import re
+
+from sqlglot import Dialect
+
+WHITESPACE_PATTERN = re.compile(r"\s*")
+
+
+class SQLRowScanner:
+    """
+    Finds the rows of the VALUES list of an INSERT, and the values in a row,
+    in the statement's text without tokenizing it, so that an INSERT of
+    millions of rows can be cut up a row at a time instead of being parsed
+    into an expression per value.
+
+    Like SQLBoundaryScanner, it jumps between the characters that matter -
+    parentheses, commas, quotes and comment markers - with regular
+    expressions, taking the quoting and comment rules of the dialect's
+    tokenizer. Raises ValueError if a row is cut short.
+    """
+
+    def __init__(self, dialect=''):
+        tokenizer_class = Dialect.get_or_raise(dialect).tokenizer_class
+
+        # opening quote -> pattern matching the rest of the quoted text
+        self.quote_ends = {}
+        quotes = [(start, end, tokenizer_class._IDENTIFIER_ESCAPES)
+                  for start, end in tokenizer_class._IDENTIFIERS.items()]
+        quotes += [(start, end, tokenizer_class._STRING_ESCAPES) for start, end in tokenizer_class._QUOTES.items()]
+        for start, end, escapes in quotes:
+            if "\\" in escapes and len(end) == 1:
+                other = f"[^{re.escape(end)}\\\\]*"
+                self.quote_ends[start] = re.compile(f"{other}(?:\\\\.{other})*{re.escape(end)}", re.DOTALL)
+            else:
+                self.quote_ends[start] = re.compile(f".*?{re.escape(end)}", re.DOTALL)
+
+        # opening token -> closing token (a newline for line comments)
+        self.comments = {start: end or "\n" for start, end in tokenizer_class._COMMENTS.items()}
+
+        markers = sorted([*self.quote_ends, *self.comments], key=len, reverse=True)
+        self.significant = re.compile("|".join(["[(),]", *(re.escape(marker) for marker in markers)]))
+        self.comment_start = re.compile("|".join(re.escape(marker) for marker in sorted(self.comments, key=len,
+                                                                                             reverse=True)))
+
+    def skip_space(self, text, pos):
+        """
+        Return the offset of the first character at or after pos that isn't
+        whitespace or part of a comment.
+        """
+        while True:
+            pos = WHITESPACE_PATTERN.match(text, pos).end()
+            match = self.comment_start.match(text, pos)
+            if match is None:
+                return pos
+            close = text.find(self.comments[match.group()], match.end())
+            pos = len(text) if close == -1 else close + len(self.comments[match.group()])
+
+    def row_end(self, text, start, commas=None):
+        """
+        Return the offset just past the row opening at start, adding the
+        offsets of the commas between its values to commas if given.
+        """
+        depth = 0
+        pos = start
+        while True:
+            match = self.significant.search(text, pos)
+            if match is None:
+                raise ValueError(f"row at offset {start} isn't closed")
+
+            token = match.group()
+            pos = match.end()
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+                if depth == 0:
+                    return pos
+            elif token == ",":
+                if depth == 1 and commas is not None:
+                    commas.append(match.start())
+            elif token in self.quote_ends:
+                close = self.quote_ends[token].match(text, pos)
+                if close is None:
+                    raise ValueError(f"quoted text at offset {match.start()} isn't closed")
+                pos = close.end()
+            else:
+                close = text.find(self.comments[token], pos)
+                pos = len(text) if close == -1 else close + len(self.comments[token])
+
+    def iter_rows(self, text, pos=0):
+        """
+        Yield the (start, end) offsets of each row of the VALUES list starting
+        at pos, stopping at the first thing that isn't a row, such as an ON
+        DUPLICATE KEY UPDATE clause.
+        """
+        while True:
+            pos = self.skip_space(text, pos)
+            if not text.startswith("(", pos):
+                return
+            end = self.row_end(text, pos)
+            yield pos, end
+
+            pos = self.skip_space(text, end)
+            if not text.startswith(",", pos):
+                return
+            pos += 1
+
+    def values(self, text, start, end):
+        """
+        Return the text of each value of the row from start to end.
+        """
+        commas = []
+        self.row_end(text, start, commas)
+        bounds = [start, *commas, end - 1]
+        return [text[bounds[i] + 1:bounds[i + 1]].strip() for i in range(len(bounds) - 1)]
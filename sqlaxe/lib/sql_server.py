@@ -0,0 +1,339 @@
+import json
+import os
+import re
+import socket
+import socketserver
+import stat
+import threading
+from collections import OrderedDict
+
+from .defaults import default_socket_path
+
+# Requests a server answers, and the options each one takes besides "sql".
+# Options left out of a request take these defaults.
+METHOD_OPTIONS = {
+    "pp": {"dialect": "mysql", "output_dialect": None},
+    "grep": {
+        "dialect": "mysql", "output_dialect": None, "pattern": "", "invert": False, "regex": False,
+        "table": None, "kind": None, "column": None, "prefilter": True,
+    },
+    "transpile": {"dialect": "mysql", "output_dialect": None, "pretty": False},
+}
+
+# Text the client writes between the statements of each method's result,
+# matching the command line
+METHOD_SEPARATORS = {"pp": "\n\n", "grep": "\n", "transpile": "\n"}
+
+# Number of command objects kept warm, one per distinct set of options
+DEFAULT_MAX_COMMANDS = 64
+
+DEFAULT_SOCKET_PATH = default_socket_path()
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class RequestError(Exception):
+    """
+    A request that could not be answered, with its JSON-RPC error code.
+    """
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class SQLService:
+    """
+    Answers pp, grep and transpile requests, keeping the command objects built
+    for each dialect pair and set of options so that later requests skip
+    their set-up. Requests are handled one at a time.
+
+    A request is a JSON-RPC 2.0 object such as
+
+        {"jsonrpc": "2.0", "id": 1, "method": "pp", "params": {"sql": "select 1", "dialect": "mysql"}}
+
+    and its result is {"statements": [...]}, the statements the command
+    would print. "ping" answers with the sqlglot version, and "shutdown" asks
+    the server to stop.
+    """
+
+    def __init__(self, max_commands=DEFAULT_MAX_COMMANDS):
+        self.max_commands = max_commands
+        self.commands = OrderedDict()
+        self.lock = threading.Lock()
+        self.stopping = False
+
+    def command(self, method, options):
+        """
+        Return the command object for method and options, building it on first use.
+        """
+        key = (method,) + tuple(sorted(options.items()))
+        command = self.commands.get(key)
+        if command is not None:
+            self.commands.move_to_end(key)
+            return command
+
+        if method == "pp":
+            from .sql_pretty_printer import SQLPrettyPrinter
+
+            command = SQLPrettyPrinter(progress="none", **options)
+        elif method == "grep":
+            from .sql_grep import SQLGrep
+
+            options = dict(options, kind=options["kind"] and options["kind"].lower())
+            command = SQLGrep(progress="none", **options)
+        else:
+            from .sql_transpiler import SQLTranspiler
+
+            command = SQLTranspiler(progress="none", **options)
+
+        self.commands[key] = command
+        if len(self.commands) > self.max_commands:
+            self.commands.popitem(last=False)
+        return command
+
+    def warm(self, dialects):
+        """
+        Build the pp and transpile commands for each dialect ahead of the
+        first request, and run a statement through them.
+        """
+        for dialect in dialects:
+            for method in ("pp", "transpile"):
+                self.call(method, {"sql": "SELECT 1", "dialect": dialect})
+
+    def call(self, method, params):
+        """
+        Run one request and return its result.
+
+        :param method: "pp", "grep", "transpile", "ping" or "shutdown".
+        :param params: Dict of the SQL text and the method's options.
+        """
+        if method == "ping":
+            from sqlglot import __version__ as sqlglot_version
+
+            return {"sqlglot": sqlglot_version}
+        if method == "shutdown":
+            self.stopping = True
+            return None
+        if method not in METHOD_OPTIONS:
+            raise RequestError(METHOD_NOT_FOUND, f"unknown method: {method}")
+
+        if not isinstance(params, dict) or not isinstance(params.get("sql"), str):
+            raise RequestError(INVALID_PARAMS, "params must be an object with the SQL text in \"sql\"")
+        unknown = set(params) - set(METHOD_OPTIONS[method]) - {"sql"}
+        if unknown:
+            raise RequestError(INVALID_PARAMS, f"unknown {method} options: {', '.join(sorted(unknown))}")
+
+        options = dict(METHOD_OPTIONS[method])
+        options.update((name, value) for name, value in params.items() if name != "sql")
+
+        with self.lock:
+            try:
+                command = self.command(method, options)
+                if method == "pp":
+                    statements = list(command.iter_pretty_print_statements(params["sql"]))
+                elif method == "grep":
+                    statements = list(command.iter_matches(params["sql"]))
+                else:
+                    statements = command.transpile(params["sql"])
+            except (ValueError, TypeError, re.error) as e:
+                raise RequestError(INVALID_PARAMS, str(e))
+
+        return {"statements": statements}
+
+    def handle(self, request):
+        """
+        Answer a decoded JSON-RPC request, returning the response object, or
+        None for a notification (a request without an id).
+        """
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return error_response(None, INVALID_REQUEST, "not a JSON-RPC request")
+
+        request_id = request.get("id")
+        try:
+            result = self.call(request["method"], request.get("params", {}))
+        except RequestError as e:
+            response = error_response(request_id, e.code, str(e))
+        except Exception as e:
+            response = error_response(request_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        else:
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+        return response if "id" in request else None
+
+    def handle_line(self, line):
+        """
+        Answer one line of JSON, returning the response as a line of JSON
+        without the newline, or None if there is nothing to send back.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return json.dumps(error_response(None, PARSE_ERROR, f"invalid JSON: {e}"))
+
+        response = self.handle(request)
+        return json.dumps(response) if response is not None else None
+
+
+def error_response(request_id, code, message):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def serve_stream(service, reader, writer):
+    """
+    Answer requests read one per line from reader, writing a response line
+    for each to writer, until reader ends or a shutdown request.
+    """
+    for line in reader:
+        if not line.strip():
+            continue
+        response = service.handle_line(line)
+        if response is not None:
+            writer.write(response + "\n")
+            writer.flush()
+        if service.stopping:
+            return
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        reader = (line.decode("utf-8") for line in self.rfile)
+        writer = _SocketWriter(self.wfile)
+        serve_stream(self.server.service, reader, writer)
+        if self.server.service.stopping:
+            threading.Thread(target=self.server.shutdown).start()
+
+
+class _SocketWriter:
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        self.wfile.write(text.encode("utf-8"))
+
+    def flush(self):
+        self.wfile.flush()
+
+
+class SQLSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves an SQLService on a Unix domain socket; each connection can send
+    any number of requests, one JSON object per line.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, service):
+        self.service = service
+        remove_stale_socket(path)
+        super().__init__(path, _ConnectionHandler)
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def remove_stale_socket(path):
+    """
+    Remove a socket file left behind by a server that is no longer running.
+    Raises OSError if a server is still listening on it, or if path is not a
+    socket, so that a file given as the socket by mistake is never removed.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f"{path} exists and is not a socket")
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(path)
+    else:
+        raise OSError(f"a server is already listening on {path}")
+    finally:
+        probe.close()
+
+
+class SQLClient:
+    """
+    Sends requests to a server listening on socket_path. When no server is
+    running, requests are answered in this process instead, which costs the
+    set-up the server would have saved but gives the same results.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, timeout=None, fallback=True):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.fallback = fallback
+        self.connection = None
+        self.service = None
+        self.request_id = 0
+
+    def connect(self):
+        """
+        Connect to the server, returning False if none is running.
+        """
+        if self.connection is not None:
+            return True
+
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(self.timeout)
+        try:
+            connection.connect(self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            connection.close()
+            return False
+
+        self.connection = connection
+        self.stream = connection.makefile("rwb")
+        return True
+
+    def call(self, method, **params):
+        """
+        Run a request and return its result; raises RequestError if it failed.
+        """
+        if not self.connect():
+            if not self.fallback:
+                raise ConnectionRefusedError(f"no server is listening on {self.socket_path}")
+            if self.service is None:
+                self.service = SQLService()
+            return self.service.call(method, params)
+
+        self.request_id += 1
+        request = {"jsonrpc": "2.0", "id": self.request_id, "method": method, "params": params}
+        self.stream.write(json.dumps(request).encode("utf-8") + b"\n")
+        self.stream.flush()
+
+        line = self.stream.readline()
+        if not line:
+            self.close()
+            raise ConnectionResetError(f"the server on {self.socket_path} closed the connection")
+
+        response = json.loads(line)
+        if "error" in response:
+            raise RequestError(response["error"]["code"], response["error"]["message"])
+        return response["result"]
+
+    def close(self):
+        if self.connection is not None:
+            self.stream.close()
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
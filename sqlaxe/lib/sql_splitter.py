@@ -1,10 +1,14 @@
 import os
-import argparse
 import sqlglot
 
 from sqlglot import parse, Dialect
 from sqlglot.expressions import Table
-from tqdm import tqdm
+from .compression import SUFFIXES
+from .file_handle_pool import DEFAULT_MAX_OPEN_FILES, FileHandlePool
+from .profiler import profile_stage
+from .sql_classifier import SQLClassifier
+from .sql_parser import SQLParser
+from .sql_template_cache import SQLTemplateCache
 
 
 class SQLSplitter:
@@ -16,85 +20,184 @@ class SQLSplitter:
 
         self.pretty = kwargs["pretty"]
 
+        self.jobs = kwargs.get("jobs", 1)
+
+        # Write every statement for a table to a single file instead of
+        # starting a new section each time the table changes
+        self.group_by_table = kwargs.get("group_by_table", False)
+        self.max_open_files = kwargs.get("max_open_files", DEFAULT_MAX_OPEN_FILES)
+
+        # Compress the section files with "gzip", "xz" or "bz2"
+        self.compression = kwargs.get("compression")
+
+        # Write the sections into this tar archive instead of a directory
+        self.archive = kwargs.get("archive")
+
+        # Describe the section files in a manifest.json, for parallel loading
+        self.manifest = kwargs.get("manifest", False)
+
         self.section_counter = 0
 
-    def split(self, sql_content):
-        # Get the input dialect object from sqlglot
-        input_dialect_obj = Dialect.get_or_raise(self.dialect)
+        # Create a streaming parser for the input dialect
+        self.sql_parser = SQLParser(
+            dialect=self.dialect,
+            error_level=sqlglot.errors.ErrorLevel.IGNORE,
+            jobs=self.jobs,
+            cache=kwargs.get("cache"),
+            progress=kwargs.get("progress"),
+        )
+        self.sql_classifier = SQLClassifier(dialect=self.dialect)
+
+        # INSERTs rewritten in another dialect that differ only in the values
+        # of their rows are generated from a template
+        self.template_cache = None
+        if not self.pretty and self.output_dialect != self.dialect and kwargs.get("templates", True):
+            self.template_cache = SQLTemplateCache(self.sql_parser, self.output_dialect)
+
+    def split_statement(self, statement):
+        """
+        Parse and generate one statement, returning a (kind, sql) pair for each
+        expression in it. This is the part of a split that runs in the worker
+        processes; the section numbering happens in split().
+
+        When the statement does not need to be rewritten, its original text is
+        passed through and it is only parsed if its table can't be read from
+        its leading tokens.
+        """
+        if not self.pretty and self.output_dialect == self.dialect:
+            return [(self.route_statement(statement), statement)]
+
+        if self.template_cache is not None:
+            return self.template_cache.generate(statement, describe=self.expression_kind)
 
-        # Tokenize the SQL content using the input dialect
-        tokens = input_dialect_obj.tokenize(sql_content)
+        write = Dialect.get_or_raise(self.output_dialect)
+
+        output = []
+        for sql_statement in self.sql_parser.parse_statement(statement):
+            kind = self.expression_kind(sql_statement)
+
+            with profile_stage("generate"):
+                if self.output_dialect != self.dialect:
+                    sql = write.generate(sql_statement, copy=False, pretty=self.pretty)
+                else:
+                    sql = sql_statement.sql(pretty=self.pretty)
+
+            output.append((kind, sql))
+
+        return output
+
+    def expression_kind(self, sql_statement):
+        """
+        Return the table name of an expression, or 'general' if no table is
+        found.
+        """
+        table_name = sql_statement.find(Table)
+        return table_name.name if table_name else "general"
+
+    def route_statement(self, statement):
+        """
+        Return the kind (table name or 'general') a statement is filed under.
+        """
+        info = self.sql_classifier.classify(statement)
+        if info.table is not None:
+            return info.table
+        if info.kind in ("comment", "set", "unlock"):
+            return "general"
+
+        for sql_statement in self.sql_parser.parse_statement(statement):
+            table_name = sql_statement.find(Table)
+            return table_name.name if table_name else "general"
+
+        return "general"
+
+    def open_output(self):
+        """
+        Return what the sections are written to: a pool of files in the output
+        directory, or an SQLArchiveWriter.
+        """
+        if self.archive:
+            from .sql_archive import SQLArchiveWriter
+
+            return SQLArchiveWriter(self.archive, sequential=not self.group_by_table,
+                                    max_open=self.max_open_files, compression=self.compression)
+
+        # Create the output directory if it doesn't exist
+        os.makedirs(self.output_directory, exist_ok=True)
+        return FileHandlePool(max_open=self.max_open_files, compression=self.compression)
+
+    def start_section(self, output_files, output_file, kind):
+        print(f">> writing to {output_file}")
+        if self.archive:
+            output_files.add_section(output_file, self.section_counter, None if kind == "general" else kind)
+
+    def split(self, sql_content, output_directory=None):
+        """
+        Split sql_content into section files. If output_directory is given,
+        the sections are written there instead, numbered from 1.
+        """
+        if output_directory is not None:
+            self.output_directory = output_directory
+            self.section_counter = 0
 
         last_kind = None
         last_output_file = None
         self.section_counter += 1
 
-        # Split the tokens into chunks based on semicolons
-        total = len(tokens)
-        chunks: t.List[t.List[Token]] = [[]]
+        statement_counter = 0
 
-        for i, token in enumerate(tqdm(tokens)):
-            chunks[-1].append(token)
+        # Section file of each table, when grouping by table
+        table_output_files = {}
 
-            if token.token_type == sqlglot.TokenType.SEMICOLON:
-                if i < total - 1:
-                    chunks.append([])
+        suffix = ".sql" + SUFFIXES.get(self.compression, "")
 
-        statement_counter = 0
+        # Archive members are named without a directory
+        section_directory = "" if self.archive else self.output_directory
 
-        # Create the output directory if it doesn't exist
-        os.makedirs(self.output_directory, exist_ok=True)
+        manifest = None
+        if self.manifest:
+            from .sql_manifest import MANIFEST_NAME, SQLManifestWriter
 
-        # Create a parser object for the input dialect
-        parser = input_dialect_obj.parser(error_level=sqlglot.errors.ErrorLevel.IGNORE)
+            manifest = SQLManifestWriter(dialect=self.output_dialect)
 
-        remainder = iter(tokens)
-        row = []
-        write = Dialect.get_or_raise(self.output_dialect)
-
-        # Iterate over each chunk of tokens
-        for row in tqdm(chunks):
-            # Parse the chunk into SQL statements
-            sql_statements = parser.parse(raw_tokens=row)
-
-            # Process each SQL statement
-            for sql_statement in sql_statements:
-                if sql_statement == None:
-                    continue
-
-                # Determine the table name or use 'general' if no table is found
-                table_name = sql_statement.find(Table)
-                kind = table_name.name if table_name else "general"
-
-                # Update section counter and reset statement counter when the kind changes
-                if last_kind and last_kind != kind:
-                    if statement_counter > 0:
-                        print(f"{statement_counter} statements")
-                    self.section_counter += 1
-                    statement_counter = 0
-
-                # Generate the output file path based on the section counter and kind
-                output_file = os.path.join(
-                    self.output_directory, f"{self.section_counter:04}_{kind}.sql"
-                )
-                output_file_has_changed = last_output_file != output_file
-
-                # Write the SQL statement to the output file
-                with open(output_file, "a") as file:
-                    if output_file_has_changed:
-                        print(f">> writing to {output_file}")
-                        file.truncate(0)
-
-                    if self.output_dialect != self.dialect:
-                        file.write(
-                            write.generate(
-                                sql_statement, copy=False, pretty=self.pretty
+        with self.open_output() as output_files:
+            # Iterate over each generated statement, in input order
+            for statements in self.sql_parser.map_statements(sql_content, self.split_statement):
+                for kind, sql in statements:
+                    if self.group_by_table:
+                        output_file = table_output_files.get(kind)
+                        if output_file is None:
+                            if table_output_files:
+                                self.section_counter += 1
+                            output_file = os.path.join(
+                                section_directory, f"{self.section_counter:04}_{kind}{suffix}"
                             )
-                            + ";\n"
-                        )
+                            table_output_files[kind] = output_file
+                            self.start_section(output_files, output_file, kind)
                     else:
-                        file.write(sql_statement.sql(pretty=self.pretty) + ";\n")
-
-                last_output_file = output_file
-                last_kind = kind
-                statement_counter += 1
+                        # Update section counter and reset statement counter when the kind changes
+                        if last_kind and last_kind != kind:
+                            if statement_counter > 0:
+                                print(f"{statement_counter} statements")
+                            self.section_counter += 1
+                            statement_counter = 0
+
+                        # Generate the output file path based on the section counter and kind
+                        output_file = os.path.join(
+                            section_directory, f"{self.section_counter:04}_{kind}{suffix}"
+                        )
+                        if last_output_file != output_file:
+                            self.start_section(output_files, output_file, kind)
+
+                    # Write the SQL statement to the output file
+                    data = self.sql_classifier.terminate(sql) + "\n"
+                    with profile_stage("write", len(data)):
+                        output_files.write(output_file, data)
+                    if manifest is not None:
+                        manifest.add(os.path.basename(output_file), kind, sql)
+
+                    last_output_file = output_file
+                    last_kind = kind
+                    statement_counter += 1
+
+        if manifest is not None:
+            manifest.write(os.path.join(self.output_directory, MANIFEST_NAME))
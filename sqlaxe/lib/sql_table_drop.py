@@ -1,27 +1,45 @@
-import argparse
 import sqlglot
 from sqlglot import Dialect
+from .profiler import profile_stage
+from .sql_classifier import SQLClassifier
 from .sql_formatter import SQLFormatter
 from .sql_parser    import SQLParser
 
 
 class SQLTableDrop:
-    def __init__(self, dialect='', output_dialect='', **kwargs):
+    def __init__(self, dialect='', output_dialect='', passthrough=False, **kwargs):
 
         self.dialect = dialect
         self.output_dialect = output_dialect or self.dialect
 
-        self.sql_parser    = SQLParser(**kwargs)
+        # Copy statements from the input instead of regenerating them, when
+        # the output dialect is the input dialect
+        self.passthrough = passthrough
+        self.sql_classifier = SQLClassifier(dialect=dialect)
+
+        # Passing through only parses CREATE TABLEs it can't read the name
+        # of, so there's nothing to gain from the parse cache
+        if passthrough and self.output_dialect == self.dialect:
+            kwargs["cache"] = None
+
+        self.sql_parser    = SQLParser(dialect=dialect, **kwargs)
         self.sql_formatter = SQLFormatter(pretty_print=True, **kwargs)
 
     def drop_table(self, sql_content):
+        return list(self.iter_drop_table(sql_content))
 
-        write = Dialect.get_or_raise(self.output_dialect)
+    def iter_drop_table(self, sql_content):
+        for statements in self.sql_parser.map_statements(sql_content, self.drop_table_statement):
+            yield from statements
 
-        drop_table_tables_statements = []
+    def drop_table_statement(self, statement):
+        if self.passthrough and self.output_dialect == self.dialect:
+            return self.pass_statement(statement)
 
-        expressions = self.sql_parser.parse(sql_content)
-        for sql_statement in expressions:
+        write = Dialect.get_or_raise(self.output_dialect)
+
+        output = []
+        for sql_statement in self.sql_parser.parse_statement(statement):
             if sql_statement is None:
                 continue
             if sql_statement == "":
@@ -33,23 +51,54 @@ class SQLTableDrop:
             ):
                 table_name = sql_statement.this.this
                 drop_table_statement = f"DROP TABLE IF EXISTS {table_name} CASCADE"
-                drop_table_tables_statements.append(drop_table_statement)
+                output.append(drop_table_statement)
 
-            if self.output_dialect != self.dialect:
-                sql_statement = write.generate(
-                    sql_statement, copy=False, pretty=False, identify=False
-                )
-            else:
-                sql_statement = sql_statement.sql(pretty=False, identify=False)
+            with profile_stage("generate"):
+                if self.output_dialect != self.dialect:
+                    sql_statement = write.generate(
+                        sql_statement, copy=False, pretty=False, identify=False
+                    )
+                else:
+                    sql_statement = sql_statement.sql(pretty=False, identify=False)
 
-            drop_table_tables_statements.append(sql_statement)
+            output.append(sql_statement)
 
-        return drop_table_tables_statements
+        return output
 
-    def format(self, sql_content):
-        statements = self.drop_table(sql_content)
+    def pass_statement(self, statement):
+        """
+        Like drop_table_statement(), but the statement is copied from the input
+        and only parsed when its leading tokens don't tell whether it creates a
+        table. The DROP names the table as the CREATE does.
+        """
+        info, span = self.sql_classifier.locate(statement)
 
-        if len(statements) == 0:
-            return ""
-        else:
-            return ";\n".join(statements) + ";"
+        output = []
+        if info.kind == "create_table" and span is not None:
+            output.append(f"DROP TABLE IF EXISTS {statement[span[0]:span[1]]} CASCADE")
+        elif info.kind == "create":
+            for sql_statement in self.sql_parser.parse_statement(statement):
+                if isinstance(sql_statement, sqlglot.expressions.Create) and sql_statement.kind == "TABLE":
+                    table_name = sql_statement.find(sqlglot.expressions.Table)
+                    output.append(f"DROP TABLE IF EXISTS {table_name.sql(dialect=self.dialect)} CASCADE")
+
+        output.append(statement)
+        return output
+
+    def transform_expression(self, sql_statement):
+        """
+        SQLPipeline stage: return sql_statement, preceded by a DROP TABLE IF
+        EXISTS if it creates a table.
+        """
+        if isinstance(sql_statement, sqlglot.expressions.Create) and sql_statement.kind == "TABLE":
+            table_name = sql_statement.find(sqlglot.expressions.Table)
+            drop = sqlglot.expressions.Drop(this=table_name.copy(), kind="TABLE", exists=True, cascade=True)
+            return [drop, sql_statement]
+        return [sql_statement]
+
+    def iter_format(self, sql_content):
+        for statement in self.iter_drop_table(sql_content):
+            yield self.sql_classifier.terminate(statement)
+
+    def format(self, sql_content):
+        return "\n".join(self.iter_format(sql_content))
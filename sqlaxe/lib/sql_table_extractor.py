@@ -0,0 +1,124 @@
+import re
+
+import sqlglot
+from sqlglot import exp
+
+from .sql_classifier import SQLClassifier, kind_matches
+from .sql_parser import SQLParser
+
+# Which statements of the chosen tables are kept: all of them, only the
+# schema (CREATE, ALTER and DROP) or only the data (everything else)
+EXTRACT_PARTS = ["all", "ddl", "data"]
+DDL_KINDS = ["create", "alter", "drop"]
+
+# Statements that belong to no table, kept unless general is off
+GENERAL_KINDS = ["comment", "set", "unlock"]
+
+# A statement that is a MySQL executable comment, such as
+# /*!40000 ALTER TABLE `users` DISABLE KEYS */, is routed by the SQL inside it
+EXECUTABLE_COMMENT = re.compile(r"/\*!\d*\s*(.*?)\s*\*/\s*$", re.DOTALL)
+
+# ALTER TABLE ... DISABLE KEYS and ENABLE KEYS wrap the rows of a table, so
+# they go with its data rather than its schema
+KEYS_TOGGLE = re.compile(r"\b(?:DISABLE|ENABLE)\s+KEYS$", re.IGNORECASE)
+
+
+class SQLTableExtractor:
+    """
+    Copies the statements of some tables out of a SQL file, as they appear in
+    the input.
+
+    A statement's table is read from its leading tokens, so the body of a
+    statement for another table is never parsed; only statements whose table
+    can't be told that way are. The parsed statement cache isn't used, since
+    filling it would mean parsing everything. Statements that belong to no table, such as
+    SET, are kept as well unless general is off, and an UNLOCK TABLES is kept
+    when the LOCK TABLES before it was.
+    """
+
+    def __init__(self, tables=(), include=(), exclude=(), part="all", general=True, **kwargs):
+        self.dialect = kwargs["dialect"]
+        self.jobs = kwargs.get("jobs", 1)
+
+        # Tables are chosen by name, ignoring case, or by regular expression;
+        # with neither, every table not excluded is chosen
+        self.tables = {table.lower() for table in tables}
+        self.include = [re.compile(pattern) for pattern in include]
+        self.exclude = [re.compile(pattern) for pattern in exclude]
+        self.part = part
+        self.general = general
+
+        self.sql_parser = SQLParser(
+            dialect=self.dialect,
+            error_level=sqlglot.errors.ErrorLevel.IGNORE,
+            jobs=self.jobs,
+            progress=kwargs.get("progress"),
+        )
+        self.sql_parser.index_filter = self.index_matches
+        self.sql_classifier = SQLClassifier(dialect=self.dialect)
+
+    def table_selected(self, table):
+        if any(pattern.search(table) for pattern in self.exclude):
+            return False
+        if not self.tables and not self.include:
+            return True
+        return table.lower() in self.tables or any(pattern.search(table) for pattern in self.include)
+
+    def part_selected(self, kind):
+        is_ddl = any(kind_matches(kind, name) for name in DDL_KINDS)
+        return self.part == "all" or (self.part == "ddl") == is_ddl
+
+    def index_matches(self, entry):
+        """
+        Return False if the statement of an IndexEntry is for tables that
+        aren't chosen.
+        """
+        return not entry.tables or any(self.table_selected(table) for table in entry.tables)
+
+    def route_statement(self, statement):
+        """
+        Return the (kind, table, statement) of a statement, where table is
+        None for a statement that belongs to no table.
+        """
+        match = EXECUTABLE_COMMENT.match(statement, self.sql_classifier._skip_comments(statement))
+        text = match.group(1) if match else statement
+        info = self.sql_classifier.classify(text)
+        if info.kind == "alter_table" and KEYS_TOGGLE.search(text):
+            return "keys", info.table, statement
+        if info.table is not None or info.kind in GENERAL_KINDS:
+            return info.kind, info.table, statement
+
+        for sql_statement in self.sql_parser.parse_statement(text):
+            if isinstance(sql_statement, exp.Semicolon):
+                continue
+            table = sql_statement.find(exp.Table)
+            kind = sql_statement.key if info.kind == "other" else info.kind
+            return kind, table.name if table else None, statement
+
+        return info.kind, None, statement
+
+    def iter_extract(self, sql_content):
+        locked = False
+        for kind, table, statement in self.sql_parser.map_statements(sql_content, self.route_statement):
+            if table is None:
+                if kind == "unlock":
+                    keep, locked = locked, False
+                else:
+                    keep = self.general
+            else:
+                keep = self.table_selected(table) and self.part_selected(kind)
+                if kind == "lock":
+                    locked = keep
+
+            if keep:
+                yield statement
+
+    def extract(self, sql_content):
+        return list(self.iter_extract(sql_content))
+
+    def iter_format(self, sql_content):
+        for statement in self.iter_extract(sql_content):
+            yield self.sql_classifier.terminate(statement)
+
+    def format(self, sql_content):
+        return "\n".join(self.iter_format(sql_content))
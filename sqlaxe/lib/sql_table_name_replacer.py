@@ -1,15 +1,15 @@
 import os
-import argparse
 import sqlglot
 import re
+from .profiler import profile_stage
+from .sql_classifier import SQLClassifier
 from .sql_formatter import SQLFormatter
 from .sql_parser    import SQLParser
+from .table_name_mapping import TableNameMapping
 
 from sqlglot import parse, Dialect
 from sqlglot import expressions as exp
 from sqlglot.expressions import Table
-from sqlglot.optimizer.scope import traverse_scope
-from tqdm import tqdm
 from .logger import log
 
 
@@ -19,55 +19,101 @@ class SQLTableNameReplacer:
 
         self.output_dialect = kwargs["output_dialect"] or self.dialect
         self.pretty = kwargs["pretty"]
-        self.table_name_regex = kwargs["table_name_regex"]
-        self.table_name_replacement = kwargs["table_name_replacement"]
+        self.table_name_regex = kwargs.get("table_name_regex")
+        self.table_name_replacement = kwargs.get("table_name_replacement")
+        self.jobs = kwargs.get("jobs", 1)
+
+        # Names from a mapping file come first, then the regex, if any
+        mapping = kwargs.get("table_name_mapping") or TableNameMapping()
+        rules = list(mapping.rules)
+        if self.table_name_regex is not None:
+            rules.append((self.table_name_regex, self.table_name_replacement or ""))
+        self.table_name_mapping = TableNameMapping(names=mapping.names, rules=rules)
+
+        # Only statements that may name a renamed table are parsed when the
+        # rest are copied, so the parse cache is left out then
+        passthrough = not self.pretty and self.output_dialect == self.dialect
+
+        self.sql_parser = SQLParser(
+            dialect=self.dialect,
+            error_level=sqlglot.errors.ErrorLevel.IGNORE,
+            jobs=self.jobs,
+            cache=None if passthrough else kwargs.get("cache"),
+            progress=kwargs.get("progress"),
+        )
+        self.sql_classifier = SQLClassifier(dialect=self.dialect)
 
     def replace(self, sql_content):
-        input_dialect_obj = Dialect.get_or_raise(self.dialect)
+        return "\n".join(self.iter_replace(sql_content))
+
+    def iter_replace(self, sql_content):
+        for statements in self.sql_parser.map_statements(sql_content, self.replace_statement):
+            yield from statements
+
+    def rename_tables(self, sql_statement):
+        """
+        Rename the tables of sql_statement in place, returning True if any
+        name changed.
+        """
+        changed = False
+        for node in sql_statement.walk():
+            if isinstance(node, exp.Table):
+                old_table_name = node.name
+                new_table_name = self.table_name_mapping.rename(old_table_name)
+
+                if new_table_name != old_table_name:
+                    table = exp.to_table(new_table_name)
+                    table.set("alias", node.args.get("alias"))
+                    node.replace(table)
+                    changed = True
 
-        tokens = input_dialect_obj.tokenize(sql_content)
+            if isinstance(node, exp.Column) and node.table:
+                old_table_name = node.table
+                new_table_name = self.table_name_mapping.rename(old_table_name)
 
-        parser = input_dialect_obj.parser(error_level=sqlglot.errors.ErrorLevel.IGNORE)
+                if new_table_name != old_table_name:
+                    node.set("table", exp.to_identifier(new_table_name))
+                    changed = True
+
+        return changed
+
+    def transform_expression(self, sql_statement):
+        """
+        SQLPipeline stage: rename the tables of sql_statement in place.
+        """
+        self.rename_tables(sql_statement)
+        return [sql_statement]
+
+    def replace_statement(self, statement):
+        # Statements without a renamed table are passed through as they are,
+        # unless they have to be regenerated anyway
+        passthrough = not self.pretty and self.output_dialect == self.dialect
+
+        if passthrough:
+            table = self.sql_classifier.only_table(statement)
+            if table is not None and self.table_name_mapping.rename(table) == table:
+                return [self.sql_classifier.terminate(statement)]
 
         write = Dialect.get_or_raise(self.output_dialect)
 
-        sql_statements = parser.parse(raw_tokens=tokens)
+        sql_statements = [
+            sql_statement for sql_statement in self.sql_parser.parse_statement(statement)
+            if sql_statement is not None and sql_statement != ""
+        ]
+
+        changed = False
+        for sql_statement in sql_statements:
+            changed = self.rename_tables(sql_statement) or changed
+
+        if passthrough and not changed:
+            return [self.sql_classifier.terminate(statement)]
 
         output = []
-        for sql_statement in tqdm(sql_statements, leave=False):
-            if sql_statement is None:
-                continue
-            if sql_statement == "":
-                continue
-
-            for node in sql_statement.walk():
-                if isinstance(node, exp.Table):
-                    old_table_name = node.name
-                    new_table_name = re.sub(
-                        self.table_name_regex,
-                        self.table_name_replacement,
-                        old_table_name,
-                    )
-
-                    if new_table_name != old_table_name:
-                        node.replace(exp.to_table(new_table_name))
-
-                if isinstance(node, exp.Column):
-                    old_table_name = node.table
-                    new_table_name = re.sub(
-                        self.table_name_regex,
-                        self.table_name_replacement,
-                        old_table_name,
-                    )
-                    if new_table_name != old_table_name:
-                        node.set("table", exp.to_identifier(new_table_name))
-
-            if self.output_dialect != self.dialect:
-                output.append(
-                    write.generate(sql_statement, copy=False, pretty=self.pretty)
-                    + ";"
-                )
-            else:
-                output.append(sql_statement.sql(pretty=self.pretty) + ";")
-        return "\n".join(output)
+        for sql_statement in sql_statements:
+            with profile_stage("generate"):
+                if self.output_dialect != self.dialect:
+                    output.append(write.generate(sql_statement, copy=False, pretty=self.pretty) + ";")
+                else:
+                    output.append(sql_statement.sql(pretty=self.pretty) + ";")
 
+        return output
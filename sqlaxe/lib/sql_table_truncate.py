@@ -1,56 +1,152 @@
-import argparse
 import sqlglot
 from sqlglot import Dialect
+from .profiler import profile_stage
+from .sql_classifier import SQLClassifier
+from .sql_parser import SQLParser
+from .sql_pipeline import Once
 
 
 class SQLTableTruncate:
     def __init__(self, **kwargs):
         self.dialect = kwargs["dialect"]
         self.output_dialect = kwargs["output_dialect"] or self.dialect
+        self.jobs = kwargs.get("jobs", 1)
+
+        # Copy statements from the input instead of regenerating them, when
+        # the output dialect is the input dialect
+        self.passthrough = kwargs.get("passthrough", False)
+
+        # INSERTs passed through are rarely parsed; filling the parse cache
+        # would parse the whole file
+        passthrough = self.passthrough and self.output_dialect == self.dialect
+
+        self.sql_parser = SQLParser(
+            dialect=self.dialect,
+            error_level=sqlglot.errors.ErrorLevel.IGNORE,
+            jobs=self.jobs,
+            cache=None if passthrough else kwargs.get("cache"),
+            progress=kwargs.get("progress"),
+        )
+        self.sql_classifier = SQLClassifier(dialect=self.dialect)
 
     def truncate(self, sql_content):
-        input_dialect_obj = Dialect.get_or_raise(self.dialect)
-        tokens = input_dialect_obj.tokenize(sql_content)
-        parser = input_dialect_obj.parser(error_level=sqlglot.errors.ErrorLevel.IGNORE)
-        sql_statements = parser.parse(raw_tokens=tokens)
+        return list(self.iter_truncate(sql_content))
 
-        truncated_tables = []
-        truncate_tables_statements = []
+    def iter_truncate(self, sql_content):
+        truncated_tables = set()
 
-        for sql_statement in sql_statements:
+        for sql_statement in self.sql_parser.iter_parse(sql_content):
             if sql_statement is None:
                 continue
             if sql_statement == "":
                 continue
 
             if isinstance(sql_statement, sqlglot.expressions.Insert):
-                table_name = sql_statement.this.this
-                if table_name not in truncated_tables:
-                    truncate_statement = f"TRUNCATE TABLE {table_name}"
-                    parsed = input_dialect_obj.parse(truncate_statement)
-                    truncate_tables_statements.append(parsed[0])
-                    truncated_tables.append(table_name)
+                table_name = self.insert_table(sql_statement)
+                table = self.table_key(table_name)
+                if table not in truncated_tables:
+                    yield self.truncate_expression(table_name)
+                    truncated_tables.add(table)
 
-            truncate_tables_statements.append(sql_statement)
+            yield sql_statement
 
-        return truncate_tables_statements
+    def insert_table(self, sql_statement):
+        """
+        Return the Table an INSERT inserts into, with its schema and catalog.
+        """
+        table_name = sql_statement.this
+        if isinstance(table_name, sqlglot.expressions.Schema):
+            table_name = table_name.this
+        return table_name
 
-    def format(self, sql_content):
-        write = Dialect.get_or_raise(self.output_dialect)
-        statements = self.truncate(sql_content)
+    def table_key(self, table_name):
+        """
+        Return the key a Table is truncated once under: its qualified name,
+        lowercased, as pass_statement() builds it from the text.
+        """
+        return ".".join(part.name for part in table_name.parts).lower()
+
+    def truncate_expression(self, table_name):
+        table_name = table_name.copy()
+        table_name.set("alias", None)
+        return sqlglot.expressions.TruncateTable(expressions=[table_name])
 
-        out = []
-        for sql_statement in statements:
+    def generate(self, sql_statement):
+        with profile_stage("generate"):
             if self.output_dialect != self.dialect:
-                out.append(
-                    write.generate(
-                        sql_statement, copy=False, pretty=True, identify=True
-                    )
-                )
+                write = Dialect.get_or_raise(self.output_dialect)
+                return write.generate(sql_statement, copy=False, pretty=True, identify=True)
             else:
-                out.append(sql_statement.sql(pretty=True, identify=True))
+                return sql_statement.sql(pretty=True, identify=True)
+
+    def format_statement(self, statement):
+        """
+        Parse and generate one statement. Returns a (table, truncate, sql) triple
+        per expression, where table and truncate are set for INSERT statements;
+        whether the TRUNCATE is emitted is decided in input order by
+        iter_format(), so the result does not depend on how statements were
+        spread over worker processes.
+        """
+        if self.passthrough and self.output_dialect == self.dialect:
+            return self.pass_statement(statement)
+
+        output = []
+        for sql_statement in self.sql_parser.parse_statement(statement):
+            table = None
+            truncate = None
+
+            if isinstance(sql_statement, sqlglot.expressions.Insert):
+                table_name = self.insert_table(sql_statement)
+                table = self.table_key(table_name)
+                truncate = self.generate(self.truncate_expression(table_name))
+
+            output.append((table, truncate, self.generate(sql_statement)))
 
-        if len(out) == 0:
-            return ""
-        else:
-            return ";\n".join(out) + ";"
+        return output
+
+    def pass_statement(self, statement):
+        """
+        Like format_statement(), but the statement is copied from the input and
+        only parsed when its leading tokens don't name the table it inserts
+        into. The TRUNCATE names the table as the INSERT does.
+        """
+        info, span = self.sql_classifier.locate(statement)
+
+        if info.kind == "insert" and span is not None:
+            table_name = statement[span[0]:span[1]]
+            table = ".".join(self.sql_classifier.qualified_name(table_name)).lower()
+            return [(table, f"TRUNCATE TABLE {table_name}", statement)]
+
+        if info.kind == "insert":
+            for sql_statement in self.sql_parser.parse_statement(statement):
+                if isinstance(sql_statement, sqlglot.expressions.Insert):
+                    table_name = self.insert_table(sql_statement)
+                    table = self.table_key(table_name)
+                    return [(table, f"TRUNCATE TABLE {table_name.sql(dialect=self.dialect)}", statement)]
+
+        return [(None, None, statement)]
+
+    def transform_expression(self, sql_statement):
+        """
+        SQLPipeline stage: return sql_statement, preceded by a TRUNCATE TABLE
+        if it inserts into a table; the pipeline only writes the TRUNCATE
+        before the first INSERT into each table.
+        """
+        if isinstance(sql_statement, sqlglot.expressions.Insert):
+            table_name = self.insert_table(sql_statement)
+            return [Once(self.table_key(table_name), self.truncate_expression(table_name)), sql_statement]
+        return [sql_statement]
+
+    def iter_format(self, sql_content):
+        truncated_tables = set()
+
+        for statements in self.sql_parser.map_statements(sql_content, self.format_statement):
+            for table, truncate, sql in statements:
+                if table is not None and table not in truncated_tables:
+                    yield truncate + ";"
+                    truncated_tables.add(table)
+
+                yield self.sql_classifier.terminate(sql)
+
+    def format(self, sql_content):
+        return "\n".join(self.iter_format(sql_content))
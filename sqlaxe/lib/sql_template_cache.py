@@ -0,0 +1,301 @@
+import logging
+import re
+
+from sqlglot import Dialect, exp
+from sqlglot.errors import TokenError
+from sqlglot.tokens import TokenType
+
+from .logger import log
+from .profiler import profile_stage
+from .sql_classifier import SQLClassifier
+from .sql_insert_coalescer import VALUES_CLAUSE
+from .sql_row_scanner import SQLRowScanner
+
+# Templates kept before the cache is emptied, so a file of statements that
+# all have different shapes doesn't grow it without bound
+DEFAULT_MAX_TEMPLATES = 4096
+
+# Marks the slots of a template while it is generated; statements holding it
+# aren't cached
+SLOT_MARK = "\x00"
+
+# A value of a row that is a number, with or without a minus sign
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?")
+
+
+class SQLTemplateCache:
+    """
+    Generates INSERT ... VALUES statements that differ only in the literals
+    of their rows, or in how many rows they have, by filling in templates
+    instead of parsing and generating each one.
+
+    The rows of a statement are found with an SQLRowScanner. Its fingerprint
+    is its text before the first row and after the last one, and the shape
+    of each row is the text of the row with every value that is a single
+    string or number cut out; everything else, including identifiers,
+    comments, NULLs and expressions, is part of the fingerprint or shape.
+
+    The first statement with a fingerprint, and any statement with a row
+    of a new shape, is parsed and generated as usual, and parts of it are
+    generated again with their rows and values marked, which gives a
+    template for the statement around its rows and one for each shape of
+    row. The templates are only used if filling them in with the statement's
+    own rows gives exactly the generated SQL; otherwise statements with that
+    fingerprint are always generated in full.
+
+    Later statements are neither parsed nor tokenized, but for strings with
+    escapes in them, and their literals are written with the output
+    dialect's quoting and escaping. Pretty printing lays rows out by their
+    width, so it can't be templated: only use a cache when pretty is off.
+    """
+
+    def __init__(self, sql_parser, output_dialect=None, max_templates=DEFAULT_MAX_TEMPLATES):
+        self.sql_parser = sql_parser
+        self.dialect = sql_parser.dialect
+        self.output_dialect = output_dialect or self.dialect
+        self.max_templates = max_templates
+
+        self.sql_classifier = SQLClassifier(dialect=self.dialect)
+        self.sql_row_scanner = SQLRowScanner(dialect=self.dialect)
+
+        # Opening quote -> closing quote of the dialect's strings
+        tokenizer_class = Dialect.get_or_raise(self.dialect).tokenizer_class
+        self.string_quotes = {start: end for start, end in tokenizer_class._QUOTES.items()
+                              if len(start) == 1 and len(end) == 1}
+
+        # Fingerprint -> (prefix, separator, suffix, description), or None
+        # for a fingerprint whose statements can't be templated
+        self.statements = {}
+
+        # (fingerprint, shape) -> the text around the values of a row
+        self.rows = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def scan(self, statement):
+        """
+        Return the fingerprint of an INSERT ... VALUES statement and, for each
+        row, its shape and the (type, text) of its slots, where type is "s" or
+        "n" and text is the value of a string or the text of a number. Returns
+        None for any other statement.
+        """
+        if SLOT_MARK in statement:
+            return None
+        info, span = self.sql_classifier.locate(statement)
+        if info.kind not in ("insert", "replace") or span is None:
+            return None
+        match = VALUES_CLAUSE.match(statement, span[1])
+        if match is None:
+            return None
+
+        rows = []
+        first = last = None
+        try:
+            for row_start, row_end in self.sql_row_scanner.iter_rows(statement, match.end()):
+                # Anything but a comma between rows, such as a comment, would
+                # be lost from the output
+                if last is not None and statement[last:row_start].strip() != ",":
+                    return None
+                if first is None:
+                    first = row_start
+                last = row_end
+                rows.append(self.scan_row(statement, row_start, row_end))
+        except ValueError:
+            return None
+
+        if first is None:
+            return None
+        return (statement[:first], statement[last:]), rows
+
+    def scan_row(self, statement, row_start, row_end):
+        commas = []
+        self.sql_row_scanner.row_end(statement, row_start, commas)
+        bounds = [row_start, *commas, row_end - 1]
+
+        gaps = []
+        slots = []
+        position = row_start
+        for value_start, value_end in zip(bounds, bounds[1:]):
+            value = statement[value_start + 1:value_end].strip()
+            slot = self.slot(value)
+            if slot is None:
+                continue
+
+            start = statement.index(value, value_start + 1)
+            gaps.append(statement[position:start])
+            slots.append(slot)
+            position = start + len(value)
+
+        gaps.append(statement[position:row_end])
+        return (SLOT_MARK.join(gaps), "".join(slot_type for slot_type, _ in slots)), slots
+
+    def slot(self, value):
+        """
+        Return the (type, text) of the value of a row if it's a single string
+        or number, or None.
+        """
+        if NUMBER_PATTERN.fullmatch(value):
+            return "n", value
+
+        end = self.string_quotes.get(value[:1])
+        if end is None or len(value) < 2 or not value.endswith(end):
+            return None
+        inner = value[1:-1]
+        if end not in inner and value[0] not in inner and "\\" not in inner:
+            return "s", inner
+
+        # Escaped quotes and backslashes are left to the tokenizer
+        try:
+            with profile_stage("tokenize"):
+                tokens = Dialect.get_or_raise(self.dialect).tokenize(value)
+        except TokenError:
+            return None
+        if len(tokens) != 1 or tokens[0].token_type != TokenType.STRING or tokens[0].comments:
+            return None
+        return "s", tokens[0].text
+
+    def generate(self, statement, describe=None):
+        """
+        Return a (description, sql) pair for each expression of statement, as
+        parsing it and generating each expression in the output dialect would,
+        where description is describe(expression), or None.
+
+        :param statement: Text of the statement, as yielded by SQLReader.
+        :param describe: Function of an expression whose result depends only on the
+                         text of the statement around its rows.
+        """
+        scanned = self.scan(statement)
+        entry = self.statements.get(scanned[0]) if scanned is not None else None
+        if entry is not None:
+            key, rows = scanned
+            templates = [self.rows.get((key, shape)) for shape, _ in rows]
+            if None not in templates:
+                self.hits += 1
+                with profile_stage("generate"):
+                    return [(entry[3], self.fill(entry, templates, rows))]
+
+        self.misses += 1
+        expressions = [
+            expression for expression in self.sql_parser.parse_statement(statement)
+            if expression is not None and expression != ""
+        ]
+        if scanned is None or (scanned[0] in self.statements and entry is None):
+            return [(describe(expression) if describe else None, self.generate_expression(expression))
+                    for expression in expressions]
+
+        if len(self.statements) + len(self.rows) >= self.max_templates:
+            log(f"template cache full after {len(self.statements)} statement shapes; emptying it", logging.DEBUG)
+            self.statements.clear()
+            self.rows.clear()
+
+        key, rows = scanned
+        learned = self.learn(key, rows, expressions)
+        output = [(describe(expression) if describe else None, self.generate_expression(expression))
+                  for expression in expressions]
+
+        if learned is not None:
+            templates = [learned.get(shape) or self.rows.get((key, shape)) for shape, _ in rows]
+            entry = self.statements.get(key) or learned[None] + (output[0][0],)
+            if self.fill(entry, templates, rows) == output[0][1]:
+                self.statements[key] = entry
+                self.rows.update(((key, shape), template) for shape, template in learned.items() if shape)
+                return output
+
+        self.statements[key] = None
+        return output
+
+    def learn(self, key, rows, expressions):
+        """
+        Generate the templates a statement needs that aren't cached yet.
+        Returns a dict of row shape -> template, with the (prefix,
+        separator, suffix) of the statement under None, or None if the
+        statement isn't a single INSERT whose rows and slots are the ones
+        found in its text.
+        """
+        if len(expressions) != 1 or not isinstance(expressions[0], exp.Insert):
+            return None
+        insert = expressions[0]
+        values = insert.expression
+        if not isinstance(values, exp.Values) or len(values.expressions) != len(rows):
+            return None
+        tuples = values.expressions
+        if not all(isinstance(row, exp.Tuple) for row in tuples):
+            return None
+
+        # Generate the statement with one and two rows standing in for its
+        # own, and with each new shape of row as its only row, so that the
+        # rows are generated in place; its rows are put back afterwards
+        try:
+            one = self.generate_rows(insert, [self.mark(0)])
+            two = self.generate_rows(insert, [self.mark(0), self.mark(1)])
+            if len(one) != 3 or len(two) != 5 or one[1] != "0" or two[1::2] != ["0", "1"] \
+                    or (one[0], one[2]) != (two[0], two[4]):
+                return None
+            prefix, suffix = one[0], one[2]
+            learned = {None: (prefix, two[2], suffix)}
+
+            for row, (shape, slots) in zip(tuples, rows):
+                if shape in learned or (key, shape) in self.rows:
+                    continue
+
+                row = row.copy()
+                elements = []
+                for element in row.expressions:
+                    literal = element.this if isinstance(element, exp.Neg) else element
+                    if isinstance(literal, exp.Literal):
+                        elements.append((element, "s" if literal.is_string else "n"))
+                if [slot_type for _, slot_type in elements] != [slot_type for slot_type, _ in slots]:
+                    return None
+
+                for number, (element, _) in enumerate(elements):
+                    element.replace(self.mark(number))
+                parts = self.generate_rows(insert, [row])
+                if parts[1::2] != [str(number) for number in range(len(elements))] \
+                        or not parts[0].startswith(prefix) or not parts[-1].endswith(suffix):
+                    return None
+                parts[0] = parts[0][len(prefix):]
+                parts[-1] = parts[-1][:len(parts[-1]) - len(suffix)]
+                learned[shape] = parts[::2]
+        finally:
+            values.set("expressions", tuples)
+
+        return learned
+
+    def generate_rows(self, insert, rows):
+        """
+        Return the SQL of an INSERT with rows in place of its own, split at
+        the slot marks. The INSERT is left with those rows.
+        """
+        insert.expression.set("expressions", rows)
+        return self.generate_expression(insert.copy()).split(SLOT_MARK)
+
+    def mark(self, number):
+        return exp.Var(this=f"{SLOT_MARK}{number}{SLOT_MARK}")
+
+    def generate_expression(self, expression):
+        with profile_stage("generate"):
+            return Dialect.get_or_raise(self.output_dialect).generate(expression, copy=False)
+
+    def fill(self, entry, templates, rows):
+        """
+        Return the SQL of a statement from the templates of the statement
+        and of its rows, with the literals of each row written between the
+        parts of its template in the output dialect.
+        """
+        generator = Dialect.get_or_raise(self.output_dialect).generator()
+        quote_start = generator.dialect.QUOTE_START
+        quote_end = generator.dialect.QUOTE_END
+
+        prefix, separator, suffix = entry[:3]
+        output = []
+        for parts, (_, slots) in zip(templates, rows):
+            row = [parts[0]]
+            for (slot_type, text), part in zip(slots, parts[1:]):
+                if slot_type == "s":
+                    row.append(f"{quote_start}{generator.escape_str(text)}{quote_end}")
+                else:
+                    row.append(text)
+                row.append(part)
+            output.append("".join(row))
+        return prefix + separator.join(output) + suffix
@@ -0,0 +1,56 @@
+from sqlglot import Dialect
+
+from .profiler import profile_stage
+from .sql_parser import SQLParser
+from .sql_template_cache import SQLTemplateCache
+
+
+class SQLTranspiler:
+    """
+    Rewrites statements from the input dialect in the output dialect, one
+    statement per line unless pretty is set. Unlike pp, identifiers are only
+    quoted where the output dialect needs it.
+
+    Unless pretty is set, INSERTs that differ only in the values of their
+    rows are generated from a template, see SQLTemplateCache.
+    """
+
+    def __init__(self, **kwargs):
+        self.dialect = kwargs["dialect"]
+        self.output_dialect = kwargs.get("output_dialect") or self.dialect
+        self.pretty = kwargs.get("pretty", False)
+        self.jobs = kwargs.get("jobs", 1)
+
+        self.sql_parser = SQLParser(
+            dialect=self.dialect,
+            jobs=self.jobs,
+            cache=kwargs.get("cache"),
+            progress=kwargs.get("progress"),
+        )
+        self.template_cache = None
+        if not self.pretty and kwargs.get("templates", True):
+            self.template_cache = SQLTemplateCache(self.sql_parser, self.output_dialect)
+
+    def transpile_statement(self, statement):
+        if self.template_cache is not None:
+            return [sql + ";" for _, sql in self.template_cache.generate(statement) if sql.strip()]
+
+        write = Dialect.get_or_raise(self.output_dialect)
+
+        output = []
+        for expression in self.sql_parser.parse_statement(statement):
+            with profile_stage("generate"):
+                sql = write.generate(expression, copy=False, pretty=self.pretty)
+            if sql.strip():
+                output.append(sql + ";")
+        return output
+
+    def iter_transpile(self, sql_content):
+        for statements in self.sql_parser.map_statements(sql_content, self.transpile_statement):
+            yield from statements
+
+    def transpile(self, sql_content):
+        return list(self.iter_transpile(sql_content))
+
+    def format(self, sql_content):
+        return "\n".join(self.iter_transpile(sql_content))
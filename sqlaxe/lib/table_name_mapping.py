@@ -0,0 +1,91 @@
+import csv
+import json
+import os
+import re
+
+# Prefix marking a regular expression rule in a mapping file
+REGEX_PREFIX = "re:"
+
+
+class TableNameMapping:
+    """
+    Maps old table names to new ones.
+
+    Exact names are looked up in a dict; names that aren't listed are tried
+    against the regex rules in order, and the first rule that matches is
+    applied. Results are memoized, so each distinct name is only worked out
+    once however often it appears.
+    """
+
+    def __init__(self, names=None, rules=None):
+        self.names = dict(names or {})
+        self.rules = [(re.compile(pattern), replacement) for pattern, replacement in (rules or [])]
+        self.renamed = {}
+
+    def add(self, old, new):
+        """
+        Add an exact name, or a regex rule if old starts with "re:". Raises
+        ValueError naming old if either name isn't a string or the regular
+        expression is invalid.
+        """
+        if not isinstance(old, str) or not isinstance(new, str):
+            raise ValueError(f"{old!r}: expected a string as the new name, got {new!r}")
+
+        if old.startswith(REGEX_PREFIX):
+            try:
+                pattern = re.compile(old[len(REGEX_PREFIX):])
+            except re.error as e:
+                raise ValueError(f"{old!r}: invalid regular expression: {e}") from e
+            self.rules.append((pattern, new))
+        else:
+            self.names[old] = new
+        self.renamed.clear()
+
+    def load(self, path):
+        """
+        Add the entries of a mapping file: a JSON object of old -> new names,
+        or a CSV file with one old,new pair per row. In either format an old
+        name starting with "re:" is a regular expression, and new may refer to
+        its groups (\\1).
+
+        :param path: Path of the .json or .csv mapping file.
+        """
+        with open(path, "r", newline="", encoding="utf-8") as file:
+            if os.path.splitext(path)[1].lower() == ".json":
+                entries = json.load(file)
+                if not isinstance(entries, dict):
+                    raise ValueError(f"{path}: expected a JSON object of old -> new names")
+                entries = entries.items()
+            else:
+                entries = [row for row in csv.reader(file) if row and not row[0].startswith("#")]
+                if entries and [column.strip().lower() for column in entries[0]] == ["old", "new"]:
+                    entries = entries[1:]
+
+        for entry in entries:
+            if len(entry) != 2:
+                raise ValueError(f"{path}: expected an old,new pair, got {entry!r}")
+            try:
+                self.add(*entry)
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}")
+
+        return self
+
+    def rename(self, name):
+        """
+        Return the new name for name, which is name itself if it isn't mapped.
+        """
+        renamed = self.renamed.get(name)
+        if renamed is not None:
+            return renamed
+
+        renamed = self.names.get(name)
+        if renamed is None:
+            renamed = name
+            for pattern, replacement in self.rules:
+                if pattern.search(name):
+                    renamed = pattern.sub(replacement, name)
+                    break
+
+        self.renamed[name] = renamed
+        return renamed
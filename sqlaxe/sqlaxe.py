@@ -12,189 +12,1175 @@
 # splitting SQL statements, pretty printing SQL code, searching for specific patterns, replacing table names,
 # truncating tables, and dropping tables.
 #
+# Each command imports its implementation when it runs, so that --help and
+# option errors don't wait for sqlglot to load.
+#
 
+import json
 import logging
 import os
-from typing import Optional, TextIO
+import re
+import sys
+from typing import TYPE_CHECKING, Iterable, Optional, TextIO, Tuple
 
 import click
 
-from sqlaxe.lib.logger import log
-from sqlaxe.lib.sql_grep import SQLGrep
-from sqlaxe.lib.sql_pretty_printer import SQLPrettyPrinter
-from sqlaxe.lib.sql_splitter import SQLSplitter
-from sqlaxe.lib.sql_table_drop import SQLTableDrop
-from sqlaxe.lib.sql_table_name_replacer import SQLTableNameReplacer
-from sqlaxe.lib.sql_table_truncate import SQLTableTruncate
-from sqlaxe.lib.sql_list_fields import SQLListFields
+from sqlaxe.lib.defaults import (COMPRESSION_FORMATS, DEFAULT_CACHE_DIRECTORY, DEFAULT_MAX_OPEN_FILES,
+                                  DEFAULT_SLOWEST, DEFAULT_SOCKET_HELP, PROFILE_FORMATS, STDIN,
+                                  default_socket_path)
+from sqlaxe.lib.progress import PROGRESS_STYLES
+from sqlaxe.lib.sql_classifier import KIND_NAMES
+
+if TYPE_CHECKING:
+    from sqlaxe.lib.batch import BatchJob
+    from sqlaxe.lib.sql_cache import SQLCache
 
 # Set logging level for sqlglot to ERROR
 logging.getLogger("sqlglot").setLevel(logging.ERROR)
 
+def echo_statements(statements: Iterable[str], separator: str, compress: Optional[str] = None) -> None:
+    """
+    Write statements to stdout as they are produced, joined by separator.
+
+    :param statements: Iterable of formatted statements.
+    :param separator: Text written between consecutive statements.
+    :param compress: Compression format of the output, or None.
+    """
+    from sqlaxe.lib.batch import open_stdout, write_statements
+
+    output = open_stdout(compress)
+    try:
+        write_statements(output, statements, separator)
+    finally:
+        if compress:
+            output.close()
+
+def open_input_file(path: str, param_hint: str = "SQL_FILES"):
+    """
+    Open an input file as open_sql_file() does, reporting a tar file that
+    isn't an archive written by split --archive as a bad parameter.
+
+    :param path: Path of the file, or - for stdin.
+    :param param_hint: Name of the argument the path was given as.
+    """
+    from sqlaxe.lib.batch import open_sql_file
+
+    try:
+        return open_sql_file(path)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint=param_hint)
+
+class SQLFiles:
+    """
+    The SQL files a command runs over, and where its output goes.
+
+    A single file is processed as it always has been, with --jobs worker
+    processes sharing its statements. Several files, or --in-place or
+    --output-tree, make a batch run: the files are shared out between the
+    worker processes instead, and a failure is reported at the end rather
+    than stopping the run.
+    """
+
+    def __init__(self, arguments: Tuple[str, ...], jobs: int, progress: Optional[str], compress: Optional[str],
+                 in_place: bool = False, output_tree: Optional[str] = None):
+        from sqlaxe.lib.batch import expand_inputs
+
+        try:
+            self.inputs = expand_inputs(arguments)
+        except FileNotFoundError as e:
+            raise click.BadParameter(str(e), param_hint="SQL_FILES")
+
+        if in_place and output_tree:
+            raise click.UsageError("--in-place and --output-tree can't be used together")
+        if (in_place or output_tree) and any(input_file.path == STDIN for input_file in self.inputs):
+            raise click.UsageError("stdin can't be written --in-place or to an --output-tree")
+        if in_place and compress:
+            raise click.UsageError("--in-place keeps the compression of each file; leave out --compress")
+
+        self.jobs = jobs
+        self.compress = compress
+        self.in_place = in_place
+        self.output_tree = output_tree
+        self.batch = len(self.inputs) > 1 or in_place or bool(output_tree)
+
+        # Statements are shared out between the worker processes for a single
+        # file, and files for a batch; per-file progress bars would only clash
+        self.statement_jobs = 1 if self.batch else jobs
+        self.progress = "none" if self.batch else progress
+
+    def run(self, command, method: str, separator: str) -> None:
+        """
+        Run command.method over every file and write the statements it yields.
+
+        :param command: Command object, such as an SQLPrettyPrinter.
+        :param method: Name of the method taking a SQL file and yielding statements.
+        :param separator: Text written between consecutive statements.
+        """
+        from sqlaxe.lib.batch import BatchJob
+
+        if not self.batch:
+            with open_input_file(self.inputs[0].path) as sql_file:
+                echo_statements(getattr(command, method)(sql_file), separator, self.compress)
+            return
+
+        if self.in_place:
+            job = BatchJob(command, method, separator, mode="in-place")
+        elif self.output_tree:
+            job = BatchJob(command, method, separator, mode="tree", output_directory=self.output_tree,
+                           compression=self.compress)
+        else:
+            job = BatchJob(command, method, separator)
+        self.run_batch(job)
+
+    def run_batch(self, job: "BatchJob") -> None:
+        """
+        Run a BatchJob over every file, then report the files that failed and
+        exit with status 1 if there were any.
+
+        :param job: The BatchJob to run.
+        """
+        from sqlaxe.lib.batch import open_stdout, run_batch
+        from sqlaxe.lib.logger import log
+
+        output = open_stdout(self.compress) if job.mode == "stdout" else None
+        failures = []
+        try:
+            for index, result in enumerate(run_batch(job, self.inputs, jobs=self.jobs, output=output,
+                                                     headers=len(self.inputs) > 1)):
+                if result.error:
+                    failures.append(result)
+                else:
+                    log(f"[{index + 1}/{len(self.inputs)}] {result.path}")
+        finally:
+            if output is not None and self.compress:
+                output.close()
+            elif output is not None:
+                output.flush()
+
+        if failures:
+            log(f"{len(failures)} of {len(self.inputs)} files failed:", logging.ERROR)
+            for result in failures:
+                log(f"  {result.path}: {result.error}", logging.ERROR)
+            click.get_current_context().exit(1)
+
+sql_files_argument = click.argument("sql_files", nargs=-1, required=True)
+
+def names_input(argument: str) -> bool:
+    """
+    Return True if argument names an input: stdin, an existing path or a glob
+    pattern matching something.
+
+    :param argument: Positional argument of a command.
+    """
+    import glob
+
+    if argument == STDIN or os.path.exists(argument):
+        return True
+    return glob.has_magic(argument) and bool(glob.glob(argument, recursive=True))
+
+def split_positional(sql_files: Tuple[str, ...], count: int,
+                     required: bool) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Return the files and the values of a command whose values may be given
+    after its first file, as in SQL_FILE PATTERN [SQL_FILES]... The up to
+    count arguments after the first file are values if required is set, or
+    if the second argument doesn't name an input, so that a second file
+    isn't taken for a value.
+
+    :param sql_files: Positional arguments of the command.
+    :param count: Number of values the command takes.
+    :param required: Whether the values have to be given this way.
+    """
+    if len(sql_files) > 1 and (required or not names_input(sql_files[1])):
+        return sql_files[:1] + sql_files[1 + count:], sql_files[1:1 + count]
+    return sql_files, ()
+
+def output_options(function):
+    """
+    Add the options choosing where a command writes its output for each file.
+    """
+    function = click.option(
+        "--output-tree", type=click.Path(file_okay=False), default=None,
+        help="write the output for each file to the same relative path under this directory",
+    )(function)
+    function = click.option(
+        "--in-place", is_flag=True, default=False, help="replace each file with the output for it",
+    )(function)
+    return function
+
+# Option shared by every command that parses and generates statements
+jobs_option = click.option(
+    "--jobs", type=int, default=1,
+    help="number of worker processes for parsing and generation; 0 uses one per CPU (default: 1)",
+)
+
+# Option shared by every command that reads a SQL file statement by statement
+progress_option = click.option(
+    "--progress", type=click.Choice(PROGRESS_STYLES), default=None,
+    help="progress report on stderr: bar, json (one object per line) or none (default: bar on a terminal)",
+)
+
+# Option shared by every command that writes SQL
+compress_option = click.option(
+    "--compress", type=click.Choice(COMPRESSION_FORMATS), default=None,
+    help="compress the output with gzip, xz or bz2 (default: none)",
+)
+
+def cache_options(function):
+    """
+    Add the options controlling the parsed statement cache to a command.
+    """
+    function = click.option(
+        "--cache-dir", type=click.Path(file_okay=False), default=DEFAULT_CACHE_DIRECTORY, envvar="SQLAXE_CACHE_DIR",
+        help=f"directory of the parsed statement cache (default: {DEFAULT_CACHE_DIRECTORY})",
+    )(function)
+    function = click.option(
+        "--cache/--no-cache", default=False, envvar="SQLAXE_CACHE",
+        help="load parsed statements from the cache, and store them after parsing (default: off, or $SQLAXE_CACHE)",
+    )(function)
+    return function
+
+def open_cache(cache: bool, cache_dir: str) -> Optional["SQLCache"]:
+    """
+    Return the SQLCache selected by the cache options, or None if caching is off.
+
+    :param cache: Whether caching is enabled.
+    :param cache_dir: Directory of the cache.
+    """
+    if not cache:
+        return None
+
+    from sqlaxe.lib.sql_cache import SQLCache
+
+    return SQLCache(directory=cache_dir)
+
 # Main click group
 @click.group()
-def main() -> None:
-    """Entry point for the SQLAxe command-line tool."""
-    pass
+@click.option("--log-file", type=click.Path(dir_okay=False), default=None, envvar="SQLAXE_LOG_FILE",
+              help="append log messages to this file (default: none)")
+@click.option("--quiet", "-q", is_flag=True, default=False, help="only report errors")
+@click.option("--verbose", "-v", is_flag=True, default=False, help="report debug messages as well")
+@click.option("--profile", is_flag=True, default=False,
+              help="report time, calls and bytes per stage, and the slowest statements, on stderr at exit")
+@click.option("--profile-format", type=click.Choice(PROFILE_FORMATS), default="table",
+              help="format of the --profile report (default: table)")
+@click.option("--profile-top", type=int, default=DEFAULT_SLOWEST,
+              help=f"number of slowest statements listed per stage (default: {DEFAULT_SLOWEST})")
+@click.option("--profile-cprofile", type=click.Path(dir_okay=False), default=None,
+              help="write cProfile statistics of the main process to this file, for pstats or snakeviz")
+def main(log_file: Optional[str], quiet: bool, verbose: bool, profile: bool, profile_format: str,
+         profile_top: int, profile_cprofile: Optional[str]) -> None:
+    """
+    Entry point for the SQLAxe command-line tool.
+
+    :param log_file: File to append log messages to.
+    :param quiet: Only report errors.
+    :param verbose: Report debug messages as well.
+    :param profile: Report where the time goes at exit.
+    :param profile_format: Format of the profile report: table or json.
+    :param profile_top: Number of slowest statements listed per stage.
+    :param profile_cprofile: File to write cProfile statistics to.
+    """
+    from sqlaxe.lib.logger import configure_logging
+
+    configure_logging(log_file=log_file, quiet=quiet, verbose=verbose)
+
+    context = click.get_current_context()
+    if profile:
+        from sqlaxe.lib.profiler import enable_profiling
+
+        profiler = enable_profiling(slowest=profile_top)
+        context.call_on_close(lambda: click.echo(profiler.report(profile_format), err=True))
+    if profile_cprofile:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+        def write_cprofile():
+            cprofile.disable()
+            cprofile.dump_stats(profile_cprofile)
+
+        context.call_on_close(write_cprofile)
 
 # Command: split
 @main.command()
-@click.argument("sql_file", type=click.File())
+@sql_files_argument
 @click.option("--dialect", type=str, default="mysql", help="Input SQL dialect (default: mysql)")
 @click.option("--output-dialect", type=str, default=None,
               help="output SQL dialect (defaults to --dialect)")
 @click.option("--output-directory", type=str, default=None,
-              help="output directory (defaults to sqlaxe_INPUT_FILENAME, without the extension)")
-def split(sql_file: TextIO, dialect: str, output_dialect: str, output_directory: Optional[str]) -> None:
+              help="output directory (defaults to sqlaxe_INPUT_FILENAME, without the extension, "
+                   "or sqlaxe_split for several files)")
+@click.option("--group-by-table/--no-group-by-table", default=False,
+              help="write all statements for a table to one file, wherever they appear in the input")
+@click.option("--max-open-files", type=int, default=DEFAULT_MAX_OPEN_FILES,
+              help=f"maximum number of output files kept open at once (default: {DEFAULT_MAX_OPEN_FILES})")
+@click.option("--archive", type=click.Path(dir_okay=False), default=None,
+              help="write the sections into this tar archive, with a manifest, instead of a directory")
+@click.option("--manifest", is_flag=True, default=False,
+              help="describe the section files in a manifest.json, for loading them in parallel (see load-plan)")
+@jobs_option
+@progress_option
+@cache_options
+@compress_option
+def split(sql_files: Tuple[str, ...], dialect: str, output_dialect: str, output_directory: Optional[str],
+          group_by_table: bool, max_open_files: int, archive: Optional[str], manifest: bool, jobs: int,
+          progress: Optional[str], cache: bool, cache_dir: str, compress: Optional[str]) -> None:
     """
     Split SQL file into individual statements.
 
-    :param sql_file: SQL file to be processed.
+    :param sql_files: SQL files, directories or glob patterns to be processed.
     :param dialect: Input SQL dialect.
     :param output_dialect: Output SQL dialect.
     :param output_directory: Directory for output files.
+    :param group_by_table: Write all statements for a table to one file.
+    :param max_open_files: Maximum number of output files kept open at once.
+    :param archive: Tar archive to write the sections into.
+    :param manifest: Write a manifest.json describing the section files.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    :param cache: Use the parsed statement cache.
+    :param cache_dir: Directory of the parsed statement cache.
+    :param compress: Compression format of the output.
     """
+    from sqlaxe.lib.batch import BatchJob
+    from sqlaxe.lib.compression import strip_compression_suffix
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_splitter import SQLSplitter
 
-    # Set default output directory if not provided
-    if not output_directory:
-        output_directory = "sqlaxe_" + os.path.splitext(os.path.basename(sql_file.name))[0]
+    files = SQLFiles(sql_files, jobs, progress, None)
 
-    log("Reading the contents of file to memory")
+    if archive and (files.batch or output_directory):
+        raise click.UsageError("--archive takes a single SQL file, and replaces --output-directory")
+    if archive and manifest:
+        raise click.UsageError("an --archive has a manifest of its own; --manifest is for directory output")
 
-    sql_content = sql_file.read()
+    # Set default output directory if not provided
+    if not output_directory and files.batch:
+        output_directory = "sqlaxe_split"
+    elif not output_directory:
+        name = os.path.basename(files.inputs[0].path) if files.inputs[0].path != STDIN else "stdin"
+        output_directory = "sqlaxe_" + os.path.splitext(strip_compression_suffix(name))[0]
+
+    log("Streaming statements from file")
 
     # Create SQLSplitter instance and split the SQL content
     splitter = SQLSplitter(
-        sql_file=sql_file,
         dialect=dialect,
         output_dialect=output_dialect,
         output_directory=output_directory,
         pretty=False,
+        group_by_table=group_by_table,
+        max_open_files=max_open_files,
+        jobs=files.statement_jobs,
+        progress=files.progress,
+        cache=open_cache(cache, cache_dir),
+        compression=compress,
+        archive=archive,
+        manifest=manifest,
     )
-    splitter.split(sql_content)
+
+    # Several files are split into one directory each, named after the file
+    if files.batch:
+        files.run_batch(BatchJob(splitter, "split", None, mode="directory", output_directory=output_directory))
+        return
+
+    with open_input_file(files.inputs[0].path) as sql_file:
+        splitter.split(sql_file)
+
+# Command: extract-section
+@main.command()
+@click.argument("archive", type=click.Path(exists=True, dir_okay=False))
+@click.argument("sections", nargs=-1)
+@click.option("--list", "list_sections", is_flag=True, default=False,
+              help="list the sections of the archive instead of printing them")
+def extract_section(archive: str, sections: Tuple[str, ...], list_sections: bool) -> None:
+    """
+    Print sections of an archive written by split --archive.
+
+    :param archive: Archive written by split --archive.
+    :param sections: Section numbers, member names or table names; all sections if none are given.
+    :param list_sections: List the sections instead.
+    """
+    from sqlaxe.lib.sql_archive import SQLArchive
+
+    try:
+        sql_archive = SQLArchive(archive)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="ARCHIVE")
+
+    selected = None
+    if sections:
+        selected = []
+        for selector in sections:
+            found = sql_archive.find(selector)
+            if not found:
+                raise click.BadParameter(f"no section matches {selector}", param_hint="SECTIONS")
+            selected.extend(entry for entry in found if entry not in selected)
+
+    if list_sections:
+        for entry in sql_archive.sections if selected is None else selected:
+            click.echo(f"{entry['section']:>6} {entry['name']:<40} {entry['statements']:>10} statements "
+                       f"{entry['bytes']:>14} bytes")
+        return
+
+    output = sys.stdout.buffer
+    try:
+        for block in sql_archive.iter_blocks(selected):
+            output.write(block)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    output.flush()
+
+# Command: load-plan
+@main.command()
+@click.argument("manifest", type=click.Path(exists=True))
+@click.option("--format", "output_format", type=click.Choice(["text", "json"]), default="text",
+              help="text (one line per file, with a header per stage) or json (default: text)")
+@click.option("--verify", is_flag=True, default=False,
+              help="print queries comparing each table's row count with the manifest's instead")
+def load_plan(manifest: str, output_format: str, verify: bool) -> None:
+    """
+    Print the stages to load a split in, from its manifest.
+
+    :param manifest: manifest.json written by split --manifest, or the directory holding it.
+    :param output_format: Output format.
+    :param verify: Print row count queries instead.
+    """
+    from sqlaxe.lib.sql_manifest import SQLLoadPlan
+
+    try:
+        plan = SQLLoadPlan(manifest)
+        stages = plan.stages()
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="MANIFEST")
+
+    if verify:
+        for query in plan.verification_queries():
+            click.echo(query)
+    elif output_format == "json":
+        click.echo(json.dumps({"stages": stages}, indent=1))
+    else:
+        for number, files in enumerate(stages):
+            click.echo(f"# stage {number + 1}: {len(files)} file{'s' if len(files) != 1 else ''}")
+            for name in files:
+                click.echo(name)
 
 # Command: pp (Pretty Print)
 @main.command()
-@click.argument("sql_file", type=click.File())
+@sql_files_argument
 @click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
 @click.option("--output-dialect", type=str, default=None,
               help="output SQL dialect (defaults to --dialect)")
-def pp(sql_file: TextIO, dialect: str, output_dialect: Optional[str]) -> None:
-    log("reading file")
-    sql_content = sql_file.read()
+@jobs_option
+@progress_option
+@cache_options
+@compress_option
+@output_options
+def pp(sql_files: Tuple[str, ...], dialect: str, output_dialect: Optional[str], jobs: int, progress: Optional[str],
+       cache: bool, cache_dir: str, compress: Optional[str], in_place: bool, output_tree: Optional[str]) -> None:
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_pretty_printer import SQLPrettyPrinter
 
-    # Create SQLPrettyPrinter instance and format the SQL content
-    pretty_printer = SQLPrettyPrinter(dialect=dialect, output_dialect=output_dialect)
-    pretty_sql = pretty_printer.format(sql_content)
+    log("streaming file")
+    files = SQLFiles(sql_files, jobs, progress, compress, in_place, output_tree)
 
-    print(pretty_sql)
+    # Create SQLPrettyPrinter instance and format the SQL content
+    pretty_printer = SQLPrettyPrinter(
+        dialect=dialect, output_dialect=output_dialect, jobs=files.statement_jobs, progress=files.progress,
+        cache=open_cache(cache, cache_dir)
+    )
+    files.run(pretty_printer, "iter_pretty_print_statements", "\n\n")
 
 # Command: grep
 @main.command()
-@click.argument("sql_file", type=click.File("r"))
-@click.argument("pattern", type=str)
+@sql_files_argument
+@click.option("-e", "--pattern", type=str, default=None,
+              help="print the statements containing PATTERN, which may also be given after the first file; "
+                   "may be left out when a filter is given")
 @click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
 @click.option("--output-dialect", type=str, default=None, help="output SQL dialect (defaults to --dialect)")
 @click.option("--invert/--no-invert", default=False, help="inverts match, so that only non-matching lines appear")
-def grep(sql_file: TextIO, pattern: str, dialect: str, output_dialect: Optional[str], invert: bool) -> None:
+@click.option("--regex/--no-regex", default=False, help="treat the pattern as a regular expression")
+@click.option("--table", type=str, default=None, help="only statements that reference this table")
+@click.option("--kind", type=click.Choice(KIND_NAMES, case_sensitive=False), default=None,
+              help="only statements of this kind")
+@click.option("--column", type=str, default=None, help="only statements that reference this column")
+@click.option("--prefilter/--no-prefilter", default=True,
+              help="skip statements whose raw text cannot contain the pattern (default: on)")
+@jobs_option
+@progress_option
+@cache_options
+@compress_option
+@output_options
+def grep(sql_files: Tuple[str, ...], pattern: Optional[str], dialect: str, output_dialect: Optional[str],
+         invert: bool, regex: bool, table: Optional[str], kind: Optional[str], column: Optional[str],
+         prefilter: bool, jobs: int, progress: Optional[str], cache: bool, cache_dir: str, compress: Optional[str],
+         in_place: bool, output_tree: Optional[str]) -> None:
     """
     Search for a pattern in SQL file.
 
-    :param sql_file: SQL file to search.
+    :param sql_files: SQL files, directories or glob patterns to search; the
+        pattern may come after the first one instead of --pattern.
     :param pattern: Pattern to search for.
     :param dialect: SQL dialect.
     :param output_dialect: Output SQL dialect.
     :param invert: Invert match to show only non-matching lines.
+    :param regex: Treat the pattern as a regular expression.
+    :param table: Only match statements that reference this table.
+    :param kind: Only match statements of this kind.
+    :param column: Only match statements that reference this column.
+    :param prefilter: Skip statements whose raw text cannot contain the pattern.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    :param cache: Use the parsed statement cache.
+    :param cache_dir: Directory of the parsed statement cache.
+    :param compress: Compression format of the output.
+    :param in_place: Replace each file with its matching statements.
+    :param output_tree: Directory to write the matches for each file under.
     """
-    log("reading file")
-    sql_content = sql_file.read()
+    if pattern is None:
+        sql_files, values = split_positional(sql_files, 1, required=not (table or kind or column))
+        pattern = values[0] if values else None
+    if pattern is None and not (table or kind or column):
+        raise click.UsageError("give PATTERN after the first file or --pattern, "
+                               "or one of --table, --kind and --column")
+
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_grep import SQLGrep
+
+    log("streaming file")
+    files = SQLFiles(sql_files, jobs, progress, compress, in_place, output_tree)
 
     # Create SQLGrep instance and format the SQL content
     pretty_printer = SQLGrep(
-        pattern=pattern, dialect=dialect, output_dialect=output_dialect, invert=invert
+        pattern=pattern or "", dialect=dialect, output_dialect=output_dialect, invert=invert, regex=regex,
+        table=table, kind=kind and kind.lower(), column=column, prefilter=prefilter, jobs=files.statement_jobs,
+        progress=files.progress,
+        cache=open_cache(cache, cache_dir),
+    )
+    files.run(pretty_printer, "iter_matches", "\n")
+
+# Command: extract
+@main.command()
+@sql_files_argument
+@click.option("--table", "tables", type=str, multiple=True, help="extract this table; may be repeated")
+@click.option("--include", type=str, multiple=True,
+              help="extract the tables matching this regular expression; may be repeated")
+@click.option("--exclude", type=str, multiple=True,
+              help="leave out the tables matching this regular expression; may be repeated")
+@click.option("--ddl-only", "part", flag_value="ddl", help="only the CREATE, ALTER and DROP statements")
+@click.option("--data-only", "part", flag_value="data", help="only the statements that aren't DDL")
+@click.option("--general/--no-general", default=True,
+              help="keep statements that belong to no table, such as SET (default: on)")
+@click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
+@jobs_option
+@progress_option
+@compress_option
+@output_options
+def extract(sql_files: Tuple[str, ...], tables: Tuple[str, ...], include: Tuple[str, ...], exclude: Tuple[str, ...],
+            part: Optional[str], general: bool, dialect: str, jobs: int, progress: Optional[str],
+            compress: Optional[str], in_place: bool, output_tree: Optional[str]) -> None:
+    """
+    Extract the statements of some tables from SQL file, unchanged.
+
+    :param sql_files: SQL files, directories or glob patterns to extract from.
+    :param tables: Names of the tables to extract.
+    :param include: Regular expressions matching more tables to extract.
+    :param exclude: Regular expressions matching tables to leave out.
+    :param part: "ddl" or "data" to keep only that part of each table, or None for both.
+    :param general: Keep statements that belong to no table.
+    :param dialect: SQL dialect.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    :param compress: Compression format of the output.
+    :param in_place: Replace each file with the extracted statements.
+    :param output_tree: Directory to write the extracted statements for each file under.
+    """
+    from sqlaxe.lib.sql_table_extractor import SQLTableExtractor
+
+    for pattern in include + exclude:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise click.BadParameter(f"{pattern}: {e}", param_hint="--include/--exclude")
+
+    files = SQLFiles(sql_files, jobs, progress, compress, in_place, output_tree)
+    extractor = SQLTableExtractor(
+        tables=tables, include=include, exclude=exclude, part=part or "all", general=general, dialect=dialect,
+        jobs=files.statement_jobs, progress=files.progress,
     )
-    pretty_sql = pretty_printer.format(sql_content)
+    files.run(extractor, "iter_format", "\n")
+
+# Command: coalesce-inserts
+@main.command()
+@sql_files_argument
+@click.option("--max-rows", type=click.IntRange(min=1), default=1000,
+              help="most rows in a merged INSERT (default: 1000)")
+@click.option("--max-bytes", type=click.IntRange(min=1), default=1024 * 1024,
+              help="most bytes in a merged INSERT; keep it under the server's max_allowed_packet (default: 1 MiB)")
+@click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
+@jobs_option
+@progress_option
+@compress_option
+@output_options
+def coalesce_inserts(sql_files: Tuple[str, ...], max_rows: int, max_bytes: int, dialect: str, jobs: int,
+                     progress: Optional[str], compress: Optional[str], in_place: bool,
+                     output_tree: Optional[str]) -> None:
+    """
+    Merge consecutive single-row INSERTs in SQL file into multi-row INSERTs.
 
-    print(pretty_sql)
+    :param sql_files: SQL files, directories or glob patterns to rewrite.
+    :param max_rows: Most rows in a merged INSERT.
+    :param max_bytes: Most bytes in a merged INSERT.
+    :param dialect: SQL dialect.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    :param compress: Compression format of the output.
+    :param in_place: Replace each file with the rewritten statements.
+    :param output_tree: Directory to write the rewritten statements for each file under.
+    """
+    from sqlaxe.lib.sql_insert_coalescer import SQLInsertCoalescer
+
+    files = SQLFiles(sql_files, jobs, progress, compress, in_place, output_tree)
+    coalescer = SQLInsertCoalescer(
+        max_rows=max_rows, max_bytes=max_bytes, dialect=dialect, jobs=files.statement_jobs, progress=files.progress,
+    )
+    files.run(coalescer, "iter_format", "\n")
+
+# Command: reshard
+@main.command()
+@sql_files_argument
+@click.option("--rows", type=click.IntRange(min=1), default=1000, help="most rows in each INSERT (default: 1000)")
+@click.option("--shards", type=click.IntRange(min=1), default=1,
+              help="spread each table's rows over this many files in --output-directory (default: 1, no files)")
+@click.option("--shard-by", type=str, default=None,
+              help="choose each row's shard by a hash of this column (default: round-robin)")
+@click.option("--output-directory", type=str, default=None,
+              help="directory for the shard files (defaults to sqlaxe_INPUT_FILENAME_shards, without the extension, "
+                   "or sqlaxe_shards for several files)")
+@click.option("--max-open-files", type=int, default=DEFAULT_MAX_OPEN_FILES,
+              help=f"maximum number of output files kept open at once (default: {DEFAULT_MAX_OPEN_FILES})")
+@click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
+@progress_option
+@compress_option
+@output_options
+def reshard(sql_files: Tuple[str, ...], rows: int, shards: int, shard_by: Optional[str],
+            output_directory: Optional[str], max_open_files: int, dialect: str, progress: Optional[str],
+            compress: Optional[str], in_place: bool, output_tree: Optional[str]) -> None:
+    """
+    Cut the INSERTs in SQL file into INSERTs of a few rows, optionally spreading them over shard files.
+
+    :param sql_files: SQL files, directories or glob patterns to reshard.
+    :param rows: Most rows in each INSERT.
+    :param shards: Number of files each table's rows are spread over.
+    :param shard_by: Column whose hash chooses each row's shard.
+    :param output_directory: Directory for the shard files.
+    :param max_open_files: Maximum number of output files kept open at once.
+    :param dialect: SQL dialect.
+    :param progress: Progress report style.
+    :param compress: Compression format of the output.
+    :param in_place: Replace each file with the rewritten statements.
+    :param output_tree: Directory to write the rewritten statements for each file under.
+    """
+    from sqlaxe.lib.batch import BatchJob
+    from sqlaxe.lib.compression import strip_compression_suffix
+    from sqlaxe.lib.sql_resharder import SQLResharder
+
+    if shards == 1 and (shard_by or output_directory):
+        raise click.UsageError("--shard-by and --output-directory need --shards")
+    if shards > 1 and (in_place or output_tree):
+        raise click.UsageError("with --shards, the shard files are written to --output-directory")
+
+    files = SQLFiles(sql_files, 1, progress, None if shards > 1 else compress, in_place, output_tree)
+    resharder = SQLResharder(
+        rows=rows, shards=shards, shard_by=shard_by, max_open_files=max_open_files, dialect=dialect,
+        progress=files.progress, compression=compress,
+    )
+    if shards == 1:
+        files.run(resharder, "iter_format", "\n")
+        return
+
+    if not output_directory and files.batch:
+        output_directory = "sqlaxe_shards"
+    elif not output_directory:
+        name = os.path.basename(files.inputs[0].path) if files.inputs[0].path != STDIN else "stdin"
+        output_directory = "sqlaxe_" + os.path.splitext(strip_compression_suffix(name))[0] + "_shards"
+
+    if files.batch:
+        files.run_batch(BatchJob(resharder, "reshard", None, mode="directory", output_directory=output_directory))
+        return
+
+    with open_input_file(files.inputs[0].path) as sql_file:
+        resharder.reshard(sql_file, output_directory)
 
 # Command: table_name_replace
 @main.command()
-@click.argument("sql_file", type=click.File("r"))
-@click.argument("table_name_regex", type=str)
-@click.argument("table_name_replacement", type=str)
+@sql_files_argument
+@click.option("--rename", type=(str, str), multiple=True, metavar="REGEX REPLACEMENT",
+              help="rename the tables matching REGEX; may be repeated, and the first match wins")
+@click.option("--mapping", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="CSV or JSON file of old,new table names; old names starting with re: are regular expressions")
 @click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
 @click.option("--output-dialect", type=str, default=None, help="output SQL dialect (defaults to --dialect)")
-def table_name_replace(sql_file: TextIO, table_name_regex: str, table_name_replacement: str, dialect: str,
-                       output_dialect: Optional[str]) -> None:
+@jobs_option
+@progress_option
+@cache_options
+@compress_option
+@output_options
+def table_name_replace(sql_files: Tuple[str, ...], rename: Tuple[Tuple[str, str], ...], mapping: Optional[str],
+                       dialect: str, output_dialect: Optional[str], jobs: int, progress: Optional[str], cache: bool,
+                       cache_dir: str, compress: Optional[str], in_place: bool, output_tree: Optional[str]) -> None:
     """
     Replace table names in SQL file based on a regex pattern.
 
-    :param sql_file: SQL file to process.
-    :param table_name_regex: Regex pattern to match table names.
-    :param table_name_replacement: Replacement string for matched table names.
+    :param sql_files: SQL files, directories or glob patterns to process; a
+        REGEX and REPLACEMENT may come after the first one instead of --rename.
+    :param rename: Regex and replacement pairs for table names.
+    :param mapping: Mapping file of old and new table names.
     :param dialect: SQL dialect.
     :param output_dialect: Output SQL dialect.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    :param cache: Use the parsed statement cache.
+    :param cache_dir: Directory of the parsed statement cache.
+    :param compress: Compression format of the output.
+    :param in_place: Replace each file with the output for it.
+    :param output_tree: Directory to write the output for each file under.
     """
-    log("reading file")
-    sql_content = sql_file.read()
+    if not rename:
+        sql_files, values = split_positional(sql_files, 2, required=mapping is None)
+        if values:
+            rename = ((values[0], values[1] if len(values) > 1 else ""),)
+    if not rename and mapping is None:
+        raise click.UsageError("give REGEX REPLACEMENT after the first file or --rename REGEX REPLACEMENT, "
+                               "or --mapping")
+
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_table_name_replacer import SQLTableNameReplacer
+    from sqlaxe.lib.table_name_mapping import REGEX_PREFIX, TableNameMapping
+
+    try:
+        table_name_mapping = TableNameMapping().load(mapping) if mapping else TableNameMapping()
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--mapping")
+
+    # --rename rules are tried after the entries of the mapping file
+    for regex, replacement in rename:
+        try:
+            table_name_mapping.add(REGEX_PREFIX + regex, replacement)
+        except ValueError as e:
+            raise click.BadParameter(f"{regex}: {e.__cause__}", param_hint="--rename")
+
+    log("streaming file")
+    files = SQLFiles(sql_files, jobs, progress, compress, in_place, output_tree)
 
     # Create SQLTableNameReplacer instance and replace table names
     replacer = SQLTableNameReplacer(
-        table_name_regex=table_name_regex,
-        table_name_replacement=table_name_replacement,
+        table_name_mapping=table_name_mapping,
         dialect=dialect,
         output_dialect=output_dialect,
         pretty=False,
+        jobs=files.statement_jobs,
+        progress=files.progress,
+        cache=open_cache(cache, cache_dir),
     )
-    replacer.replace(sql_content)
+    files.run(replacer, "iter_replace", "\n")
 
 # Command: table_truncate
 @main.command()
-@click.argument("sql_file", type=click.File("r"))
+@sql_files_argument
 @click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
 @click.option("--output-dialect", type=str, default=None, help="output SQL dialect (defaults to --dialect)")
-def table_truncate(sql_file: TextIO, dialect: str, output_dialect: Optional[str]) -> None:
+@click.option("--passthrough/--regenerate", default=True,
+              help="copy statements from the input instead of regenerating them, "
+                   "unless --output-dialect differs (default: passthrough)")
+@jobs_option
+@progress_option
+@cache_options
+@compress_option
+@output_options
+def table_truncate(sql_files: Tuple[str, ...], dialect: str, output_dialect: Optional[str], passthrough: bool,
+                   jobs: int, progress: Optional[str], cache: bool, cache_dir: str, compress: Optional[str],
+                   in_place: bool, output_tree: Optional[str]) -> None:
     """
     Generate SQL to truncate tables.
 
-    :param sql_file: SQL file to process.
+    :param sql_files: SQL files, directories or glob patterns to process.
     :param dialect: SQL dialect.
     :param output_dialect: Output SQL dialect.
+    :param passthrough: Copy unchanged statements from the input.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    :param cache: Use the parsed statement cache.
+    :param cache_dir: Directory of the parsed statement cache.
+    :param compress: Compression format of the output.
+    :param in_place: Replace each file with the output for it.
+    :param output_tree: Directory to write the output for each file under.
     """
-    log("reading file")
-    sql_content = sql_file.read()
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_table_truncate import SQLTableTruncate
+
+    log("streaming file")
+    files = SQLFiles(sql_files, jobs, progress, compress, in_place, output_tree)
 
     # Create SQLTableTruncate instance and format the SQL content
     truncator = SQLTableTruncate(
         dialect=dialect,
         output_dialect=output_dialect,
         pretty=False,
+        passthrough=passthrough,
+        jobs=files.statement_jobs,
+        progress=files.progress,
+        cache=open_cache(cache, cache_dir),
     )
-    print(truncator.format(sql_content))
+    files.run(truncator, "iter_format", "\n")
 
 # Command: table_drop
 @main.command()
-@click.argument("sql_file", type=click.File("r"))
+@sql_files_argument
 @click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
 @click.option("--output-dialect", type=str, default=None, help="output SQL dialect (defaults to --dialect)")
-def table_drop(sql_file: TextIO, dialect: str, output_dialect: Optional[str]) -> None:
+@click.option("--passthrough/--regenerate", default=True,
+              help="copy statements from the input instead of regenerating them, "
+                   "unless --output-dialect differs (default: passthrough)")
+@jobs_option
+@progress_option
+@cache_options
+@compress_option
+@output_options
+def table_drop(sql_files: Tuple[str, ...], dialect: str, output_dialect: Optional[str], passthrough: bool,
+               jobs: int, progress: Optional[str], cache: bool, cache_dir: str, compress: Optional[str],
+               in_place: bool, output_tree: Optional[str]) -> None:
     """
     Generate SQL to drop tables.
 
-    :param sql_file: SQL file to process.
+    :param sql_files: SQL files, directories or glob patterns to process.
     :param dialect: SQL dialect.
     :param output_dialect: Output SQL dialect.
+    :param passthrough: Copy unchanged statements from the input.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    :param cache: Use the parsed statement cache.
+    :param cache_dir: Directory of the parsed statement cache.
+    :param compress: Compression format of the output.
+    :param in_place: Replace each file with the output for it.
+    :param output_tree: Directory to write the output for each file under.
     """
-    log("reading file")
-    sql_content = sql_file.read()
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_table_drop import SQLTableDrop
+
+    log("streaming file")
+    files = SQLFiles(sql_files, jobs, progress, compress, in_place, output_tree)
 
     # Create SQLTableDrop instance and format the SQL content
     truncator = SQLTableDrop(
         dialect=dialect,
         output_dialect=output_dialect,
         pretty=False,
+        passthrough=passthrough,
+        jobs=files.statement_jobs,
+        progress=files.progress,
+        cache=open_cache(cache, cache_dir),
     )
-    print(truncator.format(sql_content))
+    files.run(truncator, "iter_format", "\n")
+
+# Command: index
+@main.command()
+@sql_files_argument
+@click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
+@jobs_option
+@progress_option
+def index(sql_files: Tuple[str, ...], dialect: str, jobs: int, progress: Optional[str]) -> None:
+    """
+    Index SQL file, so that commands can read just the statements they need.
+
+    :param sql_files: SQL files, directories or glob patterns to index.
+    :param dialect: SQL dialect.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    """
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_index import index_path
+    from sqlaxe.lib.sql_indexer import SQLIndexer
+
+    files = SQLFiles(sql_files, jobs, progress, None)
+    if any(input_file.path == STDIN for input_file in files.inputs):
+        raise click.UsageError("stdin can't be indexed")
+
+    indexer = SQLIndexer(dialect=dialect, jobs=jobs, progress=files.progress)
+    failures = 0
+    for input_file in files.inputs:
+        try:
+            statements = indexer.build(input_file.path)
+        except (OSError, ValueError) as e:
+            log(f"{input_file.path}: {e}", logging.ERROR)
+            failures += 1
+        else:
+            log(f"{statements} statements indexed in {index_path(input_file.path)}")
+
+    if failures:
+        click.get_current_context().exit(1)
+
+# Command: transpile
+@main.command()
+@sql_files_argument
+@click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
+@click.option("--output-dialect", type=str, default=None, help="output SQL dialect (defaults to --dialect)")
+@click.option("--pretty/--no-pretty", default=False, help="pretty print the statements (default: one per line)")
+@jobs_option
+@progress_option
+@cache_options
+@compress_option
+@output_options
+def transpile(sql_files: Tuple[str, ...], dialect: str, output_dialect: Optional[str], pretty: bool, jobs: int,
+              progress: Optional[str], cache: bool, cache_dir: str, compress: Optional[str], in_place: bool,
+              output_tree: Optional[str]) -> None:
+    """
+    Rewrite SQL file in another dialect, one statement per line.
+
+    :param sql_files: SQL files, directories or glob patterns to process.
+    :param dialect: SQL dialect.
+    :param output_dialect: Output SQL dialect.
+    :param pretty: Pretty print the statements.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    :param cache: Use the parsed statement cache.
+    :param cache_dir: Directory of the parsed statement cache.
+    :param compress: Compression format of the output.
+    :param in_place: Replace each file with the output for it.
+    :param output_tree: Directory to write the output for each file under.
+    """
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_transpiler import SQLTranspiler
+
+    log("streaming file")
+    files = SQLFiles(sql_files, jobs, progress, compress, in_place, output_tree)
+
+    transpiler = SQLTranspiler(
+        dialect=dialect, output_dialect=output_dialect, pretty=pretty, jobs=files.statement_jobs,
+        progress=files.progress, cache=open_cache(cache, cache_dir),
+    )
+    files.run(transpiler, "iter_transpile", "\n")
+
+# Command: pipe
+@main.command()
+@sql_files_argument
+@click.option("--drop", is_flag=True, default=False, help="add a DROP TABLE IF EXISTS before each CREATE TABLE")
+@click.option("--truncate", is_flag=True, default=False,
+              help="add a TRUNCATE TABLE before the first INSERT into each table")
+@click.option("--rename", type=(str, str), multiple=True, metavar="REGEX REPLACEMENT",
+              help="rename the tables matching REGEX; may be repeated, and the first match wins")
+@click.option("--mapping", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="CSV or JSON file of old,new table names; old names starting with re: are regular expressions")
+@click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
+@click.option("--output-dialect", type=str, default=None, help="output SQL dialect (defaults to --dialect)")
+@click.option("--pretty/--no-pretty", default=False, help="pretty print the statements (default: one per line)")
+@jobs_option
+@progress_option
+@cache_options
+@compress_option
+@output_options
+def pipe(sql_files: Tuple[str, ...], drop: bool, truncate: bool, rename: Tuple[Tuple[str, str], ...],
+         mapping: Optional[str], dialect: str, output_dialect: Optional[str], pretty: bool, jobs: int,
+         progress: Optional[str], cache: bool, cache_dir: str, compress: Optional[str], in_place: bool,
+         output_tree: Optional[str]) -> None:
+    """
+    Apply several transforms at once, parsing and generating each statement
+    only once: DROP TABLE, then TRUNCATE TABLE, then renaming.
+
+    :param sql_files: SQL files, directories or glob patterns to process.
+    :param drop: Add a DROP TABLE before each CREATE TABLE.
+    :param truncate: Add a TRUNCATE TABLE before the first INSERT into each table.
+    :param rename: Regex and replacement pairs for table names.
+    :param mapping: Mapping file of old and new table names.
+    :param dialect: SQL dialect.
+    :param output_dialect: Output SQL dialect.
+    :param pretty: Pretty print the statements.
+    :param jobs: Number of worker processes.
+    :param progress: Progress report style.
+    :param cache: Use the parsed statement cache.
+    :param cache_dir: Directory of the parsed statement cache.
+    :param compress: Compression format of the output.
+    :param in_place: Replace each file with the output for it.
+    :param output_tree: Directory to write the output for each file under.
+    """
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_pipeline import SQLPipeline
+    from sqlaxe.lib.sql_table_drop import SQLTableDrop
+    from sqlaxe.lib.sql_table_name_replacer import SQLTableNameReplacer
+    from sqlaxe.lib.sql_table_truncate import SQLTableTruncate
+    from sqlaxe.lib.table_name_mapping import REGEX_PREFIX, TableNameMapping
+
+    try:
+        table_name_mapping = TableNameMapping().load(mapping) if mapping else TableNameMapping()
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--mapping")
+
+    # --rename rules are tried after the entries of the mapping file
+    for regex, replacement in rename:
+        try:
+            table_name_mapping.add(REGEX_PREFIX + regex, replacement)
+        except ValueError as e:
+            raise click.BadParameter(f"{regex}: {e.__cause__}", param_hint="--rename")
+
+    log("streaming file")
+    files = SQLFiles(sql_files, jobs, progress, compress, in_place, output_tree)
+
+    stages = []
+    if drop:
+        stages.append(SQLTableDrop(dialect=dialect))
+    if truncate:
+        stages.append(SQLTableTruncate(dialect=dialect, output_dialect=output_dialect))
+    if rename or mapping:
+        stages.append(SQLTableNameReplacer(dialect=dialect, output_dialect=output_dialect, pretty=pretty,
+                                           table_name_mapping=table_name_mapping))
+
+    pipeline = SQLPipeline(
+        stages, dialect=dialect, output_dialect=output_dialect, pretty=pretty, jobs=files.statement_jobs,
+        progress=files.progress, cache=open_cache(cache, cache_dir),
+    )
+    files.run(pipeline, "iter_format", "\n")
+
+# Command: serve
+@main.command()
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False), default=default_socket_path,
+              help=f"Unix domain socket to listen on (default: {DEFAULT_SOCKET_HELP})")
+@click.option("--stdio", is_flag=True, default=False,
+              help="answer requests on stdin and stdout instead of a socket")
+@click.option("--warm", "warm_dialects", type=str, multiple=True, default=("mysql",),
+              help="dialect to set up before the first request; may be repeated (default: mysql)")
+def serve(socket_path: str, stdio: bool, warm_dialects: Tuple[str, ...]) -> None:
+    """
+    Answer pp, grep and transpile requests from editors and scripts.
+
+    :param socket_path: Unix domain socket to listen on.
+    :param stdio: Answer requests on stdin and stdout instead.
+    :param warm_dialects: Dialects to set up before the first request.
+    """
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_server import SQLService, SQLSocketServer, serve_stream
+
+    service = SQLService()
+    try:
+        service.warm(warm_dialects)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--warm")
+
+    if stdio:
+        serve_stream(service, sys.stdin, sys.stdout)
+        return
+
+    try:
+        server = SQLSocketServer(socket_path, service)
+    except OSError as e:
+        raise click.ClickException(str(e))
+
+    log(f"listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# Command group: client
+@main.group()
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False), default=default_socket_path,
+              help=f"Unix domain socket of the server (default: {DEFAULT_SOCKET_HELP})")
+@click.option("--fallback/--no-fallback", default=True,
+              help="run the request in this process when no server is running (default: on)")
+def client(socket_path: str, fallback: bool) -> None:
+    """
+    Send a request to a running sqlaxe serve.
+
+    :param socket_path: Unix domain socket of the server.
+    :param fallback: Run the request in this process when no server is running.
+    """
+    click.get_current_context().obj = {"socket_path": socket_path, "fallback": fallback}
+
+def client_request(method: str, sql_file: str, **options) -> None:
+    """
+    Send the contents of sql_file to the server as a method request and print
+    the statements it returns.
+
+    :param method: "pp", "grep" or "transpile".
+    :param sql_file: SQL file to send, or - for stdin.
+    :param options: Options of the request.
+    """
+    from sqlaxe.lib.sql_server import METHOD_SEPARATORS, RequestError, SQLClient
+
+    with open_input_file(sql_file, "SQL_FILE") as file:
+        sql = file.read().decode("utf-8")
+
+    settings = click.get_current_context().find_object(dict)
+    try:
+        with SQLClient(settings["socket_path"], fallback=settings["fallback"]) as sql_client:
+            result = sql_client.call(method, sql=sql, **options)
+    except (RequestError, OSError) as e:
+        raise click.ClickException(str(e))
+
+    echo_statements(result["statements"], METHOD_SEPARATORS[method])
+
+@client.command("pp")
+@click.argument("sql_file", type=str, default=STDIN)
+@click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
+@click.option("--output-dialect", type=str, default=None, help="output SQL dialect (defaults to --dialect)")
+def client_pp(sql_file: str, dialect: str, output_dialect: Optional[str]) -> None:
+    """
+    Pretty print SQL file through the server.
+
+    :param sql_file: SQL file, or - for stdin.
+    :param dialect: SQL dialect.
+    :param output_dialect: Output SQL dialect.
+    """
+    client_request("pp", sql_file, dialect=dialect, output_dialect=output_dialect)
+
+@client.command("grep")
+@click.argument("sql_file", type=str)
+@click.argument("pattern", type=str, required=False, default="")
+@click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
+@click.option("--output-dialect", type=str, default=None, help="output SQL dialect (defaults to --dialect)")
+@click.option("--invert/--no-invert", default=False, help="inverts match, so that only non-matching lines appear")
+@click.option("--regex/--no-regex", default=False, help="treat the pattern as a regular expression")
+@click.option("--table", type=str, default=None, help="only statements that reference this table")
+@click.option("--kind", type=click.Choice(KIND_NAMES, case_sensitive=False), default=None,
+              help="only statements of this kind")
+@click.option("--column", type=str, default=None, help="only statements that reference this column")
+def client_grep(sql_file: str, pattern: str, dialect: str, output_dialect: Optional[str], invert: bool,
+                regex: bool, table: Optional[str], kind: Optional[str], column: Optional[str]) -> None:
+    """
+    Search for a pattern in SQL file through the server.
+
+    :param sql_file: SQL file, or - for stdin.
+    :param pattern: Pattern to search for.
+    :param dialect: SQL dialect.
+    :param output_dialect: Output SQL dialect.
+    :param invert: Invert match to show only non-matching lines.
+    :param regex: Treat the pattern as a regular expression.
+    :param table: Only match statements that reference this table.
+    :param kind: Only match statements of this kind.
+    :param column: Only match statements that reference this column.
+    """
+    client_request("grep", sql_file, pattern=pattern, dialect=dialect, output_dialect=output_dialect,
+                   invert=invert, regex=regex, table=table, kind=kind, column=column)
+
+@client.command("transpile")
+@click.argument("sql_file", type=str, default=STDIN)
+@click.option("--dialect", type=str, default="mysql", help="SQL dialect (default: mysql)")
+@click.option("--output-dialect", type=str, default=None, help="output SQL dialect (defaults to --dialect)")
+@click.option("--pretty/--no-pretty", default=False, help="pretty print the statements (default: one per line)")
+def client_transpile(sql_file: str, dialect: str, output_dialect: Optional[str], pretty: bool) -> None:
+    """
+    Rewrite SQL file in another dialect through the server.
+
+    :param sql_file: SQL file, or - for stdin.
+    :param dialect: SQL dialect.
+    :param output_dialect: Output SQL dialect.
+    :param pretty: Pretty print the statements.
+    """
+    client_request("transpile", sql_file, dialect=dialect, output_dialect=output_dialect, pretty=pretty)
 
 @main.command()
 @click.argument("sql_file", type=click.File("r"))
@@ -207,6 +1193,9 @@ def list_fields(sql_file: TextIO, dialect: str, output_format: str) -> None:
     :param dialect: SQL dialect.
     :param output_format: Output format (csv or jsonl).
     """
+    from sqlaxe.lib.logger import log
+    from sqlaxe.lib.sql_list_fields import SQLListFields
+
     log("reading file")
     sql_content = sql_file.read()
 
@@ -0,0 +1,73 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from sqlaxe.lib.batch import BatchJob, InputFile, expand_inputs, run_batch
+from sqlaxe.lib.sql_table_drop import SQLTableDrop
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        os.makedirs(os.path.join(self.root, "in", "sub"))
+        self.write("in/b.sql", b"CREATE TABLE b (x INT);\n")
+        self.write("in/a.sql", b"CREATE TABLE a (x INT);\n")
+        self.write("in/sub/c.sql.gz", gzip.compress(b"CREATE TABLE c (x INT);\n"))
+        self.write("in/notes.txt", b"not sql")
+        self.drop = SQLTableDrop(dialect="mysql", output_dialect="mysql", passthrough=True, progress="none")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def write(self, name, data):
+        with open(self.path(name), "wb") as file:
+            file.write(data)
+
+    def test_expand_inputs(self):
+        inputs = expand_inputs([self.path("in/sub/c.sql.gz"), self.path("in"), self.path("in/*.sql")])
+
+        self.assertEqual([input_file.relative_path for input_file in inputs],
+                         ["c.sql.gz", "a.sql", "b.sql"])
+        self.assertEqual(inputs[1].path, self.path("in/a.sql"))
+
+        with self.assertRaises(FileNotFoundError):
+            expand_inputs([self.path("in/*.missing")])
+
+    def test_stdout_with_headers(self):
+        inputs = expand_inputs([self.path("in")])
+        output = io.StringIO()
+        results = list(run_batch(BatchJob(self.drop, "iter_format", "\n"), inputs, output=output))
+
+        self.assertEqual([result.error for result in results], [None, None, None])
+        self.assertEqual(output.getvalue().count("-- ==> "), 3)
+        self.assertLess(output.getvalue().index("TABLE a"), output.getvalue().index("TABLE b"))
+        self.assertIn("DROP TABLE IF EXISTS c CASCADE;\nCREATE TABLE c (x INT);", output.getvalue())
+
+    def test_output_tree_and_failures(self):
+        inputs = expand_inputs([self.path("in")]) + [InputFile(self.path("in/missing.sql"), "missing.sql")]
+        job = BatchJob(self.drop, "iter_format", "\n", mode="tree", output_directory=self.path("out"),
+                       compression="gzip")
+        results = list(run_batch(job, inputs))
+
+        self.assertEqual([result.error is None for result in results], [True, True, True, False])
+        self.assertIn("FileNotFoundError", results[-1].error)
+        with gzip.open(self.path("out/sub/c.sql.gz"), "rt") as written:
+            self.assertEqual(written.read(), "DROP TABLE IF EXISTS c CASCADE;\nCREATE TABLE c (x INT);\n")
+
+    def test_in_place(self):
+        job = BatchJob(self.drop, "iter_format", "\n", mode="in-place")
+        list(run_batch(job, expand_inputs([self.path("in")])))
+
+        with gzip.open(self.path("in/sub/c.sql.gz"), "rt") as written:
+            self.assertEqual(written.read(), "DROP TABLE IF EXISTS c CASCADE;\nCREATE TABLE c (x INT);\n")
+        self.assertEqual(sorted(os.listdir(self.path("in"))), ["a.sql", "b.sql", "notes.txt", "sub"])
+
+
+if __name__ == "__main__":
+    unittest.main()
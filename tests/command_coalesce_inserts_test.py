@@ -0,0 +1,85 @@
+import unittest
+from sqlaxe.lib.sql_insert_coalescer import SQLInsertCoalescer
+
+
+class TestSQLInsertCoalescer(unittest.TestCase):
+    def coalesce(self, sql_content, **kwargs):
+        return SQLInsertCoalescer(dialect="mysql", **kwargs).coalesce(sql_content)
+
+    def test_merge_consecutive_inserts(self):
+        sql_content = (
+            "INSERT INTO t (a, b) VALUES (1, 'x;y');"
+            "INSERT INTO `t` (`a`, b) VALUES (2, 'select'),(3, NULL);"
+            "insert into t (a, b) values (4, 'z');"
+            "INSERT INTO t (b, a) VALUES ('q', 5);"
+            "INSERT IGNORE INTO t VALUES (6, 'r');"
+            "INSERT IGNORE INTO t VALUES (7, 's');"
+        )
+        self.assertEqual(self.coalesce(sql_content), [
+            "INSERT INTO t (a, b) VALUES (1, 'x;y'),(2, 'select'),(3, NULL),(4, 'z')",
+            "INSERT INTO t (b, a) VALUES ('q', 5)",
+            "INSERT IGNORE INTO t VALUES (6, 'r'),(7, 's')",
+        ])
+
+    def test_never_merge_across_statements(self):
+        sql_content = (
+            "INSERT INTO t VALUES (1);"
+            "INSERT INTO u VALUES (1);"
+            "INSERT INTO t VALUES (2);"
+            "ALTER TABLE t ADD COLUMN b INT;"
+            "INSERT INTO t VALUES (3);"
+            "INSERT INTO t VALUES (4) ON DUPLICATE KEY UPDATE a = VALUES(a);"
+            "INSERT INTO t VALUES ((SELECT MAX(a) FROM u));"
+            "INSERT INTO t VALUES (5);"
+            "-- the last row\nINSERT INTO t VALUES (6);"
+        )
+        self.assertEqual(self.coalesce(sql_content), [
+            "INSERT INTO t VALUES (1)",
+            "INSERT INTO u VALUES (1)",
+            "INSERT INTO t VALUES (2)",
+            "ALTER TABLE t ADD COLUMN b INT",
+            "INSERT INTO t VALUES (3)",
+            "INSERT INTO t VALUES (4) ON DUPLICATE KEY UPDATE a = VALUES(a)",
+            "INSERT INTO t VALUES ((SELECT MAX(a) FROM u))",
+            "INSERT INTO t VALUES (5)",
+            "-- the last row\nINSERT INTO t VALUES (6)",
+        ])
+
+    def test_comment_after_rows(self):
+        # Rows merged after a trailing comment would be commented out
+        sql_content = (
+            "INSERT INTO t VALUES (1) -- c\n;"
+            "INSERT INTO t VALUES (2);"
+            "INSERT INTO t VALUES (3) # c\n;"
+            "INSERT INTO t VALUES (4) /* c */;"
+            "INSERT INTO t VALUES (5), -- c\n(6);"
+            "INSERT INTO t VALUES (7);"
+        )
+        self.assertEqual(self.coalesce(sql_content), [
+            "INSERT INTO t VALUES (1) -- c",
+            "INSERT INTO t VALUES (2)",
+            "INSERT INTO t VALUES (3) # c",
+            "INSERT INTO t VALUES (4) /* c */",
+            "INSERT INTO t VALUES (5), -- c\n(6),(7)",
+        ])
+
+    def test_format_comment_after_rows(self):
+        sql_content = "INSERT INTO t VALUES (1) -- c\n;INSERT INTO t VALUES (2);INSERT INTO t VALUES (3);"
+        self.assertEqual(
+            SQLInsertCoalescer(dialect="mysql").format(sql_content),
+            "INSERT INTO t VALUES (1) -- c\n;\nINSERT INTO t VALUES (2),(3);",
+        )
+
+    def test_batch_limits(self):
+        sql_content = "".join(f"INSERT INTO t VALUES ({i});" for i in range(5))
+        self.assertEqual(self.coalesce(sql_content, max_rows=2), [
+            "INSERT INTO t VALUES (0),(1)", "INSERT INTO t VALUES (2),(3)", "INSERT INTO t VALUES (4)",
+        ])
+
+        # Each batch, with its semicolon, fits in max_bytes
+        statements = self.coalesce(sql_content, max_bytes=len("INSERT INTO t VALUES (0),(1),(2);"))
+        self.assertEqual(statements, ["INSERT INTO t VALUES (0),(1),(2)", "INSERT INTO t VALUES (3),(4)"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from sqlaxe.lib.sql_table_extractor import SQLTableExtractor
+
+SQL = (
+    "/*!40101 SET NAMES utf8 */;\n"
+    "--\n-- Table structure for table `users`\n--\n"
+    "DROP TABLE IF EXISTS `users`;\n"
+    "CREATE TABLE `users` (id INT);\n"
+    "LOCK TABLES `users` WRITE;\n"
+    "/*!40000 ALTER TABLE `users` DISABLE KEYS */;\n"
+    "INSERT INTO `users` VALUES (1,'a;b'),(2,'c');\n"
+    "/*!40000 ALTER TABLE `users` ENABLE KEYS */;\n"
+    "UNLOCK TABLES;\n"
+    "CREATE TABLE `orders` (id INT, user_id INT);\n"
+    "LOCK TABLES `orders` WRITE;\n"
+    "INSERT INTO `orders` VALUES (1,1);\n"
+    "UNLOCK TABLES;\n"
+    "CREATE TABLE `order_items` (id INT);\n"
+    "INSERT INTO order_items SELECT * FROM orders;\n"
+)
+
+
+class TestSQLTableExtractor(unittest.TestCase):
+    def extract(self, **kwargs):
+        return SQLTableExtractor(dialect="mysql", **kwargs).extract(SQL)
+
+    def test_extract_tables(self):
+        self.assertEqual(self.extract(tables=["Orders"], general=False), [
+            "CREATE TABLE `orders` (id INT, user_id INT)",
+            "LOCK TABLES `orders` WRITE",
+            "INSERT INTO `orders` VALUES (1,1)",
+            "UNLOCK TABLES",
+        ])
+
+    def test_include_exclude(self):
+        self.assertEqual(self.extract(include=["^order"], exclude=["items$"], general=False),
+                         self.extract(tables=["orders"], general=False))
+
+        # The table of the last INSERT is only known once it's parsed
+        self.assertEqual(self.extract(tables=["order_items"], general=False), [
+            "CREATE TABLE `order_items` (id INT)",
+            "INSERT INTO order_items SELECT * FROM orders",
+        ])
+
+    def test_ddl_and_data_only(self):
+        self.assertEqual(self.extract(tables=["users"], part="ddl"), [
+            "/*!40101 SET NAMES utf8 */",
+            "--\n-- Table structure for table `users`\n--\nDROP TABLE IF EXISTS `users`",
+            "CREATE TABLE `users` (id INT)",
+        ])
+        self.assertEqual(self.extract(tables=["users"], part="data", general=False), [
+            "LOCK TABLES `users` WRITE",
+            "/*!40000 ALTER TABLE `users` DISABLE KEYS */",
+            "INSERT INTO `users` VALUES (1,'a;b'),(2,'c')",
+            "/*!40000 ALTER TABLE `users` ENABLE KEYS */",
+            "UNLOCK TABLES",
+        ])
+
+    def test_format_trailing_line_comment(self):
+        extractor = SQLTableExtractor(dialect="mysql", tables=["users"], general=False)
+        self.assertEqual(
+            extractor.format("INSERT INTO users VALUES (1) -- note\n;\nINSERT INTO orders VALUES (2);\n"
+                             "INSERT INTO users VALUES (3);"),
+            "INSERT INTO users VALUES (1) -- note\n;\nINSERT INTO users VALUES (3);",
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -129,5 +129,58 @@ class TestSQLGrep(unittest.TestCase):
         content = self.grep.format(test_sql)
         self.assertEqual('SELECT\n  "t1"."id",\n  "t1"."name",\n  "t2"."description"\nFROM "table1" AS "t1"\nLEFT JOIN "table2" AS "t2"\n  ON "t1"."id" = "t2"."id"\nWHERE\n  "t1"."age" > 30\nORDER BY\n  "t1"."name";', content)
 
+    def test_prefilter_ignores_case_and_quoting(self):
+        self.grep = SQLGrep(
+            pattern='FROM "Table1"',
+            dialect=self.dialect,
+            output_dialect=self.output_dialect,
+            invert=False,
+        )
+        self.assertEqual(self.grep.required_words, ["Table1"])
+
+        content = self.grep.format("select * from `Table1`; select * from table2;")
+        self.assertEqual('SELECT\n  *\nFROM "Table1";', content)
+
+    def test_prefilter_rewritten_words(self):
+        # Numbers may be written differently, and transpiling may rename functions
+        self.grep = SQLGrep(pattern="0.5", dialect="mysql", output_dialect="mysql", invert=False)
+        self.assertEqual(self.grep.required_words, [])
+        self.assertIn("0.5", self.grep.format("SELECT .5;"))
+
+        self.grep = SQLGrep(pattern="STRING_AGG", dialect="mysql", output_dialect="postgres", invert=False)
+        self.assertEqual(self.grep.required_words, [])
+        self.assertIn("STRING_AGG(", self.grep.format("SELECT GROUP_CONCAT(name) FROM users;"))
+
+    def test_regex(self):
+        self.grep = SQLGrep(
+            pattern=r"VALUES\s+\(2\)",
+            dialect=self.dialect,
+            output_dialect=self.output_dialect,
+            invert=False,
+            regex=True,
+        )
+        content = self.grep.format("INSERT INTO table1 VALUES (1); INSERT INTO table2 VALUES (2);")
+        self.assertEqual('INSERT INTO "table2"\nVALUES\n  (2);', content)
+
+    def test_table_kind_and_column(self):
+        test_sql = (
+            "CREATE TABLE table1 (id INT, name TEXT); INSERT INTO table1 (id) VALUES (1);"
+            "INSERT INTO table2 (name) VALUES ('table1'); SELECT t.name FROM table2 JOIN table1 t ON 1 = 1;"
+        )
+
+        self.grep = SQLGrep(pattern="", dialect=self.dialect, invert=False, table="TABLE1", kind="insert")
+        self.assertEqual('INSERT INTO "table1" (\n  "id"\n)\nVALUES\n  (1);', self.grep.format(test_sql))
+
+        self.grep = SQLGrep(pattern="", dialect=self.dialect, invert=False, table="table1", kind="select")
+        self.assertIn('JOIN "table1"', self.grep.format(test_sql))
+
+        self.grep = SQLGrep(pattern="", dialect=self.dialect, invert=False, column="name")
+        content = self.grep.format(test_sql)
+        self.assertIn('CREATE TABLE "table1"', content)
+        self.assertIn('INSERT INTO "table2"', content)
+        self.assertIn('SELECT', content)
+        self.assertNotIn('INSERT INTO "table1"', content)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
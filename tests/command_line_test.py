@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from sqlaxe.sqlaxe import main, split_positional
+
+SQL = "INSERT INTO tbl_a VALUES (1);\nSELECT 'needle' FROM tbl_b;\n"
+
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.first = os.path.join(self.directory.name, "first.sql")
+        self.second = os.path.join(self.directory.name, "second.sql")
+        for path in (self.first, self.second):
+            with open(path, "w") as file:
+                file.write(SQL)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_command(self, *arguments):
+        result = CliRunner().invoke(main, ["-q", *arguments, "--progress", "none"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def test_split_positional(self):
+        self.assertEqual(split_positional((self.first, "needle", self.second), 1, required=True),
+                         ((self.first, self.second), ("needle",)))
+        self.assertEqual(split_positional((self.first, self.second), 1, required=False),
+                         ((self.first, self.second), ()))
+        self.assertEqual(split_positional((self.first, "^tbl_"), 2, required=True), ((self.first,), ("^tbl_",)))
+
+    def test_grep_pattern_after_the_first_file(self):
+        output = self.run_command("grep", self.first, "needle", self.second)
+        self.assertEqual(output.count("'needle'"), 2)
+        self.assertEqual(output, self.run_command("grep", self.first, self.second, "--pattern", "needle"))
+
+        # With a filter, a second file is not taken for the pattern
+        output = self.run_command("grep", self.first, self.second, "--kind", "insert")
+        self.assertEqual(output.count("INSERT"), 2)
+
+    def test_table_name_replace_regex_after_the_first_file(self):
+        output = self.run_command("table-name-replace", self.first, "^tbl_", "new_")
+        self.assertEqual(output, "INSERT INTO new_a VALUES (1);\nSELECT 'needle' FROM new_b;\n")
+        self.assertEqual(output, self.run_command("table-name-replace", self.first, "--rename", "^tbl_", "new_"))
+
+
+if __name__ == "__main__":
+    unittest.main()
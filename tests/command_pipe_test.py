@@ -0,0 +1,66 @@
+import unittest
+
+from sqlglot import exp
+
+from sqlaxe.lib.sql_pipeline import Once, SQLPipeline
+from sqlaxe.lib.sql_table_drop import SQLTableDrop
+from sqlaxe.lib.sql_table_name_replacer import SQLTableNameReplacer
+from sqlaxe.lib.sql_table_truncate import SQLTableTruncate
+from sqlaxe.lib.table_name_mapping import TableNameMapping
+
+SQL = (
+    "CREATE TABLE `tbl_users` (`id` INT);\n"
+    "INSERT INTO `tbl_users` VALUES (1);\n"
+    "INSERT INTO tbl_users VALUES (2);\n"
+    "INSERT INTO orders SELECT u.id FROM tbl_users AS u;\n"
+)
+
+
+class DropSelects:
+    def transform_expression(self, sql_statement):
+        return [] if isinstance(sql_statement, exp.Select) else [sql_statement]
+
+
+class AnalyzeOnce:
+    def transform_expression(self, sql_statement):
+        if isinstance(sql_statement, exp.Insert):
+            return [sql_statement, Once("analyze", exp.Command(this="ANALYZE"))]
+        return [sql_statement]
+
+
+class TestSQLPipeline(unittest.TestCase):
+    def test_drop_truncate_rename(self):
+        stages = [
+            SQLTableDrop(dialect="mysql"),
+            SQLTableTruncate(dialect="mysql", output_dialect="postgres"),
+            SQLTableNameReplacer(dialect="mysql", output_dialect="postgres", pretty=False,
+                                 table_name_mapping=TableNameMapping(rules=[("^tbl_", "")])),
+        ]
+        pipeline = SQLPipeline(stages, dialect="mysql", output_dialect="postgres")
+
+        # The DROP and TRUNCATE are renamed too, by the stage after them
+        self.assertEqual(pipeline.pipe(SQL), [
+            "DROP TABLE IF EXISTS users CASCADE",
+            "CREATE TABLE users (\"id\" INT)",
+            "TRUNCATE TABLE users",
+            "INSERT INTO users VALUES (1)",
+            "INSERT INTO users VALUES (2)",
+            "TRUNCATE TABLE orders",
+            "INSERT INTO orders SELECT u.id FROM users AS u",
+        ])
+
+    def test_custom_stages(self):
+        pipeline = SQLPipeline([DropSelects(), AnalyzeOnce()], dialect="mysql")
+        self.assertEqual(pipeline.format("SELECT 1; INSERT INTO t VALUES (1); INSERT INTO t VALUES (2);"), (
+            "INSERT INTO t VALUES (1);\n"
+            "ANALYZE;\n"
+            "INSERT INTO t VALUES (2);"
+        ))
+
+    def test_no_stages(self):
+        pipeline = SQLPipeline(dialect="mysql", output_dialect="postgres")
+        self.assertEqual(pipeline.pipe("SELECT IFNULL(a, 1) FROM `b`"), ["SELECT COALESCE(a, 1) FROM \"b\""])
+
+
+if __name__ == "__main__":
+    unittest.main()
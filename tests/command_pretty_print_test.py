@@ -53,6 +53,18 @@ class TestSQLPrettyPrinter(unittest.TestCase):
         result = self.pretty_printer.format(sql_content)
         self.assertEqual(result, expected_output)
 
+    def test_pretty_print_trailing_line_comment(self):
+        sql_content = "SELECT 1 -- trailing\n;\nSELECT 2;"
+        expected_output = 'SELECT\n  1 /* trailing */;\n\nSELECT\n  2;'
+        result = self.pretty_printer.format(sql_content)
+        self.assertEqual(result, expected_output)
+
+    def test_pretty_print_comment_only_chunks(self):
+        sql_content = "SELECT 1;\n-- Dump completed\n# note\n"
+        result = self.pretty_printer.format(sql_content)
+        self.assertIn("Dump completed", result)
+        self.assertIn("note", result)
+
 
 if __name__ == "__main__":
     unittest.main()
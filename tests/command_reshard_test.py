@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from sqlaxe.lib.sql_resharder import SQLResharder
+
+SQL = (
+    "SET NAMES utf8;\n"
+    "CREATE TABLE `users` (`id` INT, `name` TEXT);\n"
+    "-- rows\nINSERT INTO `users` VALUES (1,'a'),(2,'b;'),(3,'c'),(4,'d'),(5,'e');\n"
+    "INSERT INTO `users` (`name`, `id`) VALUES ('f',6);\n"
+    "INSERT INTO `users` VALUES (7,'g') ON DUPLICATE KEY UPDATE name='x';\n"
+)
+
+
+class TestSQLResharder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, name):
+        # A shard no row was hashed to has no file
+        if not os.path.exists(os.path.join(self.directory, name)):
+            return ""
+        with open(os.path.join(self.directory, name)) as file:
+            return file.read()
+
+    def test_chunk_inserts(self):
+        resharder = SQLResharder(dialect="mysql", rows=2)
+        self.assertEqual(resharder.format(SQL).splitlines()[2:], [
+            "-- rows",
+            "INSERT INTO `users` VALUES (1,'a'),(2,'b;');",
+            "INSERT INTO `users` VALUES (3,'c'),(4,'d');",
+            "INSERT INTO `users` VALUES (5,'e');",
+            "INSERT INTO `users` (`name`, `id`) VALUES ('f',6);",
+            "INSERT INTO `users` VALUES (7,'g') ON DUPLICATE KEY UPDATE name='x';",
+        ])
+
+    def test_text_after_rows(self):
+        # Statements with anything after their rows are copied whole
+        sql_content = (
+            "INSERT INTO t VALUES (1),(2) -- tail\n;"
+            "INSERT INTO t VALUES (3) /* x */;"
+            "INSERT INTO t VALUES (4),(5);"
+        )
+        resharder = SQLResharder(dialect="mysql", rows=1)
+        self.assertEqual(list(resharder.iter_reshard(sql_content)), [
+            "INSERT INTO t VALUES (1),(2) -- tail",
+            "INSERT INTO t VALUES (3) /* x */",
+            "INSERT INTO t VALUES (4)",
+            "INSERT INTO t VALUES (5)",
+        ])
+
+        SQLResharder(dialect="mysql", rows=1, shards=2, output_directory=self.directory).reshard(sql_content)
+        self.assertIn("INSERT INTO t VALUES (3) /* x */;", self.read("schema.sql"))
+        self.assertEqual(self.read("t.001.sql"), "INSERT INTO t VALUES (4);\n")
+
+    def test_trailing_line_comment(self):
+        sql_content = "SET NAMES utf8 -- charset\n;INSERT INTO t VALUES (1) -- tail\n;INSERT INTO t VALUES (2);"
+        self.assertEqual(
+            SQLResharder(dialect="mysql").format(sql_content),
+            "SET NAMES utf8 -- charset\n;\nINSERT INTO t VALUES (1) -- tail\n;\nINSERT INTO t VALUES (2);",
+        )
+
+        SQLResharder(dialect="mysql", shards=2, output_directory=self.directory).reshard(sql_content)
+        self.assertEqual(self.read("schema.sql"), "SET NAMES utf8 -- charset\n;\nINSERT INTO t VALUES (1) -- tail\n;\n")
+        self.assertEqual(self.read("t.001.sql"), "SET NAMES utf8 -- charset\n;\nINSERT INTO t VALUES (2);\n")
+
+    def test_table_name_with_separators(self):
+        SQLResharder(dialect="mysql", rows=1, output_directory=self.directory).reshard(
+            "INSERT INTO `../evil` VALUES (1);"
+        )
+
+        # The quoted name can't take its shard out of the output directory
+        self.assertEqual(sorted(os.listdir(self.directory)), [".._evil.001.sql", "schema.sql"])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "..", "evil.001.sql")))
+
+    def test_round_robin_shards(self):
+        SQLResharder(dialect="mysql", rows=2, shards=2, output_directory=self.directory).reshard(SQL)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ["schema.sql", "users.001.sql", "users.002.sql"])
+        self.assertEqual(self.read("users.001.sql"), (
+            "SET NAMES utf8;\n"
+            "INSERT INTO `users` VALUES (1,'a'),(3,'c');\n"
+            "INSERT INTO `users` VALUES (5,'e');\n"
+        ))
+        self.assertIn("INSERT INTO `users` (`name`, `id`) VALUES ('f',6);", self.read("users.002.sql"))
+        self.assertIn("ON DUPLICATE KEY UPDATE", self.read("schema.sql"))
+        self.assertNotIn("(1,'a')", self.read("schema.sql"))
+
+    def test_shard_by_column(self):
+        resharder = SQLResharder(dialect="mysql", shards=3, shard_by="ID", output_directory=self.directory)
+        resharder.reshard(SQL + SQL.replace("users", "users_copy"))
+
+        # A row goes to the same shard of either table, whatever its position
+        for shard in range(1, 4):
+            users = self.read(f"users.{shard:03}.sql").replace("INSERT INTO `users`", "")
+            self.assertEqual(users, self.read(f"users_copy.{shard:03}.sql").replace("INSERT INTO `users_copy`", ""))
+
+    def test_shard_by_short_row(self):
+        sql_content = "CREATE TABLE t (a INT, b INT);\nINSERT INTO t VALUES (1,2),(3),(4,5);\n"
+        with patch("sqlaxe.lib.sql_resharder.log") as log:
+            SQLResharder(dialect="mysql", shards=2, shard_by="b", output_directory=self.directory).reshard(sql_content)
+
+        # The row without a b value is spread round-robin, with a warning
+        rows = self.read("t.001.sql") + self.read("t.002.sql")
+        self.assertEqual(sorted(row for row in ("(1,2)", "(3)", "(4,5)") if row in rows), ["(1,2)", "(3)", "(4,5)"])
+        self.assertIn("has no b value", " ".join(str(call) for call in log.call_args_list))
+
+
+if __name__ == '__main__':
+    unittest.main()
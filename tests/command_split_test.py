@@ -53,6 +53,72 @@ class TestSQLSplitter(unittest.TestCase):
             content = file.read()
             self.assertIn("SELECT\n  *\nFROM table2;\n", content)
 
+    def test_split_interleaved_tables(self):
+        test_sql = "SELECT * FROM table1; SELECT * FROM table2; SELECT 1 FROM table1;"
+
+        self.splitter.split(test_sql)
+
+        self.assertEqual(
+            sorted(os.listdir(self.output_directory)),
+            ["0001_table1.sql", "0002_table2.sql", "0003_table1.sql"],
+        )
+
+    def test_split_group_by_table(self):
+        self.splitter = SQLSplitter(
+            dialect=self.dialect,
+            output_dialect=self.output_dialect,
+            output_directory=self.output_directory,
+            pretty=False,
+            group_by_table=True,
+            max_open_files=1,
+        )
+        test_sql = "SELECT * FROM table1; SELECT * FROM table2; SELECT 1 FROM table1;"
+
+        self.splitter.split(test_sql)
+
+        self.assertEqual(
+            sorted(os.listdir(self.output_directory)),
+            ["0001_table1.sql", "0002_table2.sql"],
+        )
+
+        with open(os.path.join(self.output_directory, "0001_table1.sql"), "r") as file:
+            self.assertEqual(file.read(), "SELECT * FROM table1;\nSELECT 1 FROM table1;\n")
+
+    def test_split_passes_original_text_through(self):
+        self.splitter = SQLSplitter(
+            dialect=self.dialect,
+            output_dialect=self.output_dialect,
+            output_directory=self.output_directory,
+            pretty=False,
+        )
+        test_sql = "insert  into `table1` values (1,'a;b');\n/*!40000 ALTER TABLE `table1` ENABLE KEYS */;"
+
+        self.splitter.split(test_sql)
+
+        self.assertEqual(
+            sorted(os.listdir(self.output_directory)),
+            ["0001_table1.sql", "0002_general.sql"],
+        )
+
+        with open(os.path.join(self.output_directory, "0001_table1.sql"), "r") as file:
+            self.assertEqual(file.read(), "insert  into `table1` values (1,'a;b');\n")
+
+    def test_split_trailing_line_comment(self):
+        self.splitter = SQLSplitter(
+            dialect=self.dialect,
+            output_dialect=self.output_dialect,
+            output_directory=self.output_directory,
+            pretty=False,
+        )
+        test_sql = "INSERT INTO table1 VALUES (1) -- note\n;\nINSERT INTO table1 VALUES (2);"
+
+        self.splitter.split(test_sql)
+
+        with open(os.path.join(self.output_directory, "0001_table1.sql"), "r") as file:
+            self.assertEqual(
+                file.read(), "INSERT INTO table1 VALUES (1) -- note\n;\nINSERT INTO table1 VALUES (2);\n"
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
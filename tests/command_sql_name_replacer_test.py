@@ -4,6 +4,7 @@ from unittest.mock import patch
 from sqlglot import Dialect
 from sqlglot.expressions import Table
 from sqlaxe.lib.sql_table_name_replacer import SQLTableNameReplacer
+from sqlaxe.lib.table_name_mapping import TableNameMapping
 
 
 class TestSQLTableNameReplacer(unittest.TestCase):
@@ -67,6 +68,32 @@ class TestSQLTableNameReplacer(unittest.TestCase):
             result, "SELECT\n  *\nFROM new_table1;\nSELECT\n  invalid AS sql;"
         )
 
+    def test_replace_with_mapping(self):
+        self.replacer = SQLTableNameReplacer(
+            dialect=self.dialect,
+            output_dialect=self.output_dialect,
+            pretty=False,
+            table_name_mapping=TableNameMapping(names={"users": "accounts"}),
+        )
+        sql_content = "SELECT users.id FROM users JOIN table1 ON 1 = 1;"
+        result = self.replacer.replace(sql_content)
+        self.assertEqual(result, "SELECT accounts.id FROM accounts JOIN table1 ON 1 = 1;")
+
+    def test_unchanged_statements_keep_original_text(self):
+        self.replacer.pretty = False
+        sql_content = "insert into `other` values (1,'a');\nselect *  from other;\ninsert into table1 values (2);"
+        result = self.replacer.replace(sql_content)
+        self.assertEqual(
+            result,
+            "insert into `other` values (1,'a');\nselect *  from other;\nINSERT INTO new_table1 VALUES (2);",
+        )
+
+    def test_unchanged_statements_trailing_line_comment(self):
+        self.replacer.pretty = False
+        sql_content = "insert into other values (1) -- note\n;\nselect 1 from other # note\n;\ninsert into other values (2);"
+        result = self.replacer.replace(sql_content)
+        self.assertEqual(result, sql_content)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -70,6 +70,30 @@ class TestSQLTableDrop(unittest.TestCase):
         result = self.table_drop.format(sql_content)
         self.assertEqual(result, "SELECT * FROM mytable;")
 
+    def test_format_passthrough(self):
+        self.table_drop = SQLTableDrop(
+            dialect=self.dialect, output_dialect=self.output_dialect, passthrough=True
+        )
+        sql_content = "create table if not exists `my table` (id int(11));\nCREATE VIEW v AS SELECT 1;"
+        result = self.table_drop.format(sql_content)
+        self.assertEqual(
+            result,
+            "DROP TABLE IF EXISTS `my table` CASCADE;\ncreate table if not exists `my table` (id int(11));\n"
+            "CREATE VIEW v AS SELECT 1;",
+        )
+
+    def test_format_passthrough_trailing_line_comment(self):
+        self.table_drop = SQLTableDrop(
+            dialect=self.dialect, output_dialect=self.output_dialect, passthrough=True
+        )
+        sql_content = "CREATE TABLE t (id INT) -- note\n;\nCREATE TABLE u (id INT);"
+        result = self.table_drop.format(sql_content)
+        self.assertEqual(
+            result,
+            "DROP TABLE IF EXISTS t CASCADE;\nCREATE TABLE t (id INT) -- note\n;\n"
+            "DROP TABLE IF EXISTS u CASCADE;\nCREATE TABLE u (id INT);",
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
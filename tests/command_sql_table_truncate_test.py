@@ -78,6 +78,70 @@ class TestSQLTableTruncate(unittest.TestCase):
         result = self.table_truncate.format(sql_content)
         self.assertEqual(result, 'SELECT\n  *\nFROM "mytable";')
 
+    def test_format_passthrough(self):
+        self.table_truncate = SQLTableTruncate(
+            dialect=self.dialect, output_dialect=self.output_dialect, passthrough=True
+        )
+        sql_content = (
+            "/*!40101 SET NAMES utf8 */;\ninsert into `db`.`MyTable` values (1,'a''b');\n"
+            "INSERT INTO db.mytable VALUES (2);\nSELECT 1;"
+        )
+        result = self.table_truncate.format(sql_content)
+        self.assertEqual(
+            result,
+            "/*!40101 SET NAMES utf8 */;\nTRUNCATE TABLE `db`.`MyTable`;\ninsert into `db`.`MyTable` values (1,'a''b');\n"
+            "INSERT INTO db.mytable VALUES (2);\nSELECT 1;",
+        )
+
+    def test_format_passthrough_trailing_line_comment(self):
+        self.table_truncate = SQLTableTruncate(
+            dialect=self.dialect, output_dialect=self.output_dialect, passthrough=True
+        )
+        sql_content = "INSERT INTO t VALUES (1) -- note\n;\nINSERT INTO t VALUES (2);\n-- Dump completed\n"
+        result = self.table_truncate.format(sql_content)
+        self.assertEqual(
+            result,
+            "TRUNCATE TABLE t;\nINSERT INTO t VALUES (1) -- note\n;\nINSERT INTO t VALUES (2);\n-- Dump completed",
+        )
+
+    def test_format_passthrough_delimiter(self):
+        self.table_truncate = SQLTableTruncate(
+            dialect=self.dialect, output_dialect=self.output_dialect, passthrough=True
+        )
+        sql_content = (
+            "DELIMITER ;;\nCREATE TRIGGER trg BEFORE INSERT ON t FOR EACH ROW BEGIN SET @a = 1; END ;;\n"
+            "DELIMITER ;\nINSERT INTO t VALUES (1);"
+        )
+        result = self.table_truncate.format(sql_content)
+        self.assertEqual(
+            result,
+            "DELIMITER ;;\nCREATE TRIGGER trg BEFORE INSERT ON t FOR EACH ROW BEGIN SET @a = 1; END;;\nDELIMITER ;\n"
+            "TRUNCATE TABLE t;\nINSERT INTO t VALUES (1);",
+        )
+
+    def test_format_passthrough_needs_matching_dialect(self):
+        self.table_truncate = SQLTableTruncate(dialect=self.dialect, output_dialect="postgres", passthrough=True)
+        result = self.table_truncate.format("insert into `t` values (1);")
+        self.assertEqual(result, 'TRUNCATE TABLE   "t";\nINSERT INTO "t"\nVALUES\n  (1);')
+
+    def test_schema_qualified_tables(self):
+        # The same table in two schemas is truncated in each
+        sql_content = "INSERT INTO db1.t VALUES (1); INSERT INTO db2.t (id) VALUES (2); INSERT INTO DB1.T VALUES (3);"
+
+        result = self.table_truncate.truncate(sql_content)
+        self.assertEqual([statement.sql() for statement in result if isinstance(statement, TruncateTable)],
+                         ["TRUNCATE TABLE db1.t", "TRUNCATE TABLE db2.t"])
+
+        expected = {
+            False: ['TRUNCATE TABLE   "db1"."t";', 'TRUNCATE TABLE   "db2"."t";'],
+            True: ["TRUNCATE TABLE db1.t;", "TRUNCATE TABLE db2.t;"],
+        }
+        for passthrough, truncates in expected.items():
+            table_truncate = SQLTableTruncate(dialect=self.dialect, output_dialect=self.output_dialect,
+                                              passthrough=passthrough)
+            result = table_truncate.format(sql_content).split("\n")
+            self.assertEqual([line for line in result if line.startswith("TRUNCATE")], truncates)
+
 
 if __name__ == "__main__":
     unittest.main()
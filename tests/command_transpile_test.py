@@ -0,0 +1,19 @@
+import unittest
+from sqlaxe.lib.sql_transpiler import SQLTranspiler
+
+class TestSQLTranspiler(unittest.TestCase):
+    def test_transpile_to_postgres(self):
+        transpiler = SQLTranspiler(dialect="mysql", output_dialect="postgres")
+        sql_content = "SELECT `id`, IFNULL(name, '') FROM users LIMIT 5, 10; INSERT INTO t VALUES (1, 'it''s');"
+        expected_output = (
+            "SELECT \"id\", COALESCE(name, '') FROM users LIMIT 10 OFFSET 5;\n"
+            "INSERT INTO t VALUES (1, 'it''s');"
+        )
+        self.assertEqual(transpiler.format(sql_content), expected_output)
+
+    def test_transpile_pretty(self):
+        transpiler = SQLTranspiler(dialect="mysql", pretty=True)
+        self.assertEqual(transpiler.transpile("select a from b"), ["SELECT\n  a\nFROM b;"])
+
+if __name__ == '__main__':
+    unittest.main()
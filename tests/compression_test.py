@@ -0,0 +1,62 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import tempfile
+import unittest
+
+from sqlaxe.lib.compression import (CompressedTextWriter, DecompressingReader, detect_compression, open_input,
+                                    open_output, strip_compression_suffix)
+from sqlaxe.lib.sql_reader import SQLReader
+
+SQL = "CREATE TABLE t (a INT);\nINSERT INTO t VALUES (1), (2);\nINSERT INTO t VALUES ('x;y');\n" * 50
+
+
+class TestCompression(unittest.TestCase):
+    def test_detects_magic_numbers(self):
+        for compress, expected in ((gzip.compress, "gzip"), (lzma.compress, "xz"), (bz2.compress, "bz2")):
+            source = io.BufferedReader(io.BytesIO(compress(SQL.encode())))
+            self.assertEqual(detect_compression(source), expected)
+            self.assertEqual(source.read(), compress(SQL.encode()))
+
+        self.assertIsNone(detect_compression(io.BufferedReader(io.BytesIO(SQL.encode()))))
+        self.assertEqual(strip_compression_suffix("dump.sql.gz"), "dump.sql")
+
+    def test_reads_compressed_statements(self):
+        for compress in (gzip.compress, lzma.compress, bz2.compress):
+            source = open_input(io.BufferedReader(io.BytesIO(compress(SQL.encode()))))
+            self.assertIsInstance(source, DecompressingReader)
+
+            statements = list(SQLReader(dialect="mysql", block_size=100).read(source))
+            self.assertEqual(statements, list(SQLReader(dialect="mysql").read(SQL)))
+            source.close()
+
+    def test_corrupt_input_raises(self):
+        source = DecompressingReader(io.BytesIO(gzip.compress(SQL.encode())[:40]), "gzip")
+        with self.assertRaises(EOFError):
+            source.read()
+
+    def test_output_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.sql.xz")
+            with open_output(path, "w", compression="xz") as output:
+                output.write("SELECT 1;\n")
+            with open_output(path, "a", compression="xz") as output:
+                output.write("SELECT 2;\n")
+
+            with lzma.open(path, "rt") as written:
+                self.assertEqual(written.read(), "SELECT 1;\nSELECT 2;\n")
+
+    def test_writer_leaves_target_open(self):
+        target = io.BytesIO()
+        output = CompressedTextWriter(target, "gzip", close_target=False)
+        output.write(SQL)
+        output.close()
+
+        self.assertFalse(target.closed)
+        self.assertEqual(gzip.decompress(target.getvalue()).decode(), SQL)
+
+
+if __name__ == "__main__":
+    unittest.main()
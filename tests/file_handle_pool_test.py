@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sqlaxe.lib.file_handle_pool import FileHandlePool
+
+
+class TestFileHandlePool(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def read(self, name):
+        with open(self.path(name)) as file:
+            return file.read()
+
+    def test_evicted_files_are_appended(self):
+        with FileHandlePool(max_open=2) as pool:
+            for index in range(3):
+                for name in ("a.sql", "b.sql", "c.sql"):
+                    pool.write(self.path(name), f"{name}:{index}\n")
+                self.assertLessEqual(len(pool.handles), 2)
+
+        self.assertEqual(self.read("b.sql"), "b.sql:0\nb.sql:1\nb.sql:2\n")
+
+    def test_existing_files_are_truncated(self):
+        with open(self.path("a.sql"), "w") as file:
+            file.write("stale\n")
+
+        with FileHandlePool() as pool:
+            pool.write(self.path("a.sql"), "fresh\n")
+
+        self.assertEqual(self.read("a.sql"), "fresh\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
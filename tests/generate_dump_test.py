@@ -0,0 +1,50 @@
+import io
+import unittest
+
+import sqlglot
+
+from benchmarks.generate_dump import generate_dump, parse_size
+from sqlaxe.lib.sql_reader import SQLReader
+
+
+class TestGenerateDump(unittest.TestCase):
+    def generate(self, **kwargs):
+        stream = io.BytesIO()
+        written = generate_dump(stream, **kwargs)
+        return stream.getvalue(), written
+
+    def test_output_is_deterministic(self):
+        first, _ = self.generate(size=20000, seed=3)
+        second, _ = self.generate(size=20000, seed=3)
+        other, _ = self.generate(size=20000, seed=4)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    def test_size_and_counts(self):
+        dump, written = self.generate(size=50000, tables=3, rows_per_insert=7)
+
+        self.assertEqual(written["bytes"], len(dump))
+        self.assertGreaterEqual(len(dump), 50000)
+        self.assertLess(len(dump), 60000)
+        self.assertEqual(dump.count(b"INSERT INTO"), written["inserts"])
+        self.assertEqual(written["rows"], written["inserts"] * 7)
+
+    def test_statements_parse(self):
+        for style, dialect in (("mysql", "mysql"), ("postgres", "postgres")):
+            dump, _ = self.generate(style=style, size=10000, tables=2, columns=7, rows_per_insert=3)
+            statements = list(SQLReader(dialect=dialect).read_statements(dump))
+            self.assertGreater(len(statements), 10)
+            for statement in statements:
+                sqlglot.parse(statement.text + ";", read=dialect)
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("512"), 512)
+        self.assertEqual(parse_size("64K"), 64 * 1024)
+        self.assertEqual(parse_size("1.5MB"), 1536 * 1024)
+        with self.assertRaises(ValueError):
+            parse_size("big")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from sqlaxe.lib.logger import RepeatFilter, configure_logging, log, log_queue, stop_logging
+
+
+class TestLogger(unittest.TestCase):
+    def test_repeat_filter_holds_back_repeats(self):
+        repeat_filter = RepeatFilter(burst=2, interval=3600)
+
+        def record(key):
+            record = logging.makeLogRecord({"msg": "parse failed"})
+            if key:
+                record.repeat_key = key
+            return record
+
+        passed = [repeat_filter.filter(record("parse error")) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(repeat_filter.filter(record(None)))
+        self.assertEqual(list(repeat_filter.summaries()), ["3 more parse error messages suppressed (5 in total)"])
+
+    def test_log_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_file = os.path.join(directory, "sqlaxe.log")
+
+            configure_logging(log_file=log_file, quiet=True)
+            log("streaming file")
+            for _ in range(20):
+                log("error during parsing", logging.WARNING, repeat_key="parse error")
+            stop_logging()
+
+            with open(log_file) as file:
+                lines = file.read().splitlines()
+
+        self.assertIn("INFO - test_log_file - streaming file", lines[0])
+        self.assertEqual(len(lines), 7)
+        self.assertTrue(lines[-1].endswith("15 more parse error messages suppressed (20 in total)"))
+
+    def test_log_queue_keeps_records_in_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_file = os.path.join(directory, "sqlaxe.log")
+
+            configure_logging(log_file=log_file, quiet=True)
+            log("before workers")
+            records = log_queue()
+            self.assertIs(log_queue(), records)
+            log("after workers")
+            stop_logging()
+
+            with open(log_file) as file:
+                lines = file.read().splitlines()
+
+        self.assertEqual([line.rsplit(" - ", 1)[1] for line in lines], ["before workers", "after workers"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import json
+import unittest
+
+from sqlaxe.lib.profiler import Profiler, disable_profiling, enable_profiling, profile_stage
+from sqlaxe.lib.sql_pretty_printer import SQLPrettyPrinter
+from sqlaxe.lib.sql_reader import SQLReader
+
+
+class TestProfiler(unittest.TestCase):
+    def tearDown(self):
+        disable_profiling()
+
+    def test_stages_of_a_run(self):
+        profiler = enable_profiling(slowest=2)
+        sql = "SELECT 1; INSERT INTO t VALUES (1, 'a'), (2, 'b'); SELECT 3;"
+        list(SQLPrettyPrinter(dialect="mysql", progress="none").iter_pretty_print_statements(sql))
+
+        summary = profiler.summary()
+        stages = summary["stages"]
+
+        self.assertEqual(list(stages)[:4], ["read", "tokenize", "parse", "generate"])
+        self.assertEqual(stages["parse"]["calls"], 3)
+        self.assertEqual(stages["statement"]["bytes"],
+                         sum(statement.end - statement.start for statement in SQLReader().read_statements(sql)))
+        self.assertEqual(len(stages["parse"]["slowest"]), 2)
+        for entry in stages["statement"]["slowest"]:
+            self.assertEqual(sql[entry["start"]:entry["end"]].strip(), entry["statement"])
+
+        self.assertEqual(json.loads(profiler.report("json"))["stages"]["parse"]["calls"], 3)
+        self.assertIn("slowest statements: parse", profiler.report("table"))
+
+    def test_disabled_timers_do_nothing(self):
+        disable_profiling()
+        with profile_stage("parse"):
+            pass
+
+        profiler = Profiler()
+        self.assertEqual(profiler.summary()["stages"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
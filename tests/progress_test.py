@@ -0,0 +1,43 @@
+import io
+import json
+import unittest
+
+from sqlaxe.lib.progress import Progress
+from sqlaxe.lib.sql_pretty_printer import SQLPrettyPrinter
+
+
+class TestProgress(unittest.TestCase):
+    def test_json_reports(self):
+        stream = io.StringIO()
+        with Progress(total=100, style="json", interval=0, stream=stream) as progress:
+            progress.update(40)
+            progress.update(90)
+
+        reports = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+        self.assertEqual([report["bytes"] for report in reports], [40, 90, 100])
+        self.assertEqual([report["statements"] for report in reports], [1, 2, 2])
+        self.assertEqual(reports[-1]["total_bytes"], 100)
+        self.assertTrue(reports[-1]["done"])
+        self.assertIsNone(reports[-1]["eta"])
+
+    def test_reports_are_throttled(self):
+        stream = io.StringIO()
+        with Progress(total=None, style="bar", interval=3600, stream=stream) as progress:
+            for position in range(1000):
+                progress.update(position)
+
+        self.assertEqual(stream.getvalue().count("\r"), 1)
+        self.assertIn("1000 statements", stream.getvalue())
+
+    def test_none_is_silent(self):
+        stream = io.StringIO()
+        SQLPrettyPrinter(dialect="mysql", progress="none").format("SELECT 1; SELECT 2;")
+        with Progress(total=10, style="none", interval=0, stream=stream) as progress:
+            progress.update(5)
+
+        self.assertEqual(stream.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
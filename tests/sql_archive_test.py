@@ -0,0 +1,71 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+from sqlaxe.lib.batch import open_sql_file
+from sqlaxe.lib.sql_archive import MANIFEST_NAME, SQLArchive
+from sqlaxe.lib.sql_splitter import SQLSplitter
+
+SQL = (
+    "CREATE TABLE users (id INT);\n"
+    "INSERT INTO users VALUES (1);\n"
+    "INSERT INTO orders VALUES (1, 'a;b');\n"
+    "INSERT INTO users VALUES (2);\n"
+)
+
+
+class TestSQLArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def split(self, name, **kwargs):
+        path = os.path.join(self.directory, name)
+        splitter = SQLSplitter(dialect="mysql", output_dialect=None, output_directory=None, pretty=False,
+                               archive=path, **kwargs)
+        splitter.split(SQL)
+        return path
+
+    def test_sections_and_manifest(self):
+        path = self.split("dump.tar")
+
+        with tarfile.open(path) as tar:
+            self.assertEqual(tar.getnames(), ["0001_users.sql", "0002_orders.sql", "0003_users.sql", MANIFEST_NAME])
+            users = tar.extractfile("0003_users.sql").read()
+        self.assertEqual(os.listdir(self.directory), ["dump.tar"])
+
+        archive = SQLArchive(path)
+        self.assertEqual([(entry["section"], entry["table"], entry["statements"]) for entry in archive.sections],
+                         [(1, "users", 2), (2, "orders", 1), (3, "users", 1)])
+        self.assertEqual(b"".join(archive.iter_blocks(archive.find("3"))), users)
+        self.assertEqual([entry["bytes"] for entry in archive.sections], [entry["size"] for entry in archive.sections])
+        self.assertEqual([entry["section"] for entry in archive.find("users")], [1, 3])
+
+        with open_sql_file(path) as sql_file:
+            self.assertEqual(sql_file.read().decode(), SQL)
+
+    def test_compressed_grouped_sections(self):
+        path = self.split("dump.tar", group_by_table=True, compression="gzip")
+
+        archive = SQLArchive(path)
+        self.assertEqual([entry["name"] for entry in archive.sections], ["0001_users.sql.gz", "0002_orders.sql.gz"])
+        self.assertEqual(b"".join(archive.iter_blocks(archive.find("orders"))),
+                         b"INSERT INTO orders VALUES (1, 'a;b');\n")
+
+    def test_checksum_mismatch(self):
+        path = self.split("dump.tar")
+        entry = SQLArchive(path).find("orders")[0]
+        with open(path, "r+b") as file:
+            file.seek(entry["offset"])
+            file.write(b"X")
+
+        with self.assertRaises(ValueError):
+            b"".join(SQLArchive(path).iter_blocks())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from sqlaxe.lib.sql_boundary_scanner import SQLBoundaryScanner
+from sqlaxe.lib.sql_reader import SQLReader
+
+
+class TestSQLBoundaryScanner(unittest.TestCase):
+    def scan(self, dialect, data):
+        scanner = SQLBoundaryScanner(dialect=dialect)
+        return [data[start:end] for start, end in scanner.scan(data)]
+
+    def scan_in_blocks(self, dialect, data, block_size):
+        scanner = SQLBoundaryScanner(dialect=dialect)
+        blocks = (data[i:i + block_size] for i in range(0, len(data), block_size))
+        return [statement for _, _, statement in scanner.scan_blocks(blocks)]
+
+    def test_ranges(self):
+        data = b"SELECT 1;\n  SELECT 'a;b';\n"
+        scanner = SQLBoundaryScanner(dialect="mysql")
+        self.assertEqual(list(scanner.scan(data)), [(0, 8), (12, 24)])
+
+    def test_delimiter_directive(self):
+        data = (
+            b"SET @x = 1;\n"
+            b"DELIMITER ;;\n"
+            b"CREATE TRIGGER t BEFORE INSERT ON a FOR EACH ROW BEGIN SET @a = 1; END ;;\n"
+            b"DELIMITER ;\n"
+            b"SELECT 1;\n"
+        )
+        expected = [
+            b"SET @x = 1",
+            b"CREATE TRIGGER t BEFORE INSERT ON a FOR EACH ROW BEGIN SET @a = 1; END",
+            b"SELECT 1",
+        ]
+        self.assertEqual(self.scan("mysql", data), expected)
+        for block_size in range(1, 16):
+            self.assertEqual(self.scan_in_blocks("mysql", data, block_size), expected)
+
+    def test_dollar_quoting(self):
+        data = (
+            b"CREATE FUNCTION f() RETURNS INT AS $body$ SELECT 1; $body$ LANGUAGE sql;"
+            b" SELECT $$a;b$$; SELECT $1;"
+        )
+        expected = [
+            b"CREATE FUNCTION f() RETURNS INT AS $body$ SELECT 1; $body$ LANGUAGE sql",
+            b"SELECT $$a;b$$",
+            b"SELECT $1",
+        ]
+        self.assertEqual(self.scan("postgres", data), expected)
+        for block_size in range(1, 16):
+            self.assertEqual(self.scan_in_blocks("postgres", data, block_size), expected)
+
+    def test_longer_quote_tokens(self):
+        data = b"SELECT '''a';b''', '', 'c;d'; SELECT 2;"
+        expected = [b"SELECT '''a';b''', '', 'c;d'", b"SELECT 2"]
+        self.assertEqual(self.scan("bigquery", data), expected)
+        for block_size in range(1, 16):
+            self.assertEqual(self.scan_in_blocks("bigquery", data, block_size), expected)
+
+    def test_comment_only_statement(self):
+        data = b"/*!40101 SET NAMES utf8 */;\nSELECT 1;"
+        self.assertEqual(self.scan("mysql", data), [b"/*!40101 SET NAMES utf8 */", b"SELECT 1"])
+
+    def test_reader_maps_files(self):
+        data = b"SELECT 'a;b';\nDELIMITER //\nSELECT 2//\n"
+        with tempfile.NamedTemporaryFile(suffix=".sql", delete=False) as handle:
+            handle.write(data)
+        try:
+            with open(handle.name, "rb") as sql_file:
+                statements = list(SQLReader(dialect="mysql").read_statements(sql_file))
+        finally:
+            os.unlink(handle.name)
+
+        self.assertEqual([statement.text for statement in statements], ["SELECT 'a;b'", "SELECT 2"])
+        self.assertEqual([(statement.start, statement.end) for statement in statements], [(0, 12), (27, 35)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlaxe.lib.sql_cache import SQLCache
+from sqlaxe.lib.sql_parser import SQLParser
+from sqlaxe.lib.sql_pretty_printer import SQLPrettyPrinter
+from sqlaxe.lib.sql_table_drop import SQLTableDrop
+from sqlaxe.lib.sql_table_truncate import SQLTableTruncate
+
+
+class TestSQLCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = SQLCache(directory=self.directory.name)
+        self.sql_content = "".join(f"INSERT INTO table{i % 3} (id) VALUES ({i}, 'a;{i}');" for i in range(20))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def entries(self):
+        return [name for name in os.listdir(self.directory.name) if name.endswith(".pickle")]
+
+    def test_second_run_loads_parsed_statements(self):
+        expected = SQLPrettyPrinter(dialect="mysql").format(self.sql_content)
+
+        first = SQLPrettyPrinter(dialect="mysql", cache=self.cache).format(self.sql_content)
+        self.assertEqual(len(self.entries()), 1)
+
+        pretty_printer = SQLPrettyPrinter(dialect="mysql", cache=self.cache)
+        # Statements come from the cached byte ranges, so the input is not scanned again
+        pretty_printer.sql_parser.sql_reader.scanner = None
+        second = pretty_printer.format(self.sql_content)
+
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+
+    def test_entries_are_shared_between_commands(self):
+        SQLPrettyPrinter(dialect="mysql", error_level=None, cache=self.cache).format(self.sql_content)
+        SQLTableTruncate(dialect="mysql", output_dialect=None, cache=self.cache).format(self.sql_content)
+        SQLTableTruncate(dialect="mysql", output_dialect=None, cache=self.cache).format(self.sql_content)
+
+        # The truncate command parses with a different error level
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_first_run_uses_parsed_expressions(self):
+        # Statements parsed to fill the cache aren't loaded back from their pickles
+        with patch("sqlaxe.lib.sql_parser.pickle.loads", side_effect=pickle.loads) as loads:
+            SQLPrettyPrinter(dialect="mysql", cache=self.cache).format(self.sql_content)
+            self.assertEqual(loads.call_count, 0)
+
+            SQLPrettyPrinter(dialect="mysql", cache=self.cache).format(self.sql_content)
+            self.assertEqual(loads.call_count, 20)
+
+    def test_passthrough_skips_cache(self):
+        SQLTableTruncate(dialect="mysql", output_dialect=None, passthrough=True, cache=self.cache).format(
+            self.sql_content)
+        SQLTableDrop(dialect="mysql", passthrough=True, cache=self.cache).drop_table(self.sql_content)
+        self.assertEqual(self.entries(), [])
+
+    def test_statements_keep_their_delimiter(self):
+        sql_content = "DELIMITER ;;\nCREATE PROCEDURE p() BEGIN SELECT 1; END ;;\nDELIMITER ;\nSELECT 2;"
+
+        for _ in range(2):
+            sql_parser = SQLParser(dialect="mysql", cache=self.cache)
+            delimiters = list(sql_parser.map_statements(sql_content, lambda statement: statement.delimiter))
+            self.assertEqual(delimiters, [";;", ";"])
+        self.assertEqual(len(self.entries()), 1)
+
+    def test_eviction_keeps_cache_under_max_size(self):
+        self.cache.max_size = 1
+        SQLPrettyPrinter(dialect="mysql", cache=self.cache).format(self.sql_content)
+
+        self.assertEqual(self.entries(), [])
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
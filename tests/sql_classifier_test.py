@@ -0,0 +1,69 @@
+import unittest
+
+from sqlglot import parse_one
+from sqlglot.expressions import Table
+from sqlaxe.lib.sql_classifier import SQLClassifier, StatementInfo
+
+
+class TestSQLClassifier(unittest.TestCase):
+    def setUp(self):
+        self.classifier = SQLClassifier(dialect="mysql")
+
+    def test_mysqldump_statements(self):
+        self.assertEqual(
+            self.classifier.classify("INSERT INTO `db`.`users` VALUES (1,'a;b')"),
+            StatementInfo("insert", "users"),
+        )
+        self.assertEqual(
+            self.classifier.classify("/* dump */\nCREATE TABLE IF NOT EXISTS `users` (id int)"),
+            StatementInfo("create_table", "users"),
+        )
+        self.assertEqual(
+            self.classifier.classify("DROP TABLE IF EXISTS `users`"),
+            StatementInfo("drop_table", "users"),
+        )
+        self.assertEqual(self.classifier.classify("LOCK TABLES `users` WRITE"), StatementInfo("lock", "users"))
+        self.assertEqual(self.classifier.classify("UNLOCK TABLES"), StatementInfo("unlock", None))
+        self.assertEqual(self.classifier.classify("/*!40101 SET NAMES utf8 */"), StatementInfo("other", None))
+        self.assertEqual(self.classifier.classify("-- nothing else"), StatementInfo("comment", None))
+
+    def test_agrees_with_parser(self):
+        statements = [
+            "INSERT IGNORE INTO t1 (a) VALUES (1)",
+            "CREATE TABLE t1 (id INT, FOREIGN KEY (id) REFERENCES t2 (id))",
+            "CREATE INDEX idx ON t1 (a)",
+            "UPDATE t1 SET a = 1 WHERE b IN (SELECT b FROM t2)",
+            "DELETE FROM t1 WHERE a = 1",
+            "TRUNCATE TABLE t1",
+        ]
+        for statement in statements:
+            self.assertEqual(
+                self.classifier.classify(statement).table,
+                parse_one(statement, read="mysql").find(Table).name,
+            )
+
+    def test_ambiguous_statements_are_left_to_the_parser(self):
+        self.assertEqual(self.classifier.classify("UPDATE t1 JOIN t2 ON t1.a = t2.a SET t1.b = 1").table, None)
+        self.assertEqual(self.classifier.classify("DELETE FROM t1, t2 USING t1").table, None)
+
+    def test_dialect_identifier_quotes(self):
+        classifier = SQLClassifier(dialect="postgres")
+        self.assertEqual(
+            classifier.classify('COPY public."My ""Table""" (a) FROM stdin'),
+            StatementInfo("copy", 'My "Table"'),
+        )
+
+    def test_terminate(self):
+        self.assertEqual(self.classifier.terminate("SELECT 1"), "SELECT 1;")
+        self.assertEqual(self.classifier.terminate("SELECT '-- not a comment'"), "SELECT '-- not a comment';")
+        self.assertEqual(self.classifier.terminate("SELECT 1 -- note"), "SELECT 1 -- note\n;")
+        self.assertEqual(self.classifier.terminate("SELECT 1 # note"), "SELECT 1 # note\n;")
+        self.assertEqual(self.classifier.terminate("SELECT 1 -- note\n/* done */"), "SELECT 1 -- note\n/* done */;")
+        self.assertEqual(
+            self.classifier.terminate("BEGIN -- note", delimiter=";;"), "DELIMITER ;;\nBEGIN -- note\n;;\nDELIMITER ;"
+        )
+        self.assertEqual(self.classifier.terminate("-- Dump completed"), "-- Dump completed")
+
+
+if __name__ == "__main__":
+    unittest.main()
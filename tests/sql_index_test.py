@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sqlaxe.lib.sql_grep import SQLGrep
+from sqlaxe.lib.sql_index import SQLIndex, index_path
+from sqlaxe.lib.sql_indexer import SQLIndexer
+
+SQL = (
+    "CREATE TABLE users (id INT);\n"
+    "INSERT INTO users VALUES (1);\n"
+    "INSERT INTO orders VALUES (1, 'a;b');\n"
+    "SELECT * FROM users JOIN orders ON users.id = orders.user_id;\n"
+    "INSERT INTO users VALUES (2);\n"
+)
+
+
+class TestSQLIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "dump.sql")
+        with open(self.path, "w") as file:
+            file.write(SQL)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def grep(self, **kwargs):
+        grep = SQLGrep(pattern="", invert=False, dialect="mysql", output_dialect=None, **kwargs)
+        with open(self.path, "rb") as sql_file:
+            return list(grep.iter_matches(sql_file))
+
+    def test_build_and_read(self):
+        self.assertEqual(SQLIndexer(dialect="mysql").build(self.path), 5)
+
+        index = SQLIndex(index_path(self.path))
+        entries = list(index.entries())
+        self.assertEqual([(entry.kind, entry.tables) for entry in entries], [
+            ("create_table", ("users",)), ("insert", ("users",)), ("insert", ("orders",)),
+            ("select", ("users", "orders")), ("insert", ("users",)),
+        ])
+        self.assertEqual(SQL.encode()[entries[2].start:entries[2].end], b"INSERT INTO orders VALUES (1, 'a;b')")
+
+        with open(self.path, "rb") as sql_file:
+            self.assertIs(type(SQLIndex.find(sql_file, "mysql")), SQLIndex)
+            self.assertIsNone(SQLIndex.find(sql_file, "postgres"))
+            statements = list(index.read_statements(sql_file, lambda entry: "orders" in entry.tables))
+        self.assertEqual([statement.start for statement in statements], [entries[2].start, entries[3].start])
+
+    def test_delimiters(self):
+        with open(self.path, "w") as file:
+            file.write("DELIMITER ;;\nCREATE TRIGGER trg BEFORE INSERT ON users FOR EACH ROW SET @a = 1; ;;\n"
+                       "DELIMITER ;\nINSERT INTO users VALUES (1);\n")
+        SQLIndexer(dialect="mysql").build(self.path)
+
+        index = SQLIndex(index_path(self.path))
+        with open(self.path, "rb") as sql_file:
+            statements = [statement.text for statement in index.read_statements(sql_file)]
+        self.assertEqual([getattr(statement, "delimiter", ";") for statement in statements], [";;", ";"])
+
+    def test_grep_reads_only_indexed_statements(self):
+        expected = self.grep(table="users", kind="insert")
+        SQLIndexer(dialect="mysql").build(self.path)
+
+        # Change a statement grep has no reason to read, keeping the size and
+        # modification time: a full read would see it, the index skips it
+        file_stat = os.stat(self.path)
+        with open(self.path, "r+b") as file:
+            file.seek(SQL.index("'a;b'"))
+            file.write(b"'x;y'")
+        os.utime(self.path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+
+        self.assertEqual(self.grep(table="users", kind="insert"), expected)
+        self.assertEqual(len(expected), 2)
+
+        # Once the modification time changes, the index is ignored
+        os.utime(self.path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10 ** 9))
+        self.assertIn("'x;y'", "".join(self.grep(table="orders")))
+
+
+if __name__ == "__main__":
+    unittest.main()
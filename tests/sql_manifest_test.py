@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from sqlaxe.lib.sql_manifest import MANIFEST_NAME, SQLLoadPlan
+from sqlaxe.lib.sql_splitter import SQLSplitter
+
+SQL = (
+    "SET FOREIGN_KEY_CHECKS=0;\n"
+    "CREATE TABLE `users` (`id` INT, PRIMARY KEY (`id`));\n"
+    "/*!40000 ALTER TABLE `users` DISABLE KEYS */;\n"
+    "INSERT INTO `users` VALUES (1),(2),(3);\n"
+    "CREATE TABLE `orders` (`id` INT, `user_id` INT, FOREIGN KEY (`user_id`) REFERENCES `users` (`id`));\n"
+    "INSERT INTO `orders` VALUES (1,1),(2,'a),(b');\n"
+    "CREATE TABLE `tags` (`id` INT);\n"
+    "CREATE INDEX `tag_id` ON `tags` (`id`);\n"
+)
+
+
+class TestSQLManifest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        splitter = SQLSplitter(dialect="mysql", output_dialect=None, output_directory=self.directory, pretty=False,
+                               manifest=True)
+        splitter.split(SQL)
+        with open(os.path.join(self.directory, MANIFEST_NAME)) as file:
+            self.manifest = json.load(file)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_files(self):
+        files = {entry["file"]: entry for entry in self.manifest["files"]}
+        self.assertEqual(list(files), ["0001_general.sql", "0002_users.sql", "0003_general.sql",
+                                       "0004_users.sql", "0005_orders.sql", "0006_tags.sql"])
+        self.assertEqual([entry["kind"] for entry in files.values()],
+                         ["session", "ddl", "general", "data", "mixed", "mixed"])
+        self.assertEqual(files["0006_tags.sql"]["kinds"], {"ddl": 1, "index": 1})
+
+        with open(os.path.join(self.directory, "0005_orders.sql"), "rb") as file:
+            data = file.read()
+        self.assertEqual(files["0005_orders.sql"]["bytes"], len(data))
+        self.assertEqual(files["0005_orders.sql"]["sha256"], hashlib.sha256(data).hexdigest())
+
+        self.assertEqual(self.manifest["tables"]["users"], {"files": ["0002_users.sql", "0004_users.sql"], "rows": 3})
+        self.assertEqual(self.manifest["tables"]["orders"]["rows"], 2)
+
+    def test_trailing_line_comment(self):
+        directory = os.path.join(self.directory, "comments")
+        splitter = SQLSplitter(dialect="mysql", output_dialect=None, output_directory=directory, pretty=False,
+                               manifest=True)
+        splitter.split("INSERT INTO `users` VALUES (1) -- note\n;\nINSERT INTO `users` VALUES (2);\n")
+        with open(os.path.join(directory, MANIFEST_NAME)) as file:
+            entry = json.load(file)["files"][0]
+
+        with open(os.path.join(directory, entry["file"]), "rb") as file:
+            data = file.read()
+        self.assertEqual(data, b"INSERT INTO `users` VALUES (1) -- note\n;\nINSERT INTO `users` VALUES (2);\n")
+        self.assertEqual(entry["bytes"], len(data))
+        self.assertEqual(entry["sha256"], hashlib.sha256(data).hexdigest())
+        self.assertEqual(entry["rows"], 2)
+
+    def test_load_plan(self):
+        plan = SQLLoadPlan(self.directory)
+
+        # orders waits for users, through its foreign key; tags waits for nothing
+        self.assertEqual(plan.stages(), [
+            ["0001_general.sql", "0002_users.sql", "0006_tags.sql"],
+            ["0003_general.sql"],
+            ["0004_users.sql"],
+            ["0005_orders.sql"],
+        ])
+        self.assertIn("SELECT 'users' AS table_name, COUNT(*) AS row_count, 3 AS expected FROM `users`;",
+                      list(plan.verification_queries()))
+
+
+if __name__ == "__main__":
+    unittest.main()
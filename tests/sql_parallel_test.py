@@ -0,0 +1,41 @@
+import unittest
+
+from sqlaxe.lib.sql_parallel import imap_ordered, resolve_jobs
+from sqlaxe.lib.sql_pretty_printer import SQLPrettyPrinter
+from sqlaxe.lib.sql_table_truncate import SQLTableTruncate
+
+
+def square(value):
+    return value * value
+
+
+class TestSQLParallel(unittest.TestCase):
+    def test_resolve_jobs(self):
+        self.assertEqual(resolve_jobs(3), 3)
+        self.assertGreaterEqual(resolve_jobs(0), 1)
+
+    def test_imap_ordered_keeps_order(self):
+        values = range(1000)
+        result = list(imap_ordered(square, values, jobs=3, batch_size=7))
+        self.assertEqual(result, [value * value for value in values])
+
+    def test_pretty_print_matches_single_process(self):
+        sql_content = "".join(f"INSERT INTO table{i % 3} VALUES ({i}, 'a;{i}');" for i in range(50))
+
+        single = SQLPrettyPrinter(dialect="mysql", output_dialect="mysql").format(sql_content)
+        parallel = SQLPrettyPrinter(dialect="mysql", output_dialect="mysql", jobs=3).format(sql_content)
+
+        self.assertEqual(parallel, single)
+
+    def test_truncate_matches_single_process(self):
+        sql_content = "".join(f"INSERT INTO table{i % 3} (id) VALUES ({i});" for i in range(50))
+
+        single = SQLTableTruncate(dialect="mysql", output_dialect="mysql").format(sql_content)
+        parallel = SQLTableTruncate(dialect="mysql", output_dialect="mysql", jobs=3).format(sql_content)
+
+        self.assertEqual(parallel, single)
+        self.assertEqual(parallel.count("TRUNCATE TABLE"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import io
+import pickle
+import unittest
+
+from sqlaxe.lib.sql_reader import SQLReader
+
+
+class TestSQLReader(unittest.TestCase):
+    def setUp(self):
+        self.reader = SQLReader(dialect="mysql")
+
+    def test_read_string(self):
+        sql_content = "SELECT 1; SELECT 2;\n"
+        self.assertEqual(list(self.reader.read(sql_content)), ["SELECT 1", "SELECT 2"])
+
+    def test_read_without_trailing_semicolon(self):
+        sql_content = "SELECT 1; SELECT 2"
+        self.assertEqual(list(self.reader.read(sql_content)), ["SELECT 1", "SELECT 2"])
+
+    def test_semicolons_in_quotes_and_comments(self):
+        sql_content = (
+            "INSERT INTO t VALUES ('a;b', 'it\\'s;'); "
+            "SELECT `x;y` FROM t; -- note;\n"
+            "/* block; */ SELECT \"q;\"; # hash;\nSELECT 3;"
+        )
+        self.assertEqual(
+            list(self.reader.read(sql_content)),
+            [
+                "INSERT INTO t VALUES ('a;b', 'it\\'s;')",
+                "SELECT `x;y` FROM t",
+                "-- note;\n/* block; */ SELECT \"q;\"",
+                "# hash;\nSELECT 3",
+            ],
+        )
+
+    def test_tokens_across_block_boundaries(self):
+        sql_content = (
+            "INSERT INTO t VALUES ('a;b', 'c\\';d'); /* x; */ SELECT 1; -- y;\nSELECT 2;"
+        )
+        expected = list(self.reader.read(sql_content))
+
+        for block_size in range(1, 12):
+            reader = SQLReader(dialect="mysql", block_size=block_size)
+            statements = list(reader.read(io.BytesIO(sql_content.encode())))
+            self.assertEqual(statements, expected)
+
+    def test_text_file(self):
+        statements = list(self.reader.read(io.StringIO("SELECT 'é'; SELECT 2;")))
+        self.assertEqual(statements, ["SELECT 'é'", "SELECT 2"])
+
+    def test_dialect_escapes(self):
+        # Postgres strings do not use backslash escapes, so the quote closes.
+        reader = SQLReader(dialect="postgres")
+        statements = list(reader.read("SELECT 'a\\'; SELECT 2;"))
+        self.assertEqual(statements, ["SELECT 'a\\'", "SELECT 2"])
+
+    def test_delimiter_directive(self):
+        sql_content = "SELECT 1;\nDELIMITER ;;\nCREATE TRIGGER t BEFORE INSERT ON a SET @x = 1; ;;\nDELIMITER ;\nSELECT 2;"
+        statements = list(self.reader.read(sql_content))
+        self.assertEqual(statements, ["SELECT 1", "CREATE TRIGGER t BEFORE INSERT ON a SET @x = 1;", "SELECT 2"])
+        self.assertEqual([getattr(statement, "delimiter", ";") for statement in statements], [";", ";;", ";"])
+
+        # The delimiter survives the trip to a worker process
+        self.assertEqual(pickle.loads(pickle.dumps(statements[1])).delimiter, ";;")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+from sqlaxe.lib.sql_row_scanner import SQLRowScanner
+
+
+class TestSQLRowScanner(unittest.TestCase):
+    def test_rows_and_values(self):
+        scanner = SQLRowScanner(dialect="mysql")
+        text = "VALUES (1,'a),(\\'b',\"c)\"), ( 2, 'it''s', /* ) */ f(3, 4)) ,(3,`x,y`) ON DUPLICATE KEY UPDATE a = 1"
+
+        rows = list(scanner.iter_rows(text, len("VALUES")))
+        self.assertEqual([text[start:end] for start, end in rows],
+                         ["(1,'a),(\\'b',\"c)\")", "( 2, 'it''s', /* ) */ f(3, 4))", "(3,`x,y`)"])
+        self.assertEqual(text[rows[-1][1]:], " ON DUPLICATE KEY UPDATE a = 1")
+        self.assertEqual(scanner.values(text, *rows[1]), ["2", "'it''s'", "/* ) */ f(3, 4)"])
+
+    def test_unclosed_row(self):
+        with self.assertRaises(ValueError):
+            list(SQLRowScanner(dialect="mysql").iter_rows("(1, 'a)"))
+
+
+if __name__ == '__main__':
+    unittest.main()
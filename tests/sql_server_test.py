@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from sqlaxe.lib.sql_server import (INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, RequestError, SQLClient,
+                                   SQLService, SQLSocketServer, remove_stale_socket, serve_stream)
+
+
+class TestSQLServer(unittest.TestCase):
+    def test_requests_reuse_commands(self):
+        service = SQLService()
+
+        result = service.call("pp", {"sql": "select a from b; select 2", "dialect": "mysql"})
+        self.assertEqual(result, {"statements": ['SELECT\n  "a"\nFROM "b";', "SELECT\n  2;"]})
+        command = next(iter(service.commands.values()))
+
+        service.call("pp", {"sql": "select 1", "dialect": "mysql"})
+        self.assertEqual(len(service.commands), 1)
+        self.assertIs(next(iter(service.commands.values())), command)
+
+        result = service.call("transpile", {"sql": "select ifnull(a, 1) from b limit 1, 2",
+                                            "output_dialect": "postgres"})
+        self.assertEqual(result["statements"], ["SELECT COALESCE(a, 1) FROM b LIMIT 2 OFFSET 1;"])
+
+        result = service.call("grep", {"sql": "select 1; select x from users", "table": "users"})
+        self.assertEqual(result["statements"], ['SELECT\n  "x"\nFROM "users";'])
+
+    def test_errors(self):
+        service = SQLService()
+        lines = [
+            "not json",
+            json.dumps({"jsonrpc": "2.0", "id": 1, "method": "nope"}),
+            json.dumps({"jsonrpc": "2.0", "id": 2, "method": "pp", "params": {"sql": "select 1", "bogus": 1}}),
+            json.dumps({"jsonrpc": "2.0", "id": 3, "method": "pp", "params": {"sql": "select 1", "dialect": "x"}}),
+            json.dumps({"jsonrpc": "2.0", "method": "pp", "params": {"sql": "select 1"}}),
+            json.dumps({"jsonrpc": "2.0", "id": 4, "method": "shutdown"}),
+            json.dumps({"jsonrpc": "2.0", "id": 5, "method": "pp", "params": {"sql": "select 1"}}),
+        ]
+        output = io.StringIO()
+        serve_stream(service, io.StringIO("\n".join(lines) + "\n"), output)
+
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([response.get("error", {}).get("code") for response in responses],
+                         [PARSE_ERROR, METHOD_NOT_FOUND, INVALID_PARAMS, INVALID_PARAMS, None])
+        self.assertEqual(responses[-1], {"jsonrpc": "2.0", "id": 4, "result": None})
+
+    def test_socket_and_fallback(self):
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, "sqlaxe.sock")
+
+            with SQLClient(socket_path) as client:
+                self.assertEqual(client.call("transpile", sql="select 1")["statements"], ["SELECT 1;"])
+                self.assertIsNone(client.connection)
+            with self.assertRaises(ConnectionRefusedError):
+                SQLClient(socket_path, fallback=False).call("ping")
+
+            server = SQLSocketServer(socket_path, SQLService())
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                with SQLClient(socket_path, timeout=30) as client:
+                    self.assertEqual(client.call("transpile", sql="select 1")["statements"], ["SELECT 1;"])
+                    self.assertIsNotNone(client.connection)
+                    with self.assertRaises(RequestError):
+                        client.call("pp", sql="select 1", dialect="nodialect")
+                    client.call("shutdown")
+                thread.join(30)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            self.assertFalse(thread.is_alive())
+            self.assertFalse(os.path.exists(socket_path))
+
+    def test_remove_stale_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, "sqlaxe.sock")
+
+            stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            stale.bind(socket_path)
+            stale.close()
+            remove_stale_socket(socket_path)
+            self.assertFalse(os.path.exists(socket_path))
+
+            # A file given as the socket by mistake is left alone
+            with open(socket_path, "w") as file:
+                file.write("not a socket")
+            with self.assertRaises(OSError):
+                remove_stale_socket(socket_path)
+            with self.assertRaises(OSError):
+                SQLSocketServer(socket_path, SQLService())
+            self.assertTrue(os.path.isfile(socket_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from sqlaxe.lib.sql_splitter import SQLSplitter
+from sqlaxe.lib.sql_transpiler import SQLTranspiler
+
+SQL = (
+    "INSERT INTO `users` (`id`, `name`) VALUES (1, 'ann');\n"
+    "INSERT INTO `users` (`id`, `name`) VALUES (2, 'it\\'s'), (-3, \"a\\\\b\");\n"
+    "INSERT INTO `users` (`id`, `name`) VALUES (4, NULL), (5, 'line\\nbreak'), (6, 'x');\n"
+    "INSERT INTO `users` (`id`, `name`) VALUES (7, TRUE), (8, 'y') ON DUPLICATE KEY UPDATE name = 'z';\n"
+    "SELECT IFNULL(a, 1) FROM b;\n"
+)
+
+
+class TestSQLTemplateCache(unittest.TestCase):
+    def transpile(self, output_dialect, templates):
+        transpiler = SQLTranspiler(dialect="mysql", output_dialect=output_dialect, templates=templates)
+        return transpiler, transpiler.transpile(SQL)
+
+    def test_same_as_generated(self):
+        for output_dialect in ["postgres", "tsql", "sqlite", "bigquery"]:
+            transpiler, templated = self.transpile(output_dialect, True)
+            self.assertEqual(templated, self.transpile(output_dialect, False)[1], output_dialect)
+            self.assertGreater(transpiler.template_cache.hits, 0, output_dialect)
+
+    def test_literals(self):
+        transpiler, statements = self.transpile("postgres", True)
+
+        # The second statement's rows have the shape of the first one's row,
+        # and their literals are escaped for postgres
+        self.assertEqual((transpiler.template_cache.hits, transpiler.template_cache.misses), (1, 4))
+        self.assertEqual(statements[1], "INSERT INTO \"users\" (\"id\", \"name\") VALUES (2, 'it''s'), (-3, 'a\\b');")
+
+    def test_pretty(self):
+        transpiler = SQLTranspiler(dialect="mysql", output_dialect="postgres", pretty=True)
+        self.assertIsNone(transpiler.template_cache)
+
+    def test_split(self):
+        splitter = SQLSplitter(dialect="mysql", output_dialect="postgres", output_directory=None, pretty=False)
+        for statement in SQL.split(";\n")[:2]:
+            [(kind, _)] = splitter.split_statement(statement)
+            self.assertEqual(kind, "users")
+        self.assertEqual(splitter.template_cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+PACKAGE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the command line in a fresh interpreter and prints the modules it loaded
+RUN_COMMAND = """
+import json, sys
+from sqlaxe.sqlaxe import main
+try:
+    main(sys.argv[1:])
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)), file=sys.stderr)
+"""
+
+
+def loaded_modules(*arguments):
+    result = subprocess.run(
+        [sys.executable, "-c", RUN_COMMAND] + list(arguments),
+        cwd=PACKAGE_DIRECTORY, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stderr.splitlines()[-1])
+
+
+def loaded(modules, package):
+    return [module for module in modules if module == package or module.startswith(package + ".")]
+
+
+class TestStartup(unittest.TestCase):
+    def test_help_does_not_load_sqlglot(self):
+        for arguments in (["--help"], ["pp", "--help"], ["grep", "--help"]):
+            modules = loaded_modules(*arguments)
+            self.assertEqual(loaded(modules, "sqlglot"), [], arguments)
+            self.assertEqual(loaded(modules, "multiprocessing"), [], arguments)
+            self.assertEqual(loaded(modules, "concurrent"), [], arguments)
+
+            # Option defaults come from sqlaxe.lib.defaults, not the modules using them
+            for module in ("batch", "compression", "file_handle_pool", "profiler", "sql_cache", "sql_server"):
+                self.assertEqual(loaded(modules, "sqlaxe.lib." + module), [], arguments)
+            self.assertNotIn("socketserver", modules, arguments)
+
+        # The logger, and logging.handlers with the socket module, wait until a
+        # command runs
+        modules = loaded_modules("--help")
+        for module in ("sqlaxe.lib.logger", "logging.handlers", "socket"):
+            self.assertNotIn(module, modules)
+
+    def test_pp_only_loads_what_it_uses(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sql_file = os.path.join(directory, "small.sql")
+            with open(sql_file, "w") as file:
+                file.write("SELECT 1;\nINSERT INTO users VALUES (1, 'a');\n")
+
+            modules = loaded_modules("pp", sql_file)
+
+        self.assertIn("sqlglot", modules)
+        self.assertEqual(loaded(modules, "sqlglot.optimizer"), [])
+        self.assertEqual(loaded(modules, "sqlaxe.lib.sql_splitter"), [])
+        self.assertEqual(loaded(modules, "multiprocessing"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
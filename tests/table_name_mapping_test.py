@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import unittest
+
+from sqlaxe.lib.table_name_mapping import TableNameMapping
+
+
+class TestTableNameMapping(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def test_csv(self):
+        path = self.write("mapping.csv", "old,new\nusers,t1_users\nre:^audit_(.*),t1_log_\\1\n")
+        mapping = TableNameMapping().load(path)
+
+        self.assertEqual(mapping.rename("users"), "t1_users")
+        self.assertEqual(mapping.rename("audit_users"), "t1_log_users")
+        self.assertEqual(mapping.rename("orders"), "orders")
+
+    def test_json_exact_names_win_over_rules(self):
+        path = self.write("mapping.json", json.dumps({"re:^(.*)$": "t1_\\1", "users": "accounts"}))
+        mapping = TableNameMapping().load(path)
+
+        self.assertEqual(mapping.rename("users"), "accounts")
+        self.assertEqual(mapping.rename("orders"), "t1_orders")
+
+    def test_invalid_row(self):
+        path = self.write("mapping.csv", "users\n")
+
+        with self.assertRaises(ValueError):
+            TableNameMapping().load(path)
+
+
+    def test_invalid_regular_expression(self):
+        path = self.write("mapping.csv", "users,accounts\nre:^(audit,log\n")
+
+        with self.assertRaisesRegex(ValueError, "re:\\^\\(audit"):
+            TableNameMapping().load(path)
+
+    def test_json_values_must_be_strings(self):
+        path = self.write("mapping.json", json.dumps({"users": "accounts", "orders": 5}))
+
+        with self.assertRaisesRegex(ValueError, "'orders'"):
+            TableNameMapping().load(path)
+        with self.assertRaises(ValueError):
+            TableNameMapping().add("users", None)
+
+if __name__ == "__main__":
+    unittest.main()